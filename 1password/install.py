@@ -7,24 +7,24 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "script"))
 from helpers import (
     XDG_CONFIG_HOME,
+    ManagedFile,
     brew_install,
-    chmod,
     command_exists,
+    converge_file,
     dry,
     error,
     get_machine_config,
     info,
     is_dry_run,
-    make_dir,
     parse_dry_run,
     success,
     warn,
-    write_file,
 )
 
 OP_CONFIG_DIR = XDG_CONFIG_HOME / "1Password"
 OP_SSH_CONFIG_DIR = OP_CONFIG_DIR / "ssh"
 SSH_AGENT_TOML = OP_SSH_CONFIG_DIR / "agent.toml"
+SSH_AGENT_TOML_MODE = 0o644
 
 
 def migrate_legacy_config_dir():
@@ -47,13 +47,8 @@ def migrate_legacy_config_dir():
     success(f"Migrated {legacy} to {OP_CONFIG_DIR}")
 
 
-def install_1password_ssh_agent_config():
-    if is_dry_run():
-        dry(f"Would generate {SSH_AGENT_TOML}")
-        return
-
-    make_dir(OP_SSH_CONFIG_DIR)
-
+def render_ssh_agent_config():
+    """Return agent.toml, listing the machine's SSH keys that authenticate."""
     content = (
         "# Generated by 1password/install.py — do not edit by hand\n"
         "# This is the 1Password SSH agent config file, which customize the\n"
@@ -89,15 +84,20 @@ def install_1password_ssh_agent_config():
             f'vault = "{vault}"\n'
             f'account = "{account}"\n\n'
         )
+    return content
 
-    mode = 0o644
-    if SSH_AGENT_TOML.exists() and SSH_AGENT_TOML.read_text() == content:
-        chmod(SSH_AGENT_TOML, mode)
+
+def install_1password_ssh_agent_config():
+    content = render_ssh_agent_config()
+    if converge_file(SSH_AGENT_TOML, content, mode=SSH_AGENT_TOML_MODE):
+        success(f"Generated {SSH_AGENT_TOML}")
+    else:
         success("1Password SSH agent.toml content already up to date")
-        return
 
-    write_file(SSH_AGENT_TOML, content, mode=mode)
-    success(f"Generated {SSH_AGENT_TOML}")
+
+def managed_files():
+    """The agent.toml install_1password_ssh_agent_config() writes."""
+    return [ManagedFile(SSH_AGENT_TOML, render_ssh_agent_config(), SSH_AGENT_TOML_MODE)]
 
 
 def main():
@@ -8,6 +8,8 @@ skills shell out to.
 
 The per-agent topics (claude, codex, copilot, gemini, opencode,
 pi-coding-agent) link the same directory into their own configuration.
+This script also compiles AGENTS.md once and refreshes every installed
+agent's copy of it (see helpers.render_all_agent_instructions).
 """
 
 import argparse
@@ -18,18 +20,21 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "script"))
 from helpers import (
     SKILLS_DIR,
     XDG_CONFIG_HOME,
-    command_exists,
     info,
     is_dry_run,
     link_directory,
     npm_install_global,
+    npm_is_installed,
     parse_dry_run,
+    render_all_agent_instructions,
     run_cmd,
     success,
     warn,
 )
 from shared import SBP_BRANDBOOK_SRC
 
+NPM_PACKAGES = ["agent-browser"]
+
 # Agents without a dedicated topic (Zed, Cursor, Cline, Warp, Amp, ...)
 # read skills from these shared locations instead of an agent-specific
 # directory.
@@ -47,7 +52,7 @@ def install_agent_browser():
     build. npm blocks the package's postinstall script by default, so fetch
     the browser explicitly.
     """
-    if command_exists("agent-browser"):
+    if npm_is_installed("agent-browser"):
         success("agent-browser already installed")
     else:
         info("Installing agent-browser...")
@@ -105,6 +110,7 @@ def main():
     info("Setting up shared coding-agent skills...")
 
     ok = link_skills()
+    render_all_agent_instructions()
     install_agent_browser()
 
     return 0 if ok else 1
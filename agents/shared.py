@@ -30,15 +30,18 @@ def build_attribution(email):
     return DEFAULT_ATTRIBUTION
 
 
-def render_instructions(email):
+def render_instructions(email, text=None):
     """Render global instructions with the attribution line for this machine.
 
     Every agent gets the literal line in its instructions, including Claude
     Code: its built-in `attribution` setting produced trailers that disagreed
     with these instructions, so it is switched off (see `write_settings()` in
     claude/install.py) and the instructions are the only source of trailers.
+
+    `text` is the content of AGENTS.md, if the caller has already read it.
     """
-    text = AGENTS_MD.read_text()
+    if text is None:
+        text = AGENTS_MD.read_text()
     if DEFAULT_ATTRIBUTION not in text:
         raise ValueError(f"{AGENTS_MD} no longer contains {DEFAULT_ATTRIBUTION!r}")
     return text.replace(DEFAULT_ATTRIBUTION, build_attribution(email))
@@ -7,7 +7,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "script"))
 from helpers import brew_install, brew_is_installed, error, info, parse_dry_run, success
 
-PACKAGES = ["ansible", "ansible-lint", "yamllint"]
+BREW_FORMULAE = ["ansible", "ansible-lint", "yamllint"]
 
 
 def main():
@@ -15,7 +15,7 @@ def main():
     info("Installing Ansible and related tools...")
 
     failed = []
-    for package in PACKAGES:
+    for package in BREW_FORMULAE:
         if brew_is_installed(package):
             success(f"{package} already installed")
         else:
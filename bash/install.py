@@ -8,6 +8,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'script'))
 from helpers import info, install_symlinks, make_dir, parse_dry_run, success
 
+LINK_SYMLINKS = True
+
 
 def main():
     parse_dry_run()
@@ -3,16 +3,21 @@
 
 import json
 import os
-import subprocess
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "script"))
+from downloads import run_script
 from helpers import (
     SKILLS_DIR,
+    ManagedFile,
+    agent_instructions_path,
     brew_install,
     brew_is_installed,
+    brew_tap,
     command_exists,
+    compiled_agents_md,
+    converge_file,
     dry,
     error,
     get_machine_config,
@@ -21,13 +26,17 @@ from helpers import (
     is_dry_run,
     link_directory,
     npm_install_global,
+    npm_is_installed,
     parse_dry_run,
     render_agents_md,
-    run_cmd,
     success,
     warn,
 )
 
+LINK_SYMLINKS = True
+
+CLAUDE_INSTALLER_URL = "https://claude.ai/install.sh"
+
 # claude-history is a TUI for reading past sessions: fuzzy search across
 # transcripts, then a scrollable viewer. Terminal scrollback is unreliable
 # for this because the TUI redraws progress boxes in place, so the
@@ -35,9 +44,14 @@ from helpers import (
 CLAUDE_HISTORY_TAP = "raine/claude-history"
 CLAUDE_HISTORY_FORMULA = "raine/claude-history/claude-history"
 
+BREW_TAPS = [CLAUDE_HISTORY_TAP]
+BREW_FORMULAE = [CLAUDE_HISTORY_FORMULA]
+# ccusage powers the monthly $-spend segment in the status line.
+NPM_PACKAGES = ["ccusage"]
 
-def write_settings(claude_dir, topic_dir):
-    """Write ~/.claude/settings.json from the base config plus machine tweaks.
+
+def render_settings(topic_dir):
+    """Return ~/.claude/settings.json: the base config plus machine tweaks.
 
     The base config sets `attribution` to empty strings. JSON takes no
     comments, so the reason lives here: that is the documented off-switch for
@@ -46,7 +60,6 @@ def write_settings(claude_dir, topic_dir):
     fight the attribution line in the compiled instructions.
     """
     base_file = topic_dir / "settings.json.base"
-    settings_path = claude_dir / "settings.json"
 
     with open(base_file) as f:
         settings = json.load(f)
@@ -58,24 +71,27 @@ def write_settings(claude_dir, topic_dir):
         xdg_config_home / "git" / "config.ai"
     )
 
-    machine_config, hostname = get_machine_config()
+    machine_config, _ = get_machine_config()
     if machine_config.get("claude", {}).get("removeDenyRules"):
-        info(f"Removing deny rules for machine: {hostname}")
         settings.get("permissions", {}).pop("deny", None)
 
-    if is_dry_run():
-        dry(f"would write {settings_path}")
-        return
+    return json.dumps(settings, indent=2) + "\n"
+
 
-    # If settings.json is currently a symlink, replace it with a real file
-    if settings_path.is_symlink():
-        settings_path.unlink()
+def write_settings(claude_dir, topic_dir):
+    """Write ~/.claude/settings.json (see render_settings())."""
+    settings_path = claude_dir / "settings.json"
+    content = render_settings(topic_dir)
 
-    with open(settings_path, "w") as f:
-        json.dump(settings, f, indent=2)
-        f.write("\n")
+    machine_config, hostname = get_machine_config()
+    if machine_config.get("claude", {}).get("removeDenyRules"):
+        info(f"Removing deny rules for machine: {hostname}")
 
-    success(f"Wrote: {settings_path}")
+    # If settings.json is currently a symlink, it is replaced with a real file
+    if converge_file(settings_path, content):
+        success(f"Wrote: {settings_path}")
+    else:
+        success(f"{settings_path} already up to date")
 
 
 def install_claude_history():
@@ -88,10 +104,7 @@ def install_claude_history():
         success("claude-history already installed")
         return
 
-    try:
-        run_cmd(["brew", "tap", CLAUDE_HISTORY_TAP])
-        run_cmd(["brew", "trust", "--tap", CLAUDE_HISTORY_TAP])
-    except subprocess.CalledProcessError:
+    if not brew_tap(CLAUDE_HISTORY_TAP, trust=True):
         warn(f"Failed to tap {CLAUDE_HISTORY_TAP}; skipping claude-history")
         return
 
@@ -101,6 +114,16 @@ def install_claude_history():
         warn("Failed to install claude-history")
 
 
+def managed_files():
+    """The compiled CLAUDE.md and settings.json that main() writes."""
+    claude_dir = Path.home() / ".claude"
+    topic_dir = Path(__file__).resolve().parent
+    return [
+        ManagedFile(agent_instructions_path("claude"), compiled_agents_md()),
+        ManagedFile(claude_dir / "settings.json", render_settings(topic_dir)),
+    ]
+
+
 def main():
     info("Installing Claude Code...")
     parse_dry_run()
@@ -115,7 +138,7 @@ def main():
 
     topic_dir = Path(__file__).resolve().parent
 
-    render_agents_md(claude_dir / "CLAUDE.md")
+    render_agents_md(agent_instructions_path("claude"))
     link_directory(SKILLS_DIR, claude_dir / "skills")
 
     # Link themes directory (LSD Warm Light/Dark, etc.). Claude Code picks up
@@ -128,18 +151,14 @@ def main():
     write_settings(claude_dir, topic_dir)
 
     info("Installing/updating Claude Code via official installer...")
-    try:
-        run_cmd(
-            ["sh", "-c", "curl -fsSL https://claude.ai/install.sh | sh"],
-            check=True,
-        )
-        success("Claude Code installed")
-    except subprocess.CalledProcessError:
+    # Claude Code updates itself, so an installer that has not changed
+    # since it last ran only needs to run again if claude is gone.
+    if not run_script(CLAUDE_INSTALLER_URL, skip_unchanged=command_exists("claude")):
         error("Failed to install Claude Code")
         return 1
+    success("Claude Code installed")
 
-    # ccusage powers the monthly $-spend segment in the status line.
-    if command_exists("ccusage"):
+    if npm_is_installed("ccusage"):
         success("ccusage already installed")
     elif npm_install_global("ccusage"):
         success("ccusage installed")
@@ -3,14 +3,12 @@
 # signed in (see the 1password topic). The 1Password account and
 # reference come from the current machine's config (machines/*.json,
 # "providers.litellm") — see provider_credential.py. There is no
-# fallback: a machine with no such config fails closed.
+# fallback: a machine with no such config fails closed. The key is read
+# through script/secret_broker.py, which keeps it in memory for a few
+# minutes so repeated launches skip `op read`.
 codex() {
-  local cred_output
-  cred_output=$(python3 "$HOME/.dotfiles/script/provider_credential.py" litellm) || return 1
-  local PROVIDER_CREDENTIAL_OP_ACCOUNT PROVIDER_CREDENTIAL_OP_REF
-  eval "$cred_output"
   local api_key
-  api_key=$(OP_ACCOUNT="$PROVIDER_CREDENTIAL_OP_ACCOUNT" op read "$PROVIDER_CREDENTIAL_OP_REF") || return 1
+  api_key=$(python3 "$HOME/.dotfiles/script/provider_credential.py" --read litellm) || return 1
   [ -n "$api_key" ] || return 1
   OPENAI_API_KEY="$api_key" command codex "$@"
 }
@@ -9,8 +9,12 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "script"))
 from helpers import (
     SKILLS_DIR,
+    ManagedFile,
+    agent_instructions_path,
     brew_install,
     brew_is_installed,
+    compiled_agents_md,
+    converge_file,
     error,
     info,
     is_dry_run,
@@ -19,9 +23,14 @@ from helpers import (
     parse_dry_run,
     render_agents_md,
     success,
-    write_file,
 )
 
+BREW_CASKS = ["codex"]
+
+
+def _codex_dir():
+    return Path.home() / ".codex"
+
 
 def install_codex():
     """Install Codex via Homebrew."""
@@ -50,19 +59,18 @@ def write_config(codex_dir, topic_dir):
         f"set = {{ GIT_CONFIG_GLOBAL = {json.dumps(str(git_config))} }}\n"
     )
 
-    if config_path.is_symlink() and not is_dry_run():
-        config_path.unlink()
-
-    write_file(config_path, config)
-    success(f"Wrote: {config_path}")
+    if converge_file(config_path, config):
+        success(f"Wrote: {config_path}")
+    else:
+        success(f"{config_path} already up to date")
 
 
 def configure_codex():
     """Configure Codex."""
     home = Path.home()
     dotfiles = home / ".dotfiles"
-    codex_dir = home / ".codex"
-    agents_md = codex_dir / "AGENTS.md"
+    codex_dir = _codex_dir()
+    agents_md = agent_instructions_path("codex")
     topic_dir = Path(__file__).resolve().parent
 
     if not is_dry_run():
@@ -75,6 +83,11 @@ def configure_codex():
     link_directory(SKILLS_DIR, codex_dir / "skills")
 
 
+def managed_files():
+    """The compiled AGENTS.md configure_codex() writes."""
+    return [ManagedFile(agent_instructions_path("codex"), compiled_agents_md())]
+
+
 def main():
     parse_dry_run()
     info("Setting up Codex...")
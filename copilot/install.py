@@ -7,8 +7,11 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "script"))
 from helpers import (
     SKILLS_DIR,
+    ManagedFile,
+    agent_instructions_path,
     brew_install,
     brew_is_installed,
+    compiled_agents_md,
     error,
     info,
     is_dry_run,
@@ -18,6 +21,12 @@ from helpers import (
     success,
 )
 
+BREW_FORMULAE = ["copilot-cli"]
+
+
+def _copilot_dir():
+    return Path.home() / ".copilot"
+
 
 def install_copilot_cli():
     """Install copilot-cli via Homebrew"""
@@ -37,9 +46,8 @@ def install_copilot_cli():
 
 def configure_copilot():
     """Configure copilot-instructions.md symlink"""
-    home = Path.home()
-    copilot_dir = home / ".copilot"
-    instructions_md = copilot_dir / "copilot-instructions.md"
+    copilot_dir = _copilot_dir()
+    instructions_md = agent_instructions_path("copilot")
 
     # Ensure ~/.copilot exists
     if not is_dry_run():
@@ -49,6 +57,13 @@ def configure_copilot():
     link_directory(SKILLS_DIR, copilot_dir / "skills")
 
 
+def managed_files():
+    """The compiled instructions configure_copilot() writes."""
+    return [
+        ManagedFile(agent_instructions_path("copilot"), compiled_agents_md())
+    ]
+
+
 def main():
     parse_dry_run()
     info("Setting up GitHub Copilot CLI...")
@@ -20,6 +20,8 @@ from helpers import (
     success,
 )
 
+MISE_TOOLS = ['fnox']
+
 
 def main():
     parse_dry_run()
@@ -33,7 +35,7 @@ def main():
         success("fnox already installed")
         return 0
 
-    if not mise_use('fnox'):
+    if not mise_use(MISE_TOOLS[0]):
         error("Failed to install fnox via 'mise use -g fnox'")
         return 1
 
@@ -14,7 +14,7 @@ from helpers import (
     success,
 )
 
-FONTS = [
+BREW_CASKS = [
     "font-cascadia-code",
     "font-iosevka",
     "font-jetbrains-mono",
@@ -27,7 +27,7 @@ def main():
     parse_dry_run()
     info("Installing fonts...")
 
-    for font in FONTS:
+    for font in BREW_CASKS:
         if brew_is_installed(font):
             success(f"{font} already installed")
         elif brew_install(font, cask=True):
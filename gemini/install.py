@@ -7,25 +7,33 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'script'))
 from helpers import (
     SKILLS_DIR,
+    ManagedFile,
+    agent_instructions_path,
     brew_is_installed,
     brew_uninstall,
-    command_exists,
+    compiled_agents_md,
     error,
     info,
     is_dry_run,
     link_directory,
     npm_install_global,
+    npm_is_installed,
     parse_dry_run,
     render_agents_md,
     success,
     warn,
 )
 
+NPM_PACKAGES = ['@google/gemini-cli']
+
+
+def _gemini_dir():
+    return Path.home() / '.gemini'
+
 
 def configure_gemini():
-    home = Path.home()
-    gemini_dir = home / '.gemini'
-    gemini_md = gemini_dir / 'GEMINI.md'
+    gemini_dir = _gemini_dir()
+    gemini_md = agent_instructions_path('gemini')
 
     if not is_dry_run():
         gemini_dir.mkdir(parents=True, exist_ok=True)
@@ -34,6 +42,11 @@ def configure_gemini():
     link_directory(SKILLS_DIR, gemini_dir / 'skills')
 
 
+def managed_files():
+    """The compiled GEMINI.md configure_gemini() writes."""
+    return [ManagedFile(agent_instructions_path('gemini'), compiled_agents_md())]
+
+
 def main():
     parse_dry_run()
     info("Installing Gemini CLI...")
@@ -45,9 +58,9 @@ def main():
         if not brew_uninstall('gemini-cli'):
             warn("Failed to uninstall Homebrew gemini-cli; continuing anyway")
 
-    if command_exists('gemini'):
+    if npm_is_installed(NPM_PACKAGES[0]):
         success("Gemini CLI already installed")
-    elif npm_install_global('@google/gemini-cli'):
+    elif npm_install_global(NPM_PACKAGES[0]):
         success("Gemini CLI installed")
     else:
         error("Failed to install Gemini CLI")
@@ -9,9 +9,11 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "script"))
 from helpers import (
     AI_KEY_PUB_PATH,
     SSH_CONFIG_AI_PATH,
+    ManagedFile,
     backup_file,
     brew_install,
     brew_is_installed,
+    converge_file,
     error,
     find_ssh_key,
     get_machine_config,
@@ -21,9 +23,11 @@ from helpers import (
     run_cmd,
     success,
     warn,
-    write_file,
 )
 
+BREW_FORMULAE = ["git", "git-filter-repo", "git-lfs"]
+BREW_CASKS = ["git-credential-manager"]
+
 GPG_SSH_PROGRAM_DEFAULT = "/Applications/1Password.app/Contents/MacOS/op-ssh-sign"
 
 
@@ -42,25 +46,6 @@ def _render_config(template, **values):
     return template.format(**values)
 
 
-def _write_real_file(path, content):
-    """Write content to path, replacing a symlink if one is there.
-
-    The repo previously symlinked ~/.config/git/config to a tracked file;
-    after migrating to a generated config we want a real file at that
-    path so writes don't follow the symlink back into the repo.
-    """
-    path = Path(path)
-    if path.is_symlink():
-        if is_dry_run():
-            info(f"would unlink symlink at {path}")
-        else:
-            path.unlink()
-    if path.exists() and path.read_text() == content:
-        return False
-    write_file(path, content)
-    return True
-
-
 def migrate_legacy_files():
     """Move aside files left over from the include-based config layout.
 
@@ -85,8 +70,8 @@ def migrate_legacy_files():
         success(f"Backed up legacy {path}")
 
 
-def generate_config():
-    """Write ~/.config/git/config and ~/.config/git/config.ai.
+def render_configs():
+    """Return the contents of ~/.config/git/config and ~/.config/git/config.ai.
 
     Both files are produced from git/config.template with different
     substitutions: the regular config uses the machine's primary
@@ -97,7 +82,7 @@ def generate_config():
     template_path = Path(__file__).resolve().parent / "config.template"
     template = template_path.read_text()
 
-    machine_config, hostname = get_machine_config()
+    machine_config, _ = get_machine_config()
     git_user = machine_config["git"]["user"]
     signing_key = git_user["signingkey"]
     signing_key_pub = ""
@@ -108,9 +93,6 @@ def generate_config():
         else:
             signing_key_pub = ssh_key["public_key"]
 
-    config_path = _xdg_git_dir() / "config"
-    ai_path = _xdg_git_dir() / "config.ai"
-
     main_content = _render_config(
         template,
         allowed_signers_file=str(_xdg_git_dir() / "allowed-signers"),
@@ -131,20 +113,33 @@ def generate_config():
         editor="vim",
         ssh_command_block=f"\tsshCommand = ssh -F {SSH_CONFIG_AI_PATH}\n",
     )
+    return main_content, ai_content
+
+
+def generate_config():
+    """Write ~/.config/git/config and ~/.config/git/config.ai."""
+    machine_config, hostname = get_machine_config()
+    git_user = machine_config["git"]["user"]
+    config_path = _xdg_git_dir() / "config"
+    ai_path = _xdg_git_dir() / "config.ai"
+    main_content, ai_content = render_configs()
 
-    if _write_real_file(config_path, main_content):
+    # The repo previously symlinked ~/.config/git/config to a tracked file;
+    # converge_file() replaces such a symlink with a real file, so writes
+    # don't follow it back into the repo.
+    if converge_file(config_path, main_content):
         success(f"Generated {config_path} for {hostname}")
     else:
         success(f"Git config already up to date ({git_user['name']})")
 
-    if _write_real_file(ai_path, ai_content):
+    if converge_file(ai_path, ai_content):
         success(f"Generated {ai_path}")
     else:
         success(f"Git {ai_path} already up to date")
 
 
-def generate_allowed_signers():
-    """Regenerate ~/.config/git/allowed-signers from known signing keys.
+def render_allowed_signers():
+    """Return the contents of ~/.config/git/allowed-signers, and its key count.
 
     Assembles entries from the machine's primary signing key (machine
     config) and the Claude signing key if present. Both map to the
@@ -156,8 +151,6 @@ def generate_allowed_signers():
     Takes ownership of the file — manual additions (e.g. collaborator
     keys) will be overwritten.
     """
-    allowed_signers = _xdg_git_dir() / "allowed-signers"
-
     machine_config, _ = get_machine_config()
     git_user = machine_config["git"]["user"]
     email = git_user["email"]
@@ -174,12 +167,29 @@ def generate_allowed_signers():
 
     content = "# Generated by git/install.py — do not edit by hand\n"
     content += "\n".join(sorted(entries)) + "\n" if entries else ""
+    return content, len(entries)
 
-    if allowed_signers.exists() and allowed_signers.read_text() == content:
-        success("Git allowed-signers already up to date")
+
+def generate_allowed_signers():
+    """Regenerate ~/.config/git/allowed-signers from known signing keys."""
+    allowed_signers = _xdg_git_dir() / "allowed-signers"
+    content, count = render_allowed_signers()
+
+    if converge_file(allowed_signers, content):
+        success(f"Generated {allowed_signers} ({count} key(s))")
     else:
-        write_file(allowed_signers, content)
-        success(f"Generated {allowed_signers} ({len(entries)} key(s))")
+        success("Git allowed-signers already up to date")
+
+
+def managed_files():
+    """The files generate_config() and generate_allowed_signers() write."""
+    main_content, ai_content = render_configs()
+    signers, _ = render_allowed_signers()
+    return [
+        ManagedFile(_xdg_git_dir() / "config", main_content),
+        ManagedFile(_xdg_git_dir() / "config.ai", ai_content),
+        ManagedFile(_xdg_git_dir() / "allowed-signers", signers),
+    ]
 
 
 def main():
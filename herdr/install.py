@@ -15,6 +15,8 @@ from helpers import (
     success,
 )
 
+BREW_FORMULAE = ['herdr']
+
 
 def main():
     parse_dry_run()
@@ -20,6 +20,8 @@ from helpers import (
     success,
 )
 
+MISE_TOOLS = ['java@temurin-21']
+
 
 def main():
     parse_dry_run()
@@ -29,7 +31,7 @@ def main():
         error("mise not found; install the 'mise' topic first")
         return 1
 
-    if not mise_use('java@temurin-21'):
+    if not mise_use(MISE_TOOLS[0]):
         error("Failed to install OpenJDK via mise")
         return 1
 
@@ -7,6 +7,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "script"))
 from helpers import brew_install, brew_is_installed, error, info, parse_dry_run, success
 
+BREW_FORMULAE = ["jq"]
+
 
 def main():
     parse_dry_run()
@@ -16,7 +16,6 @@ lsimons-skills repository (see `agents/README.md`), not installed by
 `memex setup`, which prompts for a TTY.
 """
 
-import subprocess
 import sys
 from pathlib import Path
 
@@ -24,6 +23,7 @@ sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "script"))
 from helpers import (
     brew_install,
     brew_is_installed,
+    brew_tap,
     command_exists,
     dry,
     error,
@@ -38,6 +38,9 @@ from helpers import (
 TAP = "nicosuave/tap"
 FORMULA = "nicosuave/tap/memex"
 
+BREW_TAPS = [TAP]
+BREW_FORMULAE = [FORMULA]
+
 HERDR_PLUGIN = "nicosuave/memex"
 HERDR_PLUGIN_ID = "nicosuave.memex"
 
@@ -48,10 +51,7 @@ def install_memex():
         success("memex already installed")
         return True
 
-    try:
-        run_cmd(["brew", "tap", TAP])
-        run_cmd(["brew", "trust", "--tap", TAP])
-    except subprocess.CalledProcessError:
+    if not brew_tap(TAP, trust=True):
         error(f"Failed to tap {TAP}")
         return False
 
@@ -16,6 +16,7 @@ from helpers import (
     XDG_CONFIG_HOME,
     brew_install,
     command_exists,
+    converge_file,
     dry,
     error,
     info,
@@ -24,7 +25,6 @@ from helpers import (
     run_cmd,
     set_toml_value,
     success,
-    write_file,
 )
 
 MINIMUM_RELEASE_AGE = '7d'
@@ -59,8 +59,6 @@ def install_launch_agent():
         dry(f"would install LaunchAgent {dest}")
         return True
 
-    agents_dir.mkdir(parents=True, exist_ok=True)
-
     if dest.exists():
         run_cmd(
             ['launchctl', 'unload', str(dest)],
@@ -68,22 +66,7 @@ def install_launch_agent():
             check=False,
         )
 
-    if dest.exists() and dest.read_text() == content:
-        result = run_cmd(
-            ['launchctl', 'load', str(dest)],
-            capture_output=True,
-            check=False,
-        )
-        if result.returncode != 0:
-            error(
-                "Failed to load mise-gui-path LaunchAgent: "
-                f"{(result.stderr or '').strip()}"
-            )
-            return False
-        success("mise-gui-path LaunchAgent already up to date")
-        return True
-
-    write_file(dest, content)
+    changed = converge_file(dest, content)
     result = run_cmd(
         ['launchctl', 'load', str(dest)],
         capture_output=True,
@@ -95,10 +78,13 @@ def install_launch_agent():
             f"{(result.stderr or '').strip()}"
         )
         return False
-    success(
-        "Installed mise-gui-path LaunchAgent "
-        "(GUI apps will see mise shims after next login)"
-    )
+    if changed:
+        success(
+            "Installed mise-gui-path LaunchAgent "
+            "(GUI apps will see mise shims after next login)"
+        )
+    else:
+        success("mise-gui-path LaunchAgent already up to date")
     return True
 
 
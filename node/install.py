@@ -16,6 +16,8 @@ from helpers import (
     success,
 )
 
+MISE_TOOLS = ['node@24']
+
 
 def main():
     parse_dry_run()
@@ -25,7 +27,7 @@ def main():
         error("mise not found; install the 'mise' topic first")
         return 1
 
-    if not mise_use('node@24'):
+    if not mise_use(MISE_TOOLS[0]):
         error("Failed to install Node.js via mise")
         return 1
 
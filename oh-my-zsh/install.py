@@ -2,11 +2,11 @@
 """Installation script for Oh My Zsh"""
 
 import os
-import subprocess
 import sys
 from pathlib import Path
 
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'script'))
+from downloads import run_script
 from helpers import (
     brew_install,
     brew_is_installed,
@@ -15,10 +15,16 @@ from helpers import (
     install_symlinks,
     is_dry_run,
     parse_dry_run,
-    run_cmd,
     success,
 )
 
+LINK_SYMLINKS = True
+BREW_FORMULAE = ['powerlevel10k']
+
+OMZ_INSTALLER_URL = (
+    "https://raw.githubusercontent.com/ohmyzsh/ohmyzsh/master/tools/install.sh"
+)
+
 
 def install_oh_my_zsh():
     info("Installing Oh My Zsh...")
@@ -28,25 +34,14 @@ def install_oh_my_zsh():
         success("Oh My Zsh already installed")
         return True
 
-    try:
-        env = os.environ.copy()
-        env['RUNZSH'] = 'no'
-        env['CHSH'] = 'no'
-
-        omz_url = (
-            "https://raw.githubusercontent.com"
-            "/ohmyzsh/ohmyzsh/master/tools/install.sh"
-        )
-        run_cmd(
-            ['sh', '-c', f'curl -fsSL {omz_url} | sh'],
-            check=True,
-            env=env,
-        )
-        success("Oh My Zsh installed")
-        return True
-    except subprocess.CalledProcessError:
+    env = os.environ.copy()
+    env['RUNZSH'] = 'no'
+    env['CHSH'] = 'no'
+    if not run_script(OMZ_INSTALLER_URL, env=env):
         error("Failed to install Oh My Zsh")
         return False
+    success("Oh My Zsh installed")
+    return True
 
 
 def install_powerlevel10k():
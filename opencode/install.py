@@ -8,8 +8,11 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "script"))
 from helpers import (
     SKILLS_DIR,
+    ManagedFile,
+    agent_instructions_path,
     brew_install,
     brew_is_installed,
+    compiled_agents_md,
     dry,
     error,
     info,
@@ -21,6 +24,13 @@ from helpers import (
     success,
 )
 
+BREW_FORMULAE = ["anomalyco/tap/opencode"]
+
+
+def _opencode_dir():
+    home = Path.home()
+    return Path(os.environ.get("XDG_CONFIG_HOME", home / ".config")) / "opencode"
+
 
 def install_opencode():
     """Install OpenCode via the anomalyco Homebrew tap."""
@@ -42,10 +52,9 @@ def install_opencode():
 def configure_opencode():
     """Configure OpenCode symlinks."""
     home = Path.home()
-    xdg_config_home = Path(os.environ.get("XDG_CONFIG_HOME", home / ".config"))
     dotfiles = home / ".dotfiles"
-    opencode_dir = xdg_config_home / "opencode"
-    agents_md = opencode_dir / "AGENTS.md"
+    opencode_dir = _opencode_dir()
+    agents_md = agent_instructions_path("opencode")
     config_json = opencode_dir / "opencode.json"
     config_json_source = dotfiles / "opencode" / "opencode.json.symlink"
     legacy_config_json = opencode_dir / "config.json"
@@ -69,6 +78,11 @@ def configure_opencode():
             legacy_config_json.unlink()
 
 
+def managed_files():
+    """The compiled AGENTS.md configure_opencode() writes."""
+    return [ManagedFile(agent_instructions_path("opencode"), compiled_agents_md())]
+
+
 def main():
     parse_dry_run()
     info("Setting up OpenCode...")
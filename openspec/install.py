@@ -8,17 +8,17 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'script'))
 from helpers import (
     brew_is_installed,
-    command_exists,
     error,
     info,
-    is_dry_run,
+    npm_install_global,
+    npm_is_installed,
     parse_dry_run,
     run_cmd,
     success,
     warn,
 )
 
-NPM_PACKAGE = '@fission-ai/openspec'
+NPM_PACKAGES = ['@fission-ai/openspec']
 
 
 def uninstall_brew_openspec():
@@ -39,18 +39,12 @@ def main():
 
     uninstall_brew_openspec()
 
-    if not command_exists('npm') and not is_dry_run():
-        error("npm not found; run node/install.py first")
-        return 1
-
-    if command_exists('openspec'):
+    if npm_is_installed(NPM_PACKAGES[0]):
         success("openspec already installed")
         return 0
 
-    try:
-        run_cmd(['npm', 'install', '-g', NPM_PACKAGE], check=True)
-    except subprocess.CalledProcessError:
-        error(f"Failed to install {NPM_PACKAGE} via npm")
+    if not npm_install_global(NPM_PACKAGES[0]):
+        error(f"Failed to install {NPM_PACKAGES[0]} via npm")
         return 1
 
     success("openspec installed")
@@ -10,29 +10,37 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / 'script'))
 from helpers import (
     SKILLS_DIR,
-    command_exists,
-    dry,
+    ManagedFile,
+    agent_instructions_path,
+    compiled_agents_md,
+    converge_file,
     error,
     info,
     is_dry_run,
     link_directory,
     npm_install_global,
+    npm_is_installed,
     parse_dry_run,
     render_agents_md,
     success,
-    write_file,
 )
 
+NPM_PACKAGES = ['@mariozechner/pi-coding-agent']
+
+
+def _pi_agent_dir():
+    return Path.home() / '.pi' / 'agent'
+
 
 def install_npm_package():
     """Install the pi-coding-agent npm package via mise-managed npm."""
     info("Installing pi-coding-agent npm package...")
 
-    if command_exists('pi'):
+    if npm_is_installed(NPM_PACKAGES[0]):
         success("pi-coding-agent already installed")
         return 0
 
-    if npm_install_global('@mariozechner/pi-coding-agent'):
+    if npm_install_global(NPM_PACKAGES[0]):
         success("pi-coding-agent installed")
         return 0
 
@@ -44,8 +52,8 @@ def configure_agent():
     """Configure AGENTS.md symlink, themes, and settings.json"""
     home = Path.home()
     topic_dir = Path(__file__).resolve().parent
-    pi_agent_dir = home / '.pi' / 'agent'
-    agents_md = pi_agent_dir / 'AGENTS.md'
+    pi_agent_dir = _pi_agent_dir()
+    agents_md = agent_instructions_path('pi-coding-agent')
     settings_json = pi_agent_dir / 'settings.json'
 
     if not is_dry_run():
@@ -89,17 +97,19 @@ def configure_agent():
                 updated = True
         if updated:
             content = json.dumps(settings, indent=2) + '\n'
-            write_file(settings_json, content)
+            converge_file(settings_json, content)
             success("Updated settings.json with defaults")
         else:
             success("settings.json already has correct defaults")
     else:
-        if is_dry_run():
-            dry(f"would write {settings_json}")
-        else:
-            content = json.dumps(default_settings, indent=2) + '\n'
-            write_file(settings_json, content)
-            success("Created settings.json with defaults")
+        content = json.dumps(default_settings, indent=2) + '\n'
+        converge_file(settings_json, content)
+        success("Created settings.json with defaults")
+
+
+def managed_files():
+    """The compiled AGENTS.md configure_agent() writes."""
+    return [ManagedFile(agent_instructions_path('pi-coding-agent'), compiled_agents_md())]
 
 
 def main():
@@ -23,6 +23,10 @@ from helpers import (
     success,
 )
 
+LINK_SYMLINKS = True
+BREW_FORMULAE = ['python@3']
+MISE_TOOLS = ['python@3.14']
+
 
 def install_homebrew_python():
     if brew_is_installed('python@3'):
@@ -44,7 +48,7 @@ def install_mise_python():
         return False
 
     info("Installing Python via mise...")
-    if not mise_use('python@3.14'):
+    if not mise_use(MISE_TOOLS[0]):
         error("Failed to install Python via mise")
         return False
 
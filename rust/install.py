@@ -15,6 +15,8 @@ from helpers import (
     success,
 )
 
+MISE_TOOLS = ['rust@latest']
+
 
 def main():
     parse_dry_run()
@@ -24,7 +26,7 @@ def main():
         error("mise not found; install the 'mise' topic first")
         return 1
 
-    if not mise_use('rust@latest'):
+    if not mise_use(MISE_TOOLS[0]):
         error("Failed to install Rust via mise")
         return 1
 
@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""List, restore and prune the backups kept in ~/.dotfiles-backup.
+
+helpers.backup_file() moves every file, symlink or directory the installer
+replaces to ``~/.dotfiles-backup/<run>/<path relative to ~>``, where
+``<run>`` is the installer's start time, and records it in
+``manifests/<run>.json``. Regular files are hard links into ``blobs/``,
+named by the sha256 of their content, so disk use grows with distinct
+content rather than with the number of runs.
+
+    backups.py list                      # runs, oldest first, and disk use
+    backups.py list RUN                  # what RUN backed up
+    backups.py restore RUN [PATH ...]    # put (some of) RUN's files back
+    backups.py prune --keep 10 --older-than 90
+
+A restore backs up whatever is at the original path first, as a new run.
+Pruning removes whole runs, then every blob no remaining run links to.
+Runs from before manifests existed are listed, restored and pruned too.
+"""
+
+import argparse
+import os
+import shutil
+import stat
+import sys
+from datetime import datetime, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import helpers
+from helpers import (
+    backup_file,
+    backup_manifest_path,
+    backup_root,
+    converge_file,
+    dry,
+    error,
+    info,
+    is_dry_run,
+    read_json,
+    set_dry_run,
+    success,
+)
+
+RUN_FORMAT = "%Y%m%d_%H%M%S"
+
+# Directories of backup_root() that are not runs.
+STORE_DIRS = {"blobs", "manifests"}
+
+
+def list_runs():
+    """Return the names of all backup runs, oldest first."""
+    root = backup_root()
+    names = set()
+    if root.is_dir():
+        names.update(
+            child.name for child in root.iterdir()
+            if child.is_dir() and child.name not in STORE_DIRS
+        )
+    manifests = root / "manifests"
+    if manifests.is_dir():
+        names.update(path.stem for path in manifests.glob("*.json"))
+    return sorted(names)
+
+
+def run_time(run):
+    """Return when run started, from its name or else its directory's mtime."""
+    try:
+        return datetime.strptime(run, RUN_FORMAT)  # noqa: DTZ007 - local, like NOW
+    except ValueError:
+        try:
+            mtime = (backup_root() / run).stat().st_mtime
+        except OSError:
+            mtime = backup_manifest_path(run).stat().st_mtime
+        return datetime.fromtimestamp(mtime)  # noqa: DTZ006
+
+
+def _legacy_entries(run_dir):
+    """Derive entries from a run tree written before manifests existed."""
+    entries = []
+    for parent, dirs, names in os.walk(run_dir):
+        for name in sorted([*names, *(d for d in dirs if (Path(parent) / d).is_symlink())]):
+            backup = (Path(parent) / name).relative_to(run_dir)
+            if backup.parts[0] == "__absolute__":
+                path = Path("/", *backup.parts[1:])
+            else:
+                path = helpers.HOME / backup
+            is_link = (run_dir / backup).is_symlink()
+            entries.append({
+                "path": str(path),
+                "backup": str(backup),
+                "kind": "symlink" if is_link else "file",
+            })
+        dirs.sort()
+    return entries
+
+
+def run_entries(run):
+    """Return the manifest entries of run (derived for pre-manifest runs)."""
+    data = read_json(backup_manifest_path(run))
+    if isinstance(data, dict):
+        return list(data.get("entries", []))
+    return _legacy_entries(backup_root() / run)
+
+
+def disk_usage():
+    """Return (bytes backed up, bytes actually stored) across all runs."""
+    root = backup_root()
+    logical = 0
+    inodes = {}
+    for top in [*list_runs(), "blobs"]:
+        for parent, _, names in os.walk(root / top):
+            for name in names:
+                st = (Path(parent) / name).lstat()
+                if not stat.S_ISREG(st.st_mode):
+                    continue
+                if top != "blobs":
+                    logical += st.st_size
+                inodes[(st.st_dev, st.st_ino)] = st.st_size
+    return logical, sum(inodes.values())
+
+
+def _restore_entry(run, entry):
+    source = backup_root() / run / entry["backup"]
+    target = Path(entry["path"])
+    kind = entry.get("kind", "file")
+    if not (source.exists() or source.is_symlink()):
+        error(f"{run}: {entry['backup']} is missing from the backup")
+        return False
+
+    if kind == "file":
+        data = source.read_bytes()
+        if target.is_symlink() or not target.is_file() or target.read_bytes() != data:
+            backup_file(target)
+        if not converge_file(target, data, mode=entry.get("mode")):
+            success(f"Already restored: {target}")
+            return True
+    elif kind == "symlink":
+        link = os.readlink(source)
+        if target.is_symlink() and os.readlink(target) == link:
+            success(f"Already restored: {target}")
+            return True
+        backup_file(target)
+        if is_dry_run():
+            dry(f"would link {target} -> {link}", "link", path=str(target), source=link)
+        else:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.symlink_to(link)
+    else:
+        backup_file(target)
+        if is_dry_run():
+            dry(f"would restore {target} from {source}", "restore", path=str(target))
+        else:
+            shutil.copytree(source, target, symlinks=True)
+    if not is_dry_run():
+        success(f"Restored {target}")
+    return True
+
+
+def restore(run, paths=()):
+    """Restore run's entries, or only those for ``paths``. Returns success."""
+    entries = run_entries(run)
+    if paths:
+        wanted = {str(Path(p).expanduser().absolute()) for p in paths}
+        unknown = wanted - {entry["path"] for entry in entries}
+        for path in sorted(unknown):
+            error(f"{run} has no backup of {path}")
+        if unknown:
+            return False
+        entries = [entry for entry in entries if entry["path"] in wanted]
+    ok = True
+    for entry in entries:
+        ok = _restore_entry(run, entry) and ok
+    return ok
+
+
+def collect_garbage():
+    """Remove every blob no run links to any more. Returns how many."""
+    removed = 0
+    for blob in sorted((backup_root() / "blobs").glob("*/*")):
+        if blob.stat().st_nlink > 1:
+            continue
+        if is_dry_run():
+            dry(f"would remove unreferenced blob {blob.name}", "remove", path=str(blob))
+        else:
+            blob.unlink()
+        removed += 1
+    return removed
+
+
+def prune(keep=None, older_than=None, now=None):
+    """Remove runs beyond the newest ``keep`` or older than ``older_than`` days.
+
+    Then removes the blobs that are no longer linked from any run. Returns
+    the names of the runs removed.
+    """
+    runs = list_runs()
+    doomed = set()
+    if keep is not None:
+        doomed.update(runs[:max(len(runs) - keep, 0)])
+    if older_than is not None:
+        cutoff = (now or datetime.now()) - timedelta(days=older_than)  # noqa: DTZ005
+        doomed.update(run for run in runs if run_time(run) < cutoff)
+    for run in sorted(doomed):
+        if is_dry_run():
+            dry(f"would remove backup run {run}", "remove", path=str(backup_root() / run))
+            continue
+        shutil.rmtree(backup_root() / run, ignore_errors=True)
+        backup_manifest_path(run).unlink(missing_ok=True)
+    if not is_dry_run():
+        collect_garbage()
+    return sorted(doomed)
+
+
+def _size(count):
+    for unit in ("B", "KiB", "MiB"):
+        if count < 1024:
+            return f"{count:.0f} {unit}"
+        count /= 1024
+    return f"{count:.1f} GiB"
+
+
+def cmd_list(args):
+    if args.run:
+        if args.run not in list_runs():
+            error(f"No backup run {args.run}")
+            return 1
+        for entry in run_entries(args.run):
+            print(f"{entry['path']}  ({entry.get('kind', 'file')}, {entry['backup']})")
+        return 0
+    runs = list_runs()
+    for run in runs:
+        manifest = "" if backup_manifest_path(run).exists() else "  (no manifest)"
+        print(f"{run}  {len(run_entries(run))} entries{manifest}")
+    logical, stored = disk_usage()
+    info(f"{len(runs)} runs; {_size(logical)} of backups stored in {_size(stored)}")
+    return 0
+
+
+def cmd_restore(args):
+    if args.run not in list_runs():
+        error(f"No backup run {args.run}")
+        return 1
+    return 0 if restore(args.run, args.paths) else 1
+
+
+def cmd_prune(args):
+    removed = prune(keep=args.keep, older_than=args.older_than)
+    if not is_dry_run():
+        success(f"Removed {len(removed)} backup runs")
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--dry-run", "-n",
+        action="store_true",
+        help="Show what restore or prune would do without doing it.",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    list_parser = commands.add_parser("list", help="List backup runs, or one run's entries.")
+    list_parser.add_argument("run", nargs="?")
+    list_parser.set_defaults(func=cmd_list)
+
+    restore_parser = commands.add_parser("restore", help="Restore a run's backups.")
+    restore_parser.add_argument("run")
+    restore_parser.add_argument(
+        "paths", nargs="*", help="Original paths to restore (default: all of them)."
+    )
+    restore_parser.set_defaults(func=cmd_restore)
+
+    prune_parser = commands.add_parser("prune", help="Remove old runs and unused blobs.")
+    prune_parser.add_argument(
+        "--keep", type=int, metavar="N", help="Keep only the newest N runs."
+    )
+    prune_parser.add_argument(
+        "--older-than", type=float, metavar="DAYS", help="Remove runs older than DAYS."
+    )
+    prune_parser.set_defaults(func=cmd_prune)
+
+    args = parser.parse_args(argv)
+    if args.command == "prune":
+        if args.keep is None and args.older_than is None:
+            parser.error("prune needs --keep and/or --older-than")
+        if args.keep is not None and args.keep < 0:
+            parser.error("--keep must not be negative")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    set_dry_run(args.dry_run)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -12,8 +12,9 @@ Checks, in order:
   4. actionlint over the GitHub Actions workflows
   5. JSON validity and machine configuration validation
   6. Standard-library unit tests
-  7. Installer dry-run: ``python3 script/install.py --dry-run``
-     (exercises every topic installer with dry-run propagated)
+  7. Installer dry-run: ``python3 script/install.py --plan=json``
+     (exercises every topic installer with dry-run propagated, and
+     checks that the plan it prints is valid JSON covering the topics)
 
 Every external tool used here is exact-pinned in ``.mise.toml``, so
 ``mise run check`` provisions all of them. Running this script bare,
@@ -402,9 +403,9 @@ def check_tests() -> bool:
 
 
 def check_install_dry_run() -> bool:
-    """Run `script/install.py --dry-run` to exercise every topic installer."""
+    """Run `script/install.py --plan=json` to exercise every topic installer."""
     install_py = SCRIPT_DIR / 'install.py'
-    print('[check] install.py --dry-run')
+    print('[check] install.py --plan=json')
     with tempfile.TemporaryDirectory() as temp_dir:
         home = Path(temp_dir) / 'home'
         env = os.environ.copy()
@@ -425,19 +426,29 @@ def check_install_dry_run() -> bool:
             }
         )
         try:
-            subprocess.run(
-                [sys.executable, str(install_py), '--dry-run'],
+            result = subprocess.run(
+                [sys.executable, str(install_py), '--plan=json'],
                 check=True,
                 cwd=REPO_ROOT,
                 env=env,
+                stdout=subprocess.PIPE,
+                text=True,
             )
         except subprocess.CalledProcessError:
-            print('[FAIL] install.py --dry-run returned non-zero')
+            print('[FAIL] install.py --plan=json returned non-zero')
             return False
         if home.exists():
-            print('[FAIL] install.py --dry-run modified its temporary home')
+            print('[FAIL] install.py --plan=json modified its temporary home')
             return False
-    print('[ok]   install.py --dry-run')
+    try:
+        plan = json.loads(result.stdout)
+    except json.JSONDecodeError as e:
+        print(f'[FAIL] install.py --plan=json printed invalid JSON: {e}')
+        return False
+    if not plan.get('ok') or not plan.get('topics'):
+        print('[FAIL] install.py --plan=json planned no successful topics')
+        return False
+    print(f'[ok]   install.py --plan=json ({len(plan["topics"])} topics)')
     return True
 
 
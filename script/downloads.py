@@ -0,0 +1,189 @@
+"""Cache the installer scripts that topics used to pipe from curl into sh.
+
+fetch() downloads a URL into ``$XDG_CACHE_HOME/dotfiles/downloads``, stored
+as ``blobs/<sha256>`` and indexed by URL in ``index.json`` together with
+the ETag and Last-Modified the server sent. A later fetch asks the server
+with If-None-Match / If-Modified-Since and reuses the blob on a 304, so an
+unchanged script costs one small round-trip. If the server cannot be
+reached, the cached copy is used.
+
+The index also records the digest of the last copy of each script that
+ran successfully (Download.mark_ran), so an installer can skip running a
+script again while it is unchanged (run_script(skip_unchanged=True)).
+
+If this Python cannot fetch a script at all (no cached copy either; say
+its certificates are broken), run_script falls back to curl, uncached.
+"""
+
+import hashlib
+import os
+import subprocess
+import tempfile
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import helpers
+from helpers import dry, error, info, is_dry_run, read_json, run_cmd, warn, write_json
+
+TIMEOUT = 30
+
+_index_lock = threading.Lock()
+
+
+class DownloadError(Exception):
+    """A URL could not be fetched and there is no cached copy of it."""
+
+
+def downloads_dir():
+    return Path(helpers.XDG_CACHE_HOME_STR) / "dotfiles" / "downloads"
+
+
+def index_path():
+    return downloads_dir() / "index.json"
+
+
+def blob_path(digest):
+    return downloads_dir() / "blobs" / digest
+
+
+def _update_entry(url, **fields):
+    with _index_lock:
+        index = read_json(index_path(), {})
+        entry = index.setdefault(url, {})
+        previous = entry.get("sha256")
+        entry.update(fields)
+        write_json(index_path(), index)
+        # The superseded copy goes, unless another URL serves the same bytes.
+        if previous and previous != entry.get("sha256") and not any(
+            other.get("sha256") == previous for other in index.values()
+        ):
+            blob_path(previous).unlink(missing_ok=True)
+
+
+class Download:
+    """A fetched URL: its cached file and the sha256 of its content."""
+
+    def __init__(self, url, digest, ran):
+        self.url = url
+        self.sha256 = digest
+        self.path = blob_path(digest)
+        self._ran = ran
+
+    def ran_before(self):
+        """Return True if exactly this content has run successfully before."""
+        return self._ran == self.sha256
+
+    def mark_ran(self):
+        """Record that this content ran successfully."""
+        _update_entry(self.url, ran=self.sha256)
+        self._ran = self.sha256
+
+
+def _store(response):
+    """Write the response body to its blob; return the sha256."""
+    blobs = downloads_dir() / "blobs"
+    blobs.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=blobs, prefix=".download-")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while chunk := response.read(65536):
+                digest.update(chunk)
+                f.write(chunk)
+        os.chmod(tmp, 0o644)
+        os.replace(tmp, blob_path(digest.hexdigest()))
+    except BaseException:
+        os.unlink(tmp)
+        raise
+    return digest.hexdigest()
+
+
+def fetch(url, timeout=TIMEOUT):
+    """Return a Download of url, revalidating any cached copy first.
+
+    Raises DownloadError if url cannot be fetched and was never cached.
+    """
+    entry = read_json(index_path(), {}).get(url, {})
+    cached = entry.get("sha256")
+    if cached and not blob_path(cached).is_file():
+        cached = None
+
+    request = urllib.request.Request(url)
+    if cached:
+        if entry.get("etag"):
+            request.add_header("If-None-Match", entry["etag"])
+        if entry.get("last_modified"):
+            request.add_header("If-Modified-Since", entry["last_modified"])
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            digest = _store(response)
+            headers = response.headers
+    except urllib.error.HTTPError as e:
+        if e.code == 304 and cached:
+            return Download(url, cached, entry.get("ran"))
+        if not cached:
+            raise DownloadError(f"Could not download {url}: HTTP {e.code}") from e
+        warn(f"Could not revalidate {url} (HTTP {e.code}); using the cached copy")
+        return Download(url, cached, entry.get("ran"))
+    except (urllib.error.URLError, OSError) as e:
+        if not cached:
+            raise DownloadError(f"Could not download {url}: {e}") from e
+        warn(f"Could not revalidate {url} ({e}); using the cached copy")
+        return Download(url, cached, entry.get("ran"))
+
+    _update_entry(
+        url,
+        sha256=digest,
+        etag=headers.get("ETag"),
+        last_modified=headers.get("Last-Modified"),
+    )
+    return Download(url, digest, entry.get("ran"))
+
+
+def run_script(url, interpreter=("sh",), env=None, skip_unchanged=False):
+    """Fetch the script at url and run it with interpreter.
+
+    With ``skip_unchanged``, the script is not run again if this exact
+    content already ran successfully. If fetch() fails, the script is
+    downloaded with curl instead and always run. Honours dry-run (nothing
+    is fetched). Returns True on success, False if it could not be fetched
+    or failed.
+    """
+    if is_dry_run():
+        dry(
+            f"would download {url} and run it with {' '.join(interpreter)}",
+            "run_script", url=url,
+        )
+        return True
+    try:
+        script = fetch(url)
+    except DownloadError as e:
+        warn(f"{e}; trying curl")
+        return _run_with_curl(url, interpreter, env)
+    if skip_unchanged and script.ran_before():
+        info(f"{url} is unchanged since it last ran; not running it again")
+        return True
+    try:
+        run_cmd([*interpreter, str(script.path)], check=True, env=env)
+    except subprocess.CalledProcessError:
+        return False
+    script.mark_ran()
+    return True
+
+
+def _run_with_curl(url, interpreter, env):
+    """Download url with curl into a temporary file and run it, uncached."""
+    with tempfile.TemporaryDirectory(prefix="dotfiles-download-") as tmp:
+        script = Path(tmp) / "script"
+        try:
+            run_cmd(["curl", "-fsSL", "-o", str(script), url], check=True)
+        except (subprocess.CalledProcessError, OSError) as e:
+            error(f"Could not download {url} with curl either: {e}")
+            return False
+        try:
+            run_cmd([*interpreter, str(script)], check=True, env=env)
+        except subprocess.CalledProcessError:
+            return False
+    return True
@@ -1,18 +1,27 @@
 """Common helper functions for topic install scripts."""
 
 import argparse
+import fcntl
+import hashlib
 import json
 import os
 import re
+import secrets
 import shlex
 import shutil
-import socket
+import stat
 import subprocess
 import sys
+import tempfile
+import threading
+from contextlib import contextmanager
 from datetime import datetime
 from pathlib import Path
 
+import machine_config
+import probe
 import tomllib
+from machine_config import MACHINE_HOSTNAME_ENV, UnenrolledMachine
 
 DOTFILES_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(DOTFILES_ROOT))
@@ -38,6 +47,9 @@ NOW = datetime.now().strftime("%Y%m%d_%H%M%S")  # noqa: DTZ005
 
 _DRY_RUN = False
 
+# False while script/verify.py runs: it must not write, not even caches.
+_WRITE_CACHES = True
+
 # ssh paths are also used also by git/ topic
 SSH_CONFIG_DIR = HOME / ".ssh"
 SSH_CONFIG_AI_PATH = SSH_CONFIG_DIR / "config.ai"
@@ -68,9 +80,85 @@ def error(msg):
     print(f"[ERROR] {msg}", file=sys.stderr)
 
 
-def dry(msg):
-    """Print a dry-run message."""
+def dry(msg, kind="note", **fields):
+    """Print a dry-run message, and record it in the plan if one is collected.
+
+    Helpers pass the ``kind`` of change they would make and its arguments
+    as ``fields``; free-form messages from topics are recorded as notes.
+    """
     print(f"[DRY-RUN] {msg}")
+    collector = _plan_collector
+    if collector is not None:
+        collector.add(Action(kind, msg, **fields))
+
+
+class Action:
+    """One change a dry run would make (or a probe it answered), as data.
+
+    ``kind`` names what would happen (``run``, ``write_file``, ``link``,
+    ``brew_install``, ...) and ``fields`` its arguments, so a plan can be
+    compared and asserted on without parsing log text.
+    """
+
+    def __init__(self, kind, message, **fields):
+        self.kind = kind
+        self.message = message
+        self.fields = fields
+
+    def as_dict(self):
+        return {"kind": self.kind, **self.fields, "message": self.message}
+
+
+class PlanCollector:
+    """Collects the Actions of a dry run, grouped by the topic recording them.
+
+    script/install.py installs one with set_plan_collector() for
+    ``--plan=json`` and wraps every in-process topic in ``topic()``;
+    actions recorded outside a topic belong to the installer itself (None).
+    """
+
+    def __init__(self):
+        self.actions = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def topic(self, name):
+        """Attribute the actions recorded on this thread to topic name."""
+        previous = getattr(self._local, "topic", None)
+        self._local.topic = name
+        try:
+            yield
+        finally:
+            self._local.topic = previous
+
+    def add(self, action):
+        topic = getattr(self._local, "topic", None)
+        with self._lock:
+            self.actions.setdefault(topic, []).append(action)
+
+    def for_topic(self, topic):
+        return list(self.actions.get(topic, ()))
+
+
+_plan_collector = None
+
+
+def set_plan_collector(collector):
+    """Record dry-run actions into collector (a PlanCollector), or stop (None)."""
+    global _plan_collector
+    _plan_collector = collector
+
+
+@contextmanager
+def plan_topic(topic):
+    """Attribute dry-run actions on this thread to topic while collecting."""
+    collector = _plan_collector
+    if collector is None:
+        yield
+        return
+    with collector.topic(topic):
+        yield
 
 
 def is_dry_run():
@@ -101,41 +189,124 @@ def parse_dry_run(argv=None):
     return is_dry_run()
 
 
+@contextmanager
+def cache_writes_disabled():
+    """Keep the machine config and git email caches from being written.
+
+    Both are still read, and a stale one is recomputed in memory.
+    """
+    global _WRITE_CACHES
+    previous = _WRITE_CACHES
+    _WRITE_CACHES = False
+    try:
+        yield
+    finally:
+        _WRITE_CACHES = previous
+
+
+# Homebrew, npm and mise each keep global state (the Cellar, the global
+# node_modules, ~/.config/mise/config.toml) that concurrent invocations can
+# corrupt. script/install.py runs independent topics in parallel, so every
+# call into one of these tools made through helpers holds a per-tool lock.
+SERIALISED_TOOLS = ("brew", "npm", "mise")
+
+
+@contextmanager
+def tool_lock(tool):
+    """Hold an exclusive, cross-process lock for ``tool`` while in the block.
+
+    A no-op for tools outside SERIALISED_TOOLS and in dry-run mode.
+    """
+    if tool not in SERIALISED_TOOLS or _DRY_RUN:
+        yield
+        return
+    lock_dir = Path(XDG_CACHE_HOME_STR) / "dotfiles" / "locks"
+    lock_dir.mkdir(parents=True, exist_ok=True)
+    with open(lock_dir / f"{tool}.lock", "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def _output_is_redirected():
+    """Return True when sys.stdout is not backed by a real file descriptor.
+
+    That is the case while script/install.py buffers a topic's output
+    in-process; child processes would otherwise write straight past the
+    buffer to the terminal.
+    """
+    try:
+        sys.stdout.fileno()
+    except (AttributeError, OSError, ValueError):
+        return True
+    return False
+
+
+def _run(cmd, check=True, capture_output=False, **kwargs):
+    """subprocess.run, keeping uncaptured child output with ours.
+
+    When sys.stdout is redirected (see _output_is_redirected), the child's
+    stdout and stderr are piped and written to sys.stdout once it exits.
+    """
+    if capture_output or not _output_is_redirected():
+        return subprocess.run(cmd, check=check, capture_output=capture_output, **kwargs)
+    kwargs.pop("text", None)
+    result = subprocess.run(
+        cmd,
+        check=False,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        **kwargs,
+    )
+    sys.stdout.write(result.stdout)
+    if check and result.returncode != 0:
+        raise subprocess.CalledProcessError(result.returncode, cmd, result.stdout)
+    return result
+
+
 def run_cmd(cmd, check=True, capture_output=False, env=None, shell=False, cwd=None):
     """Run a subprocess command, honouring dry-run mode.
 
     In dry-run mode, logs the command and returns a fake successful
-    CompletedProcess without executing anything.
+    CompletedProcess without executing anything. Commands that invoke one
+    of SERIALISED_TOOLS run under that tool's lock. Any command may install
+    something, so the probe cache is invalidated after each one.
     """
     if _DRY_RUN:
         if isinstance(cmd, str):
             cmd_str = cmd
+            args = cmd
         else:
-            cmd_str = " ".join(str(c) for c in cmd)
-        dry(f"would run: {cmd_str}")
+            args = [str(c) for c in cmd]
+            cmd_str = " ".join(args)
+        dry(f"would run: {cmd_str}", "run", cmd=args)
         return subprocess.CompletedProcess(cmd, 0, stdout="", stderr="")
-    return subprocess.run(
-        cmd,
-        check=check,
-        capture_output=capture_output,
-        text=True,
-        env=env,
-        shell=shell,
-        cwd=cwd,
-    )
+    tool = None if isinstance(cmd, str) else str(cmd[0])
+    try:
+        with tool_lock(tool):
+            return _run(
+                cmd,
+                check=check,
+                capture_output=capture_output,
+                text=True,
+                env=env,
+                shell=shell,
+                cwd=cwd,
+            )
+    finally:
+        probe.invalidate()
 
 
 def command_exists(cmd):
-    """Check if a command exists in PATH.
+    """Check if a command exists in PATH (memoized, see probe.py).
 
     In dry-run mode, reports commands as absent so installers exercise
     their installation paths without running anything.
     """
     if _DRY_RUN:
-        dry(f"probe '{cmd}' as absent")
+        dry(f"probe '{cmd}' as absent", "probe_command", command=cmd)
         return False
-    result = subprocess.run(["which", cmd], capture_output=True, check=False)
-    return result.returncode == 0
+    return probe.which(cmd) is not None
 
 
 def app_exists(app_name):
@@ -145,9 +316,189 @@ def app_exists(app_name):
         app_name: Name without .app suffix (e.g., 'Brave Browser')
     """
     if _DRY_RUN:
-        dry(f"probe '{app_name}.app' as absent")
+        dry(f"probe '{app_name}.app' as absent", "probe_app", app=app_name)
         return False
-    return Path(f"/Applications/{app_name}.app").exists()
+    return probe.app_exists(app_name)
+
+
+def read_json(path, default=None):
+    """Load JSON from path, or return default if it is missing or corrupt."""
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return default
+
+
+def write_json(path, data):
+    """Atomically replace path with data serialised as JSON."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=2, sort_keys=True)
+            f.write("\n")
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _brew_prefix():
+    """Return the Homebrew prefix without running brew, or None if absent."""
+    prefix = os.environ.get("HOMEBREW_PREFIX")
+    if prefix:
+        return Path(prefix)
+    brew = probe.which("brew")
+    # Not resolved: on Intel, bin/brew is a symlink into /usr/local/Homebrew,
+    # but the Cellar is /usr/local/Cellar.
+    return Path(brew).parent.parent if brew else None
+
+
+class BrewInventory:
+    """Snapshot of the installed Homebrew formulae and casks.
+
+    Loaded with one ``brew list --formula`` and one ``brew list --cask`` per
+    install run instead of a ``brew list <pkg>`` per probe, and persisted to
+    $XDG_CACHE_HOME/dotfiles/brew-inventory.json. The cache is keyed on the
+    Cellar and Caskroom directory mtimes, which change whenever a formula or
+    cask is installed or removed, by us or by hand.
+
+    Formulae are listed by full name, so tap-qualified names such as
+    ``raine/claude-history/claude-history`` match directly; short names
+    match too. Anything not found (e.g. an alias like ``python@3``) falls
+    back to a single ``brew list <pkg>`` whose answer is remembered.
+    """
+
+    def __init__(self, key, formulae, casks):
+        self.key = key
+        self.formulae = set(formulae)
+        self.casks = set(casks)
+        self._probed = {}
+
+    @staticmethod
+    def cache_path():
+        return Path(XDG_CACHE_HOME_STR) / "dotfiles" / "brew-inventory.json"
+
+    @staticmethod
+    def current_key():
+        """Return the cache key for the installed state, or None without brew."""
+        prefix = _brew_prefix()
+        if prefix is None:
+            return None
+        key = [str(prefix)]
+        for name in ("Cellar", "Caskroom"):
+            try:
+                key.append((prefix / name).stat().st_mtime_ns)
+            except FileNotFoundError:
+                key.append(0)
+        return key
+
+    @classmethod
+    def load(cls):
+        """Load from the cache if still valid, else from ``brew list``."""
+        key = cls.current_key()
+        if key is None:
+            return cls(None, (), ())
+        cached = read_json(cls.cache_path(), {})
+        if isinstance(cached, dict) and cached.get("key") == key:
+            return cls(key, cached.get("formulae", ()), cached.get("casks", ()))
+
+        lists = []
+        for args in (["--formula", "-1", "--full-name"], ["--cask", "-1"]):
+            result = subprocess.run(
+                ["brew", "list", *args], capture_output=True, text=True, check=False
+            )
+            if result.returncode != 0:
+                return None
+            lists.append(result.stdout.split())
+        inventory = cls(key, *lists)
+        inventory.save()
+        return inventory
+
+    def save(self):
+        """Persist the snapshot under the current Cellar/Caskroom key."""
+        self.key = self.current_key()
+        if self.key is None:
+            return
+        try:
+            write_json(
+                self.cache_path(),
+                {
+                    "key": self.key,
+                    "formulae": sorted(self.formulae),
+                    "casks": sorted(self.casks),
+                },
+            )
+        except OSError as e:
+            warn(f"Could not write Homebrew inventory cache: {e}")
+
+    def contains(self, package):
+        """Return True if package is an installed formula or cask."""
+        if package in self.formulae or package in self.casks:
+            return True
+        # A bare name also matches a tap formula of that name, but a
+        # tap-qualified name never matches a core one.
+        if "/" not in package and any(
+            name.rsplit("/", 1)[-1] == package for name in self.formulae
+        ):
+            return True
+        if self.key is None:
+            return False
+        if package not in self._probed:
+            result = subprocess.run(
+                ["brew", "list", package], capture_output=True, check=False
+            )
+            self._probed[package] = result.returncode == 0
+        return self._probed[package]
+
+    def added(self, packages, cask=False):
+        """Record successful installs and persist the snapshot."""
+        for package in packages:
+            (self.casks if cask else self.formulae).add(package)
+            self._probed.pop(package, None)
+        self.save()
+
+    def removed(self, package):
+        """Record a successful uninstall and persist the snapshot."""
+        short = package.rsplit("/", 1)[-1]
+        for names in (self.formulae, self.casks):
+            names.difference_update(
+                {name for name in names if name.rsplit("/", 1)[-1] == short}
+            )
+        self._probed[package] = False
+        self.save()
+
+
+_brew_inventory = None
+_brew_inventory_lock = threading.RLock()
+
+
+def brew_inventory():
+    """Return this process's BrewInventory, loading it on first use.
+
+    Returns None if ``brew list`` itself fails, in which case callers fall
+    back to probing packages one at a time.
+    """
+    global _brew_inventory
+    with _brew_inventory_lock:
+        if _brew_inventory is None:
+            _brew_inventory = BrewInventory.load()
+        return _brew_inventory
+
+
+def reset_brew_inventory():
+    """Drop the in-memory snapshot, e.g. after installing Homebrew itself."""
+    global _brew_inventory
+    with _brew_inventory_lock:
+        _brew_inventory = None
+
+
+# Space-separated packages that script/install.py already failed to install
+# in its batched Homebrew pass. Topic installers inherit it, so they report
+# the failure instead of running the same failing `brew install` again.
+BREW_FAILED_ENV = "DOTFILES_BREW_FAILED"
 
 
 def brew_install(package, cask=False):
@@ -162,19 +513,141 @@ def brew_install(package, cask=False):
     """
     if _DRY_RUN:
         suffix = " (cask)" if cask else ""
-        dry(f"would brew install {package}{suffix}")
+        dry(
+            f"would brew install {package}{suffix}",
+            "brew_install", package=package, cask=cask,
+        )
         return True
 
+    if package in os.environ.get(BREW_FAILED_ENV, "").split():
+        error(f"{package} already failed to install in the batched Homebrew pass")
+        return False
+
     cmd = ["brew", "install"]
     if cask:
         cmd.append("--cask")
     cmd.append(package)
 
     try:
-        subprocess.run(cmd, check=True)
-        return True
+        with tool_lock("brew"):
+            _run(cmd, check=True)
+    except subprocess.CalledProcessError:
+        return False
+    finally:
+        probe.invalidate()
+    _brew_installed([package], cask)
+    return True
+
+
+def _install_batch(cmd, names, is_installed, install_one, forget=None, remember=None):
+    """Run ``cmd``, which installs every one of names in a single call.
+
+    The tool then resolves, downloads and updates its own state once for
+    the whole batch instead of once per name. If the batch fails, the names
+    ``is_installed`` does not report are retried one at a time with
+    ``install_one``, so each failure is pinned on the name that caused it;
+    ``forget()`` first drops any cached view of what is installed. After a
+    successful batch, ``remember(names)`` records them in that view.
+
+    Returns the list of names that could not be installed.
+    """
+    try:
+        with tool_lock(cmd[0]):
+            _run(cmd, check=True)
     except subprocess.CalledProcessError:
+        probe.invalidate()
+        if forget is not None:
+            forget()
+        missing = [name for name in names if not is_installed(name)]
+        return [name for name in missing if not install_one(name)]
+    probe.invalidate()
+    if remember is not None:
+        remember(names)
+    return []
+
+
+def _brew_installed(packages, cask):
+    with _brew_inventory_lock:
+        inventory = brew_inventory()
+        if inventory is not None:
+            inventory.added(packages, cask=cask)
+
+
+def brew_install_batch(packages, cask=False):
+    """Install several formulae (or casks) with a single `brew install`.
+
+    Homebrew then updates, resolves dependencies and cleans up once for the
+    whole batch instead of once per package (see _install_batch).
+
+    Returns the list of packages that could not be installed.
+    """
+    packages = list(dict.fromkeys(packages))
+    if not packages:
+        return []
+    cmd = ["brew", "install", *(["--cask"] if cask else []), *packages]
+    if _DRY_RUN:
+        dry(
+            f"would run: {' '.join(cmd)}",
+            "brew_install", packages=packages, cask=cask,
+        )
+        return []
+
+    return _install_batch(
+        cmd, packages, brew_is_installed,
+        lambda name: brew_install(name, cask=cask),
+        forget=reset_brew_inventory,
+        remember=lambda names: _brew_installed(names, cask),
+    )
+
+
+def brew_fetch(package, cask=False):
+    """Download a formula's bottle (or a cask) into Homebrew's cache.
+
+    Unlike installs, fetches are not serialised, so several can run at
+    once; a later `brew install` then only has to pour from the cache.
+    The output is only shown if the fetch fails.
+
+    Returns True on success, False on failure.
+    """
+    cmd = ["brew", "fetch", *(["--cask"] if cask else []), package]
+    if _DRY_RUN:
+        dry(f"would run: {' '.join(cmd)}", "brew_fetch", package=package, cask=cask)
+        return True
+    result = subprocess.run(cmd, capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        warn(f"brew fetch {package} failed: {result.stderr.strip()}")
         return False
+    return True
+
+
+_brew_taps = set()
+_brew_taps_lock = threading.Lock()
+
+
+def brew_tap(tap, trust=False):
+    """Add a third-party Homebrew tap, at most once per process.
+
+    Homebrew refuses to load formulae from untrusted third-party taps, so
+    pass ``trust=True`` to also run `brew trust --tap`.
+
+    Returns True on success, False on failure.
+    """
+    if _DRY_RUN:
+        message = f"would brew tap {tap}" + (" and trust it" if trust else "")
+        dry(message, "brew_tap", tap=tap, trust=trust)
+        return True
+    with _brew_taps_lock:
+        if tap in _brew_taps:
+            return True
+        try:
+            with tool_lock("brew"):
+                _run(["brew", "tap", tap], check=True)
+                if trust:
+                    _run(["brew", "trust", "--tap", tap], check=True)
+        except subprocess.CalledProcessError:
+            return False
+        _brew_taps.add(tap)
+        return True
 
 
 def brew_is_installed(package):
@@ -184,8 +657,12 @@ def brew_is_installed(package):
     exercised without changing the system.
     """
     if _DRY_RUN:
-        dry(f"probe brew package '{package}' as absent")
+        dry(f"probe brew package '{package}' as absent", "probe_brew", package=package)
         return False
+    with _brew_inventory_lock:
+        inventory = brew_inventory()
+        if inventory is not None:
+            return inventory.contains(package)
     result = subprocess.run(["brew", "list", package], capture_output=True, check=False)
     return result.returncode == 0
 
@@ -197,16 +674,92 @@ def brew_uninstall(package):
     False if uninstall failed.
     """
     if _DRY_RUN:
-        dry(f"would brew uninstall {package} if installed")
+        dry(
+            f"would brew uninstall {package} if installed",
+            "brew_uninstall", package=package,
+        )
         return True
-    result = subprocess.run(["brew", "list", package], capture_output=True, check=False)
-    if result.returncode != 0:
+    if not brew_is_installed(package):
         return True
     try:
-        subprocess.run(["brew", "uninstall", package], check=True)
-        return True
+        with tool_lock("brew"):
+            _run(["brew", "uninstall", package], check=True)
     except subprocess.CalledProcessError:
         return False
+    finally:
+        probe.invalidate()
+    with _brew_inventory_lock:
+        inventory = brew_inventory()
+        if inventory is not None:
+            inventory.removed(package)
+    return True
+
+
+_npm_inventory = None
+_npm_inventory_lock = threading.RLock()
+
+
+def npm_inventory():
+    """Return {package: version} of the global npm packages, or None.
+
+    Taken with one ``npm ls -g --depth=0 --json`` per process, and updated
+    by npm_install_global() and npm_install_batch() as they install more.
+    None means npm is missing or could not be asked; callers then treat
+    every package as absent.
+    """
+    global _npm_inventory
+    with _npm_inventory_lock:
+        if _npm_inventory is None:
+            if probe.which("npm") is None:
+                return None
+            result = subprocess.run(
+                ["npm", "ls", "-g", "--depth=0", "--json"],
+                capture_output=True, text=True, check=False,
+            )
+            # npm ls exits non-zero for problems such as extraneous or
+            # invalid packages, but still lists what is installed.
+            try:
+                data = json.loads(result.stdout or "{}")
+            except ValueError:
+                return None
+            dependencies = data.get("dependencies", {}) if isinstance(data, dict) else {}
+            _npm_inventory = {
+                name: (meta or {}).get("version") for name, meta in dependencies.items()
+            }
+        return _npm_inventory
+
+
+def reset_npm_inventory():
+    """Drop the in-memory inventory, e.g. after a failed npm install."""
+    global _npm_inventory
+    with _npm_inventory_lock:
+        _npm_inventory = None
+
+
+def _npm_installed(packages):
+    """Record successful installs in the inventory, if it was taken yet."""
+    with _npm_inventory_lock:
+        if _npm_inventory is not None:
+            _npm_inventory.update(dict.fromkeys(packages))
+
+
+def npm_is_installed(package):
+    """Check if an npm package is installed globally.
+
+    In dry-run mode, reports packages as absent so the install path is
+    exercised without changing the system.
+    """
+    if _DRY_RUN:
+        dry(f"probe npm package '{package}' as absent", "probe_npm", package=package)
+        return False
+    with _npm_inventory_lock:
+        inventory = npm_inventory()
+        return inventory is not None and package in inventory
+
+
+# Space-separated packages that script/install.py already failed to install
+# in its batched npm pass; see BREW_FAILED_ENV.
+NPM_FAILED_ENV = "DOTFILES_NPM_FAILED"
 
 
 def npm_install_global(package):
@@ -215,31 +768,144 @@ def npm_install_global(package):
     Returns True on success, False on failure.
     """
     if _DRY_RUN:
-        dry(f"would run: npm install -g {package}")
+        dry(f"would run: npm install -g {package}", "npm_install", package=package)
         return True
-    if not command_exists("npm"):
+    if package in os.environ.get(NPM_FAILED_ENV, "").split():
+        error(f"{package} already failed to install in the batched npm pass")
+        return False
+    if probe.which("npm") is None:
         error("npm not found; install the 'node' topic first")
         return False
     try:
-        subprocess.run(["npm", "install", "-g", package], check=True)
-        return True
+        with tool_lock("npm"):
+            _run(["npm", "install", "-g", package], check=True)
     except subprocess.CalledProcessError:
         return False
+    finally:
+        probe.invalidate()
+    _npm_installed([package])
+    return True
+
+
+def npm_install_batch(packages):
+    """Install several npm packages globally with a single `npm install -g`.
+
+    Retried one package at a time if it fails (see _install_batch). Returns
+    the list of packages that could not be installed.
+    """
+    packages = list(dict.fromkeys(packages))
+    if not packages:
+        return []
+    cmd = ["npm", "install", "-g", *packages]
+    if _DRY_RUN:
+        dry(f"would run: {' '.join(cmd)}", "npm_install", packages=packages)
+        return []
+    if probe.which("npm") is None:
+        error("npm not found; install the 'node' topic first")
+        return packages
+
+    return _install_batch(
+        cmd, packages, npm_is_installed, npm_install_global,
+        forget=reset_npm_inventory, remember=_npm_installed,
+    )
+
+
+# Space-separated tool specs that script/install.py already failed to
+# install in its batched `mise use` pass; see BREW_FAILED_ENV.
+MISE_FAILED_ENV = "DOTFILES_MISE_FAILED"
+
+# How many tools one batched `mise use` installs at once (mise's own
+# default is 8); they are mostly downloads.
+MISE_JOBS = 16
+
+
+def mise_config_path():
+    """Return the global mise config that `mise use -g` writes."""
+    override = os.environ.get("MISE_GLOBAL_CONFIG_FILE")
+    if override:
+        return Path(override)
+    return XDG_CONFIG_HOME / "mise" / "config.toml"
+
+
+def _split_tool_spec(tool_spec):
+    """Split ``node@24`` into ("node", "24"); a bare name means latest."""
+    name, _, version = tool_spec.partition("@")
+    return name, version or "latest"
+
+
+def mise_pinned_tools():
+    """Return the [tools] table of the global mise config (empty if none)."""
+    try:
+        with open(mise_config_path(), "rb") as f:
+            tools = tomllib.load(f).get("tools", {})
+    except (OSError, tomllib.TOMLDecodeError):
+        return {}
+    return tools if isinstance(tools, dict) else {}
+
+
+def mise_is_pinned(tool_spec, tools=None):
+    """Check if the global mise config already pins tool_spec.
+
+    ``node@24`` is pinned by ``node = "24"``, by a list of versions that
+    includes "24", or by ``node = { version = "24" }``; a bare ``fnox``
+    by ``fnox = "latest"``, which is what `mise use -g fnox` writes.
+    """
+    if tools is None:
+        tools = mise_pinned_tools()
+    name, version = _split_tool_spec(tool_spec)
+    pinned = tools.get(name)
+    if isinstance(pinned, dict):
+        pinned = pinned.get("version")
+    if isinstance(pinned, list):
+        return version in [v.get("version") if isinstance(v, dict) else v for v in pinned]
+    return pinned == version
 
 
 def mise_use(tool_spec):
-    """Run `mise use -g <tool_spec>`. Respects dry-run.
+    """Run `mise use -g <tool_spec>`, unless it is pinned already. Respects dry-run.
 
     Returns True on success, False on failure.
     """
     if _DRY_RUN:
-        dry(f"would run: mise use -g {tool_spec}")
+        dry(f"would run: mise use -g {tool_spec}", "mise_use", tool=tool_spec)
+        return True
+    if tool_spec in os.environ.get(MISE_FAILED_ENV, "").split():
+        error(f"{tool_spec} already failed to install in the batched mise pass")
+        return False
+    if mise_is_pinned(tool_spec):
         return True
     try:
-        subprocess.run(["mise", "use", "-g", tool_spec], check=True)
+        with tool_lock("mise"):
+            _run(["mise", "use", "-g", tool_spec], check=True)
         return True
     except subprocess.CalledProcessError:
         return False
+    finally:
+        probe.invalidate()
+
+
+def mise_use_batch(tool_specs):
+    """Pin and install several tools with a single `mise use -g`.
+
+    mise then resolves, downloads (MISE_JOBS at a time) and rewrites its
+    config once for the whole batch instead of once per tool. Nothing runs
+    if the global config pins every spec already. If the batch fails, the
+    specs it did not pin are retried one at a time (see _install_batch).
+
+    Returns the list of specs that could not be installed.
+    """
+    tools = {} if _DRY_RUN else mise_pinned_tools()
+    missing = [
+        spec for spec in dict.fromkeys(tool_specs) if not mise_is_pinned(spec, tools)
+    ]
+    if not missing:
+        return []
+    cmd = ["mise", "use", "-g", "--jobs", str(MISE_JOBS), *missing]
+    if _DRY_RUN:
+        dry(f"would run: {' '.join(cmd)}", "mise_use", tools=missing)
+        return []
+
+    return _install_batch(cmd, missing, mise_is_pinned, mise_use)
 
 
 def chmod(path, mode):
@@ -247,7 +913,10 @@ def chmod(path, mode):
     if mode is None:
         return
     if _DRY_RUN:
-        dry("would ensure {path} permissions {mode}")
+        dry(
+            f"would ensure {path} permissions {oct(mode)}",
+            "chmod", path=str(path), mode=oct(mode),
+        )
         return
 
     st_mode = path.stat().st_mode
@@ -262,7 +931,7 @@ def make_dir(path, mode=None, parents=True):
     """Create a directory, honouring dry-run."""
     path = Path(path)
     if _DRY_RUN:
-        dry(f"would mkdir {path}")
+        dry(f"would mkdir {path}", "mkdir", path=str(path))
         return
 
     if path.is_file():
@@ -279,18 +948,79 @@ def make_dir(path, mode=None, parents=True):
         path.mkdir(mode=mode, parents=parents, exist_ok=True)
 
 
-def write_file(path, content, mode=None):
-    """Write text content to path, honouring dry-run.
+# The process umask, for the mode of files converge_file() creates. Read
+# once: os.umask() can only be read by setting it.
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
 
-    Creates parent directories. Applies `mode` (e.g. 0o600) if given.
+
+def _holds(path, data):
+    """Return True if path is a regular file (not a symlink) holding data.
+
+    Compares sizes first, so a changed file is usually told apart by one
+    lstat(); only files of the same size are hashed, as raw bytes.
+    """
+    try:
+        st = path.lstat()
+    except FileNotFoundError:
+        return False
+    if not stat.S_ISREG(st.st_mode) or st.st_size != len(data):
+        return False
+    with open(path, "rb") as f:
+        return hashlib.file_digest(f, "sha256").digest() == hashlib.sha256(data).digest()
+
+
+def _replace_file(path, data, mode):
+    """Atomically replace path (a symlink itself, if it is one) with data."""
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            os.fchmod(f.fileno(), mode)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def converge_file(path, content, mode=None):
+    """Make path a regular file holding content, writing only if it differs.
+
+    A file that already holds exactly ``content`` is left alone, so its
+    mtime does not change; at most its mode is fixed. Otherwise the new
+    content is written to a temporary file and moved over path, replacing
+    a symlink rather than writing through it. Creates parent directories.
+    Without ``mode``, an existing file keeps its mode.
+
+    Honours dry-run. Returns True if the file changed (or would have).
     """
     path = Path(path)
-    if _DRY_RUN:
-        dry(f"would write {path} ({len(content)} bytes)")
-        return
-    make_dir(path.parent)
-    path.write_text(content)
+    data = content.encode() if isinstance(content, str) else content
+    if not _holds(path, data):
+        if _DRY_RUN:
+            dry(
+                f"would write {path} ({len(data)} bytes)",
+                "write_file", path=str(path), bytes=len(data),
+                mode=None if mode is None else oct(mode),
+            )
+            return True
+        if mode is None:
+            try:
+                st = path.lstat()
+            except FileNotFoundError:
+                st = None
+            if st is not None and stat.S_ISREG(st.st_mode):
+                mode = stat.S_IMODE(st.st_mode)
+            else:
+                mode = 0o666 & ~_UMASK
+        make_dir(path.parent)
+        _replace_file(path, data, mode)
+        return True
+
+    if mode is None or stat.S_IMODE(path.stat().st_mode) == mode:
+        return False
     chmod(path, mode)
+    return True
 
 
 def touch_file(path, mode=None):
@@ -300,7 +1030,7 @@ def touch_file(path, mode=None):
     """
     path = Path(path)
     if _DRY_RUN:
-        dry(f"would touch {path}")
+        dry(f"would touch {path}", "touch", path=str(path))
         return
     if path.exists():
         return
@@ -324,97 +1054,291 @@ def _toml_literal(value):
     raise TypeError(f"Unsupported TOML value type: {type(value).__name__}")
 
 
-def set_toml_value(path, table, key, value):
-    """Idempotently set a single ``key = value`` under ``[table]`` in a TOML file.
+class _ConfigDocument:
+    """A ``[section]`` / ``key = value`` file, indexed once for many edits.
 
-    Only the one key is managed: all other content, comments, and formatting
-    are preserved, so the file is *not* brought fully under version control.
-    Creates the file (or the ``[table]`` section, or the key) as needed, and
-    replaces an out-of-date value in place. The edit is scoped to the target
-    table's block, so a same-named key in another table is left alone.
+    The file is read and split into lines once; every section's first
+    block and every key in it are indexed in the same pass. set() then
+    replaces a key's line in place, queues a new key right after its
+    section's header, or queues a new section at the end of the file, so
+    any number of edits costs one pass over the file. Everything that is
+    not set is kept byte for byte, comments and formatting included, and
+    a same-named key in another section is left alone.
 
-    Honours dry-run mode. Returns True on success.
+    ``literal(value)`` renders a value as written to the file, and
+    ``holds(section, key, value, line)`` tells whether the file already
+    has it (``line`` is the key's line index, or None). Use toml_edit() or
+    ini_edit() rather than instantiating this directly.
     """
-    path = Path(path)
-    setting_line = f"{key} = {_toml_literal(value)}"
 
-    if not path.exists():
+    KIND = None
+    HEADER_RE = None
+    BOUNDARY_RE = re.compile(r"^\s*\[")
+    KEY_RE = re.compile(r"^\s*([^=]+?)\s*=")
+
+    def __init__(self, path, literal, holds):
+        self.path = Path(path)
+        self._literal = literal
+        self._holds = holds
+        try:
+            self.text = self.path.read_text()
+        except FileNotFoundError:
+            self.text = ""
+        self.lines = self.text.splitlines(keepends=True)
+        self._headers = {}
+        self._keys = {}
+        self._index()
+        self._values = {}
+        self._after_header = {}
+        self._new_sections = {}
+        self._new_lines = {}
+        self.changes = []
+
+    def _index(self):
+        section = None
+        for i, line in enumerate(self.lines):
+            if self.BOUNDARY_RE.match(line):
+                header = self.HEADER_RE.match(line)
+                section = header.group(1) if header else None
+                if section in self._headers:
+                    section = None
+                elif section is not None:
+                    self._headers[section] = i
+            elif section is not None:
+                key = self.KEY_RE.match(line)
+                if key:
+                    self._keys.setdefault((section, key.group(1)), i)
+
+    def set(self, section, key, value):
+        """Set ``key = value`` under ``[section]``. Returns True if it changed."""
+        setting_line = f"{key} = {self._literal(value)}"
+        entry = (section, key)
+        if entry in self._values:
+            if self._values[entry] == value:
+                return False
+        elif self._holds(section, key, value, self._keys.get(entry)):
+            success(f"{self.path}: [{section}] {key} already set")
+            return False
+
+        self._values[entry] = value
+        if entry in self._new_lines:
+            pending, i = self._new_lines[entry]
+            pending[i] = setting_line + "\n"
+        elif entry in self._keys:
+            i = self._keys[entry]
+            nl = "\n" if self.lines[i].endswith("\n") else ""
+            self.lines[i] = setting_line + nl
+        else:
+            if section in self._headers:
+                pending = self._after_header.setdefault(self._headers[section], [])
+            else:
+                pending = self._new_sections.setdefault(section, [])
+            self._new_lines[entry] = (pending, len(pending))
+            pending.append(setting_line + "\n")
+
         if _DRY_RUN:
-            dry(f"would create {path} with [{table}] {setting_line}")
-            return True
-        write_file(path, f"[{table}]\n{setting_line}\n")
-        success(f"Created {path} with {setting_line}")
+            dry(
+                f"would set {setting_line} under [{section}] in {self.path}",
+                self.KIND, path=str(self.path), table=section, key=key,
+            )
+        self.changes.append(setting_line)
         return True
 
-    text = path.read_text()
-    if tomllib.loads(text).get(table, {}).get(key) == value:
-        success(f"{path}: {table}.{key} already set")
-        return True
+    def render(self):
+        """Return the file's text with every set() applied."""
+        parts = []
+        for i, line in enumerate(self.lines):
+            parts.append(line)
+            if i in self._after_header:
+                if not line.endswith("\n"):
+                    parts.append("\n")
+                parts.extend(self._after_header[i])
+        text = "".join(parts)
+        for section, pending in self._new_sections.items():
+            if text:
+                text += "\n" if text.endswith("\n") else "\n\n"
+            text += f"[{section}]\n" + "".join(pending)
+        return text
+
+    def commit(self):
+        """Write the file once if anything changed. Honours dry-run."""
+        if not self.changes or _DRY_RUN:
+            return
+        converge_file(self.path, self.render())
+        for setting_line in self.changes:
+            success(f"Set {setting_line} in {self.path}")
+
+
+class TomlDocument(_ConfigDocument):
+    """A TOML file; values are Python scalars, compared as tomllib parses them."""
+
+    KIND = "set_toml_value"
+    HEADER_RE = re.compile(r"^\s*\[([^\[\]]+)\]\s*(?:#.*)?$")
+
+    def __init__(self, path):
+        super().__init__(path, _toml_literal, self._parsed_holds)
+        self._parsed = tomllib.loads(self.text)
+
+    def _parsed_holds(self, section, key, value, line):
+        return self._parsed.get(section, {}).get(key) == value
+
+
+class IniDocument(_ConfigDocument):
+    """An ini-style file; values are written unquoted, exactly as given.
+
+    saml2aws writes plain, often-unquoted values (URLs, usernames) into
+    ~/.saml2aws, which isn't valid TOML, so it can't be a TomlDocument.
+    """
 
-    if _DRY_RUN:
-        dry(f"would set {setting_line} under [{table}] in {path}")
-        return True
+    KIND = "set_ini_value"
+    HEADER_RE = re.compile(r"^\s*\[([^\[\]]+)\]\s*$")
 
-    lines = text.splitlines(keepends=True)
-    header_re = re.compile(rf"^\s*\[{re.escape(table)}\]\s*(?:#.*)?$")
-    boundary_re = re.compile(r"^\s*\[")
-    key_re = re.compile(rf"^\s*{re.escape(key)}\s*=")
+    def __init__(self, path):
+        super().__init__(path, str, self._line_holds)
 
-    table_start = next(
-        (i for i, line in enumerate(lines) if header_re.match(line)), None
-    )
+    def _line_holds(self, section, key, value, line):
+        return line is not None and self.lines[line].strip() == f"{key} = {value}"
 
-    if table_start is None:
-        sep = "\n" if text.endswith("\n") else "\n\n"
-        new_text = f"{text}{sep}[{table}]\n{setting_line}\n"
-    else:
-        table_end = next(
-            (
-                j
-                for j in range(table_start + 1, len(lines))
-                if boundary_re.match(lines[j])
-            ),
-            len(lines),
-        )
-        for j in range(table_start + 1, table_end):
-            if key_re.match(lines[j]):
-                nl = "\n" if lines[j].endswith("\n") else ""
-                lines[j] = setting_line + nl
-                break
-        else:
-            lines.insert(table_start + 1, setting_line + "\n")
-        new_text = "".join(lines)
 
-    write_file(path, new_text)
-    success(f"Set {setting_line} in {path}")
+@contextmanager
+def toml_edit(path):
+    """Edit a TOML file in one read-parse-write transaction.
+
+    ::
+
+        with toml_edit(path) as doc:
+            doc.set("settings", "minimum_release_age", "7d")
+            doc.set("settings", "experimental", True)
+
+    The file is parsed once on entry and written at most once on exit, and
+    not at all if nothing changed or the block raised. Creates the file,
+    sections and keys as needed.
+    """
+    doc = TomlDocument(path)
+    yield doc
+    doc.commit()
+
+
+@contextmanager
+def ini_edit(path):
+    """Edit an ini-style file in one transaction, like toml_edit()."""
+    doc = IniDocument(path)
+    yield doc
+    doc.commit()
+
+
+def set_toml_value(path, table, key, value):
+    """Idempotently set a single ``key = value`` under ``[table]`` in a TOML file.
+
+    Only the one key is managed: all other content, comments, and formatting
+    are preserved, so the file is *not* brought fully under version control.
+    To set several keys, use toml_edit() so the file is rewritten once.
+
+    Honours dry-run mode. Returns True on success.
+    """
+    with toml_edit(path) as doc:
+        doc.set(table, key, value)
     return True
 
 
 def get_short_hostname():
     """Get short hostname (without domain suffix)."""
-    return socket.gethostname().split(".")[0]
+    return machine_config.short_hostname()
 
 
-def _deep_merge(base, override):
-    """Recursively merge override into base, returning a new dict."""
-    result = base.copy()
-    for key, value in override.items():
-        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
-            result[key] = _deep_merge(result[key], value)
-        else:
-            result[key] = value
-    return result
+BACKUP_DIR_NAME = ".dotfiles-backup"
+
+# Serialises manifest updates between topics running in this process;
+# _manifest_lock() adds a file lock against other installer processes.
+_BACKUP_LOCK = threading.Lock()
+
+
+def backup_root():
+    """Return ~/.dotfiles-backup, where backup_file() keeps everything."""
+    return HOME / BACKUP_DIR_NAME
+
+
+def backup_blob_path(digest):
+    """Return where the blob with the given sha256 hex digest is stored."""
+    return backup_root() / "blobs" / digest[:2] / digest
+
+
+def backup_manifest_path(run):
+    """Return the manifest of backup run ``run`` (a NOW timestamp)."""
+    return backup_root() / "manifests" / f"{run}.json"
+
+
+def _store_blob(path):
+    """Make regular file ``path`` a hard link to its content-addressed blob.
+
+    The first backup of some content becomes the blob; every later copy of
+    the same bytes is replaced with a link to it, so identical backups take
+    the space of one. Returns the sha256 hex digest of the content.
+    """
+    with open(path, "rb") as f:
+        digest = hashlib.file_digest(f, "sha256").hexdigest()
+    blob = backup_blob_path(digest)
+    blob.parent.mkdir(parents=True, exist_ok=True)
+    try:
+        os.link(path, blob)
+    except FileExistsError:
+        tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}")
+        os.link(blob, tmp)
+        os.replace(tmp, path)
+    except OSError:
+        pass  # no hard links here: keep the plain copy
+    return digest
+
+
+def _store_backup(dest):
+    """Deduplicate a freshly moved backup; return its manifest fields."""
+    if dest.is_symlink():
+        return {"kind": "symlink", "target": os.readlink(dest)}
+    if dest.is_dir():
+        for parent, _, names in os.walk(dest):
+            for name in names:
+                file = Path(parent) / name
+                if stat.S_ISREG(file.lstat().st_mode):
+                    _store_blob(file)
+        return {"kind": "dir"}
+    mode = stat.S_IMODE(dest.stat().st_mode)
+    return {"kind": "file", "blob": _store_blob(dest), "mode": mode}
+
+
+@contextmanager
+def _manifest_lock():
+    lock = backup_root() / "manifests" / ".lock"
+    lock.parent.mkdir(parents=True, exist_ok=True)
+    with _BACKUP_LOCK, open(lock, "w") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+
+
+def _record_backup(run, entry):
+    manifest = backup_manifest_path(run)
+    with _manifest_lock():
+        data = read_json(manifest, {})
+        data.setdefault("entries", []).append(entry)
+        write_json(manifest, data)
 
 
 def backup_file(file_path):
-    """Back up an existing file or symlink before it's replaced."""
+    """Back up an existing file or symlink before it's replaced.
+
+    It is moved to ~/.dotfiles-backup/<NOW>/<path relative to ~>, and the
+    run's manifest (manifests/<NOW>.json) records where it came from.
+    Regular files in the run tree are hard links into blobs/, named by
+    the sha256 of their content, so a file that is displaced with the
+    same content on every run is stored once. script/backups.py lists,
+    restores and prunes backups.
+    """
     path = Path(file_path)
     if not (path.exists() or path.is_symlink()):
         return
     if _DRY_RUN:
-        dry(f"would back up {file_path}")
+        dry(f"would back up {file_path}", "backup", path=str(file_path))
         return
-    backup_dir = HOME / ".dotfiles-backup" / NOW
+    backup_dir = backup_root() / NOW
     try:
         relative_path = path.absolute().relative_to(HOME.absolute())
     except ValueError:
@@ -430,6 +1354,9 @@ def backup_file(file_path):
                 break
             counter += 1
     shutil.move(str(path), str(dest))
+    entry = {"path": str(path.absolute()), "backup": str(dest.relative_to(backup_dir))}
+    entry.update(_store_backup(dest))
+    _record_backup(NOW, entry)
     info(f"Backed up {file_path} to {dest}")
 
 
@@ -439,35 +1366,126 @@ def link_file(src, dst):
     dst_path = Path(dst)
 
     if dst_path.is_symlink():
-        current_src = dst_path.resolve()
-        if current_src == src_path.resolve():
+        # The link text usually matches exactly; resolve only when it doesn't.
+        if os.readlink(dst_path) == str(src_path) or dst_path.resolve() == src_path:
             success(f"Already linked: {dst}")
             return True
-        warn(f"Symlink exists but points elsewhere: {dst} -> {current_src}")
+        warn(f"Symlink exists but points elsewhere: {dst} -> {dst_path.resolve()}")
         backup_file(dst)
     elif dst_path.exists():
         warn(f"File exists: {dst}")
         backup_file(dst)
 
     if _DRY_RUN:
-        dry(f"would link {dst} -> {src}")
+        dry(f"would link {dst} -> {src}", "link", path=str(dst), source=str(src_path))
         return True
 
-    dst_path.parent.mkdir(parents=True, exist_ok=True)
+    if not dst_path.parent.is_dir():
+        # A link may be made before the topic that owns its directory has
+        # run; ~/.ssh is created private, as ssh/install.py would.
+        make_dir(dst_path.parent, mode=0o700 if dst_path.parent == SSH_CONFIG_DIR else None)
     dst_path.symlink_to(src_path)
     success(f"Linked: {dst} -> {src}")
     return True
 
 
+# The instructions file each coding agent reads, by topic. Every one gets
+# the same compiled AGENTS.md; see render_all_agent_instructions().
+AGENT_INSTRUCTION_FILES = {
+    "claude": ".claude/CLAUDE.md",
+    "codex": ".codex/AGENTS.md",
+    "copilot": ".copilot/copilot-instructions.md",
+    "gemini": ".gemini/GEMINI.md",
+    "opencode": "$XDG_CONFIG_HOME/opencode/AGENTS.md",
+    "pi-coding-agent": ".pi/agent/AGENTS.md",
+}
+
+# Compiled instructions by (AGENTS.md digest, git email), and the git email
+# by the signature of the global git config files, for this process.
+_AGENTS_MD_LOCK = threading.Lock()
+_compiled_agents_md = {}
+_git_emails = {}
+
+
+def agent_instructions_path(topic):
+    """Return where the agent installed by ``topic`` reads its instructions."""
+    home = Path.home()
+    xdg_config = os.environ.get("XDG_CONFIG_HOME", str(home / ".config"))
+    relative = AGENT_INSTRUCTION_FILES[topic]
+    if relative.startswith("$XDG_CONFIG_HOME/"):
+        return Path(xdg_config) / relative.removeprefix("$XDG_CONFIG_HOME/")
+    return home / relative
+
+
+def _git_config_signature():
+    """Return (path, mtime, size, inode) of each file ``git config --global`` reads."""
+    if "GIT_CONFIG_GLOBAL" in os.environ:
+        paths = [os.environ["GIT_CONFIG_GLOBAL"]]
+    else:
+        home = Path.home()
+        xdg_config = os.environ.get("XDG_CONFIG_HOME", str(home / ".config"))
+        paths = [str(home / ".gitconfig"), os.path.join(xdg_config, "git", "config")]
+    signature = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+        except OSError:
+            signature.append([path, None, None, None])
+        else:
+            signature.append([path, st.st_mtime_ns, st.st_size, st.st_ino])
+    return signature
+
+
+def git_email_cache_path():
+    """Return the file caching the git email between installer processes."""
+    return Path(XDG_CACHE_HOME_STR) / "dotfiles" / "git-email.json"
+
+
 def get_git_email():
-    """Return the global git user.email, or None if unset."""
-    result = subprocess.run(
-        ["git", "config", "--get", "user.email"],
-        capture_output=True,
-        text=True,
-        check=False,
-    )
-    return result.stdout.strip() if result.returncode == 0 else None
+    """Return the global git user.email, or None if unset.
+
+    Remembered, in this process and in git_email_cache_path(), until one
+    of the global git config files changes, so the topics that compile
+    AGENTS.md (each possibly its own process) run ``git config`` once
+    between them.
+    """
+    signature = _git_config_signature()
+    key = json.dumps(signature)
+    with _AGENTS_MD_LOCK:
+        if key in _git_emails:
+            return _git_emails[key]
+
+    cache_path = git_email_cache_path()
+    cached = read_json(cache_path, {})
+    if isinstance(cached, dict) and cached.get("signature") == signature:
+        email = cached.get("email")
+    else:
+        result = subprocess.run(
+            ["git", "config", "--global", "--get", "user.email"],
+            capture_output=True,
+            text=True,
+            check=False,
+        )
+        email = result.stdout.strip() if result.returncode == 0 else None
+        if _WRITE_CACHES and not _DRY_RUN:
+            write_json(cache_path, {"signature": signature, "email": email})
+
+    with _AGENTS_MD_LOCK:
+        _git_emails[key] = email
+    return email
+
+
+def compiled_agents_md():
+    """Return the master agent instructions as compiled for this machine.
+
+    Compiled once per AGENTS.md content and git email.
+    """
+    text = AGENTS_MD.read_text()
+    key = (hashlib.sha256(text.encode()).hexdigest(), get_git_email())
+    with _AGENTS_MD_LOCK:
+        if key not in _compiled_agents_md:
+            _compiled_agents_md[key] = render_instructions(key[1], text)
+        return _compiled_agents_md[key]
 
 
 def render_agents_md(dst, mode=None):
@@ -477,18 +1495,33 @@ def render_agents_md(dst, mode=None):
     specific Co-Authored-By line, since these agents can't inject it themselves.
     """
     dst_path = Path(dst)
-    content = render_instructions(get_git_email())
+    # A previous install may have left a symlink here; writing through it
+    # would clobber the master, so converge_file() replaces it.
+    if converge_file(dst_path, compiled_agents_md(), mode=mode):
+        success(f"Compiled agent instructions: {dst_path}")
+    else:
+        success(f"Agent instructions already up to date: {dst_path}")
 
-    # A previous install may have left a symlink here; writing through it would
-    # clobber the master. Replace it with a real file.
-    if dst_path.is_symlink():
-        if _DRY_RUN:
-            dry(f"would unlink {dst_path}")
-        else:
-            dst_path.unlink()
 
-    write_file(dst_path, content, mode=mode)
-    success(f"Compiled agent instructions: {dst_path}")
+def render_all_agent_instructions():
+    """Compile AGENTS.md once and bring every agent's copy up to date.
+
+    Only copies whose content differs are rewritten. Agents whose config
+    directory does not exist yet are left to their own topic, which calls
+    render_agents_md() once it has installed the agent. Returns the paths
+    rewritten.
+    """
+    compiled = compiled_agents_md()
+    changed = []
+    for topic in AGENT_INSTRUCTION_FILES:
+        path = agent_instructions_path(topic)
+        if path.parent.is_dir() and converge_file(path, compiled):
+            changed.append(path)
+    if changed:
+        success(f"Compiled agent instructions: {', '.join(map(str, changed))}")
+    else:
+        success("Agent instructions already up to date")
+    return changed
 
 
 def link_directory(src, dst):
@@ -505,10 +1538,13 @@ def link_directory(src, dst):
         backup_file(dst_path)
 
     if _DRY_RUN:
-        dry(f"would link {dst} -> {src}")
+        dry(f"would link {dst} -> {src}", "link", path=str(dst), source=str(src_path))
         return True
 
-    dst_path.parent.mkdir(parents=True, exist_ok=True)
+    if not dst_path.parent.is_dir():
+        # A link may be made before the topic that owns its directory has
+        # run; ~/.ssh is created private, as ssh/install.py would.
+        make_dir(dst_path.parent, mode=0o700 if dst_path.parent == SSH_CONFIG_DIR else None)
     dst_path.symlink_to(src_path)
     success(f"Linked: {dst} -> {src}")
     return True
@@ -551,8 +1587,8 @@ def load_symlink_mappings(topic_dir):
     return mappings
 
 
-def install_symlinks(topic_dir):
-    """Install every ``*.symlink`` file in ``topic_dir``.
+def symlink_targets(topic_dir):
+    """Return (source, destination) for every ``*.symlink`` file in topic_dir.
 
     Destinations come from ``symlinks.txt`` when present; otherwise each
     file is linked to ``~/.<basename>`` (the filename without ``.symlink``).
@@ -560,29 +1596,78 @@ def install_symlinks(topic_dir):
     topic_dir = Path(topic_dir)
     symlink_files = sorted(topic_dir.glob("*.symlink"))
     if not symlink_files:
-        return True
+        return []
 
     mappings = load_symlink_mappings(topic_dir)
+    return [
+        (src, mappings.get(src.name, HOME / f".{src.stem}"))
+        for src in symlink_files
+        if src.is_file()
+    ]
+
+
+def install_symlinks(topic_dir):
+    """Install every ``*.symlink`` file in ``topic_dir`` (see symlink_targets).
 
+    A topic that always does so declares ``LINK_SYMLINKS = True``, so that
+    script/install.py links them (and verify.py checks them) up front.
+    """
     all_ok = True
-    for src in symlink_files:
-        if not src.is_file():
-            continue
-        dst = mappings.get(src.name, HOME / f".{src.stem}")
+    for src, dst in symlink_targets(topic_dir):
         if not link_file(src, dst):
             all_ok = False
 
     return all_ok
 
 
-__machine_config = None
+class ManagedFile:
+    """A file an installer generates, with the content it should have.
+
+    Topics that generate files list them from a module-level
+    ``managed_files()``, so script/verify.py can spot drift without
+    running the installer. ``mode`` is only checked when given.
+    """
 
-# Overrides which machine profile get_machine_config() loads, instead of the
-# real short hostname. Mainly useful for tests and for the CI/`script/check.py`
-# dry-run smoke test, which must behave the same on every runner regardless
-# of its (never-enrolled) hostname. Not meant as a way to dodge enrollment on
-# a real machine.
-MACHINE_HOSTNAME_ENV = "DOTFILES_MACHINE_HOSTNAME"
+    def __init__(self, path, content, mode=None):
+        self.path = Path(path)
+        self.content = content
+        self.mode = mode
+
+    def drift(self):
+        """Return how the file on disk differs, or None if it does not."""
+        if self.path.is_symlink():
+            return "is a symlink, not a generated file"
+        try:
+            mode = self.path.stat().st_mode & 0o777
+            same = _holds(self.path, self.content.encode())
+        except FileNotFoundError:
+            return "missing"
+        except OSError as e:
+            return f"unreadable ({e})"
+        if not same:
+            return "content differs"
+        if self.mode is not None and mode != self.mode:
+            return f"mode {oct(mode)}, expected {oct(self.mode)}"
+        return None
+
+
+class ManagedLink:
+    """A symlink an installer creates, and the source it should point to."""
+
+    def __init__(self, path, source):
+        self.path = Path(path)
+        self.source = Path(source)
+
+    def drift(self):
+        """Return how the link on disk differs, or None if it does not."""
+        if not self.path.is_symlink():
+            return "not a symlink" if self.path.exists() else "missing"
+        if self.path.resolve() != self.source.resolve():
+            return f"points to {os.readlink(self.path)}"
+        return None
+
+
+__machine_config = None
 
 
 def get_machine_config():
@@ -615,13 +1700,18 @@ def get_machine_config():
         return __machine_config
 
     hostname = os.environ.get(MACHINE_HOSTNAME_ENV) or get_short_hostname()
-    machines_dir = DOTFILES_ROOT / "machines"
-
-    host_config_file = machines_dir / f"{hostname}.json"
-    if not host_config_file.exists():
+    try:
+        # Merged once and cached under $XDG_CACHE_HOME (see machine_config.py).
+        __machine_config = machine_config.load(
+            DOTFILES_ROOT,
+            hostname,
+            cache_dir=Path(XDG_CACHE_HOME_STR) / "dotfiles",
+            write_cache=_WRITE_CACHES and not _DRY_RUN,
+        )
+    except UnenrolledMachine as e:
         error(
             f"No machine config for hostname '{hostname}': "
-            f"{host_config_file} does not exist."
+            f"{e.path} does not exist."
         )
         error(
             "This machine has not been enrolled. Falling back to "
@@ -630,20 +1720,10 @@ def get_machine_config():
             "signing and the 1Password SSH agent's key exposure."
         )
         error(
-            f"Enroll this machine by creating {host_config_file} (see "
+            f"Enroll this machine by creating {e.path} (see "
             "'Machine-Specific Configuration' in README.md)."
         )
         sys.exit(1)
-
-    # Always load default first
-    with open(machines_dir / "default.json") as f:
-        config = json.load(f)
-
-    # Merge the required hostname-specific config on top
-    with open(host_config_file) as f:
-        config = _deep_merge(config, json.load(f))
-
-    __machine_config = config, hostname
     return __machine_config
 
 
@@ -675,22 +1755,8 @@ def get_provider_credential(provider):
     Raises ValueError with an actionable message if the current machine
     has no (complete) configuration for ``provider``.
     """
-    machine_config, hostname = get_machine_config()
-    entry = machine_config.get("providers", {}).get(provider)
-    if not entry:
-        raise ValueError(
-            f"no {provider!r} provider credential configured for machine "
-            f"{hostname!r}. Add providers.{provider}.op_account/op_ref to "
-            f"machines/{hostname}.json (see machines/ documentation)."
-        )
-    op_account = entry.get("op_account")
-    op_ref = entry.get("op_ref")
-    if not op_account or not op_ref:
-        raise ValueError(
-            f"providers.{provider} for machine {hostname!r} is missing "
-            "op_account or op_ref."
-        )
-    return op_account, op_ref
+    config, hostname = get_machine_config()
+    return machine_config.provider_credential(config, hostname, provider)
 
 
 def op_secret(value):
@@ -717,3 +1783,77 @@ def op_read_command(value):
     """Return a shell-safe ``op read --account X 'ref'`` command string."""
     ref, account = op_secret(value)
     return f"op read --account {shlex.quote(account)} {shlex.quote(ref)}"
+
+
+def op_inject(account, refs):
+    """Return {ref: secret} for refs, read with one ``op inject`` call.
+
+    One call means at most one 1Password unlock prompt and one CLI start-up
+    for all of refs, where ``op read`` would cost one of each per secret.
+    The template puts each reference between marker lines that no secret
+    contains, so values may span several lines. Raises CalledProcessError
+    if op fails, without the secrets in it.
+    """
+    refs = list(dict.fromkeys(refs))
+    marker = f"--dotfiles-op-inject-{secrets.token_hex(16)}--"
+    template = "".join(f"{marker}\n{{{{ {ref} }}}}\n" for ref in refs) + f"{marker}\n"
+    cmd = ["op", "inject", "--account", account]
+    result = subprocess.run(cmd, input=template, capture_output=True, text=True, check=False)
+    if result.returncode != 0:
+        error(f"op inject failed for account {account}: {result.stderr.strip()}")
+        raise subprocess.CalledProcessError(result.returncode, cmd)
+    values = result.stdout.split(f"{marker}\n")
+    if len(values) != len(refs) + 2 or values[0] or values[-1]:
+        raise subprocess.CalledProcessError(result.returncode, cmd)
+    return {ref: value[:-1] for ref, value in zip(refs, values[1:-1], strict=True)}
+
+
+class OpSecrets:
+    """1Password secrets a topic writes to files, fetched in one batch.
+
+    Topics add() every secret reference they need together with the file
+    it goes to, then write() them all: the secrets are read with one
+    op_inject() per account, kept in memory only, and each file is
+    converged with its mode. In dry-run, write() lists the references it
+    would fetch and the files it would write, and runs nothing.
+
+    A batch belongs to one topic: the installer does not merge the batches
+    of several topics, so each topic using one costs its own op_inject().
+    """
+
+    def __init__(self):
+        self._files = []
+
+    def add(self, value, path, mode=0o600):
+        """Write the secret ``value`` (see op_secret) to path with mode."""
+        ref, account = op_secret(value)
+        self._files.append((ref, account, Path(path), mode))
+
+    def refs(self):
+        """Return {account: [ref, ...]} of the references to fetch."""
+        by_account = {}
+        for ref, account, _, _ in self._files:
+            refs = by_account.setdefault(account, [])
+            if ref not in refs:
+                refs.append(ref)
+        return by_account
+
+    def write(self):
+        """Fetch every secret and write the files. Returns the changed paths."""
+        by_account = self.refs()
+        if _DRY_RUN:
+            for account, refs in by_account.items():
+                for ref in refs:
+                    dry(f"would fetch {ref} (account {account}) with op inject",
+                        "op_inject", account=account, ref=ref)
+            for _, _, path, mode in self._files:
+                dry(f"would write {path}", "write_file", path=str(path), mode=oct(mode))
+            return [path for _, _, path, _ in self._files]
+        values = {
+            account: op_inject(account, refs) for account, refs in by_account.items()
+        }
+        return [
+            path
+            for ref, account, path, mode in self._files
+            if converge_file(path, values[account][ref], mode=mode)
+        ]
@@ -8,17 +8,53 @@ Steps:
 2. Install Python via Homebrew (if not present)
 3. Create ~/.dotfiles symlink
 4. Setup XDG directories
-5. Run topic-specific installation scripts (each installs its own symlinks)
+5. Link every topic's *.symlink files, pruning links no topic declares
+6. Run topic-specific installation scripts
 
 Pass --dry-run to preview without touching the system. The flag is
-propagated to each topic installer.
+propagated to each topic installer. --plan=json does a dry run and prints
+every action it would take as JSON instead.
+
+Topics run concurrently (--jobs N, default 4): each starts as soon as
+every topic in its dependencies.txt has succeeded. By default each topic's
+install.py is imported and its main() called in this interpreter, rather
+than started as a separate Python process (--runner subprocess).
+
+A topic whose inputs (its own directory, script/helpers.py, AGENTS.md and
+the machine config) are unchanged since its last successful run, and whose
+dependencies were all skipped too, is skipped. --force and --force-topic
+override that.
+
+Before any topic runs, the Homebrew formulae and casks the topics declare
+are installed together: one `brew install` for formulae, one for casks and
+one per third-party tap (--no-brew-batch turns this off). --prefetch
+downloads them concurrently first, while topics that need none of them run.
+The npm packages and mise tools topics declare are batched the same way,
+into one `npm install -g` once node is in place and one `mise use -g` once
+mise is (--no-npm-batch and --no-mise-batch turn these off).
+
+--only TOPIC runs just TOPIC and what it depends on (--no-deps: just
+TOPIC); --skip TOPIC leaves out TOPIC and everything that depends on it.
+
+Progress is journaled after every topic, so --resume can continue a run
+that failed without re-running the topics it completed. With --keep-going,
+a failed topic only stops the topics that depend on it.
 """
 
 import argparse
+import ast
+import importlib.util
+import io
+import json
 import os
 import platform
 import subprocess
 import sys
+import threading
+import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from pathlib import Path
 
 # Checked before importing helpers, which imports tomllib (new in 3.11).
@@ -46,11 +82,31 @@ if sys.version_info < MIN_PYTHON:
     raise SystemExit(1)
 
 sys.path.insert(0, str(Path(__file__).resolve().parent))
+import downloads
 from helpers import (
+    BREW_FAILED_ENV,
+    MISE_FAILED_ENV,
+    NPM_FAILED_ENV,
+    PlanCollector,
+    brew_fetch,
+    brew_install_batch,
+    brew_is_installed,
+    brew_tap,
     dry,
     is_dry_run,
+    mise_is_pinned,
+    mise_pinned_tools,
+    mise_use_batch,
+    npm_install_batch,
+    npm_is_installed,
+    plan_topic,
     set_dry_run,
+    set_plan_collector,
+    write_json,
 )
+from runs import RunRecord, Stopwatch, previous_run
+from state import InstallJournal, TopicState, plan_fingerprint, state_dir
+from symlinks import reconcile_symlinks
 
 
 class Colors:
@@ -127,6 +183,11 @@ def check_macos():
         success("Running on macOS")
 
 
+HOMEBREW_INSTALLER_URL = (
+    'https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh'
+)
+
+
 def check_homebrew():
     """Check if Homebrew is installed"""
     result = run_command(['which', 'brew'], check=False, capture_output=True)
@@ -152,29 +213,25 @@ def install_homebrew():
     info("Installing Homebrew...")
     info("This may take several minutes and will require your password")
 
-    # Homebrew installation command
-    install_cmd = '/bin/bash -c "$(curl -fsSL https://raw.githubusercontent.com/Homebrew/install/HEAD/install.sh)"'
-
-    try:
-        run_command(install_cmd, shell=True)
-        success("Homebrew installed successfully")
+    # Run from the download cache, or through curl (see downloads.py).
+    if not downloads.run_script(HOMEBREW_INSTALLER_URL, interpreter=('/bin/bash',)):
+        error("Failed to install Homebrew")
+        return False
+    success("Homebrew installed successfully")
 
-        # Add Homebrew to PATH for this session
-        if platform.machine() == 'arm64':
-            # Apple Silicon
-            brew_path = '/opt/homebrew/bin'
-        else:
-            # Intel
-            brew_path = '/usr/local/bin'
+    # Add Homebrew to PATH for this session
+    if platform.machine() == 'arm64':
+        # Apple Silicon
+        brew_path = '/opt/homebrew/bin'
+    else:
+        # Intel
+        brew_path = '/usr/local/bin'
 
-        if brew_path not in os.environ.get('PATH', ''):
-            os.environ['PATH'] = f"{brew_path}:{os.environ['PATH']}"
-            info(f"Added {brew_path} to PATH for this session")
+    if brew_path not in os.environ.get('PATH', ''):
+        os.environ['PATH'] = f"{brew_path}:{os.environ['PATH']}"
+        info(f"Added {brew_path} to PATH for this session")
 
-        return True
-    except subprocess.CalledProcessError:
-        error("Failed to install Homebrew")
-        return False
+    return True
 
 
 def check_homebrew_python():
@@ -267,7 +324,10 @@ def create_dotfiles_symlink(dotfiles_root):
         return False
 
     if is_dry_run():
-        dry(f"would create symlink ~/.dotfiles -> {dotfiles_root}")
+        dry(
+            f"would create symlink ~/.dotfiles -> {dotfiles_root}",
+            "link", path=str(symlink_path), source=str(dotfiles_root),
+        )
         return True
 
     # Create the symlink
@@ -292,7 +352,7 @@ def setup_xdg():
 
     if is_dry_run():
         for p in (xdg_config_home, xdg_data_home, xdg_cache_home, xdg_state_home):
-            dry(f"would mkdir {p}")
+            dry(f"would mkdir {p}", "mkdir", path=str(p))
         return
 
     xdg_config_home.mkdir(parents=True, exist_ok=True)
@@ -374,14 +434,15 @@ def topological_sort(topics, dependencies):
     return result
 
 
-def run_topic_installers(dotfiles_root, python_path):
-    """Run topic-specific installation scripts in dependency order"""
-    info("Looking for topic installation scripts...")
+def discover_topics(dotfiles_root):
+    """Find every topic with an install.py, outside FINAL_TOPICS.
 
-    topics = {}  # topic_name -> install_script_path
-    dependencies = {}  # topic_name -> list of dependencies
+    Returns (topics, dependencies): topic_name -> install_script_path and
+    topic_name -> list of dependency topic names.
+    """
+    topics = {}
+    dependencies = {}
 
-    # Find all install.py scripts and their dependencies
     for topic_dir in dotfiles_root.iterdir():
         # Skip script directory to avoid recursive invocation
         if (topic_dir.is_dir()
@@ -394,55 +455,1018 @@ def run_topic_installers(dotfiles_root, python_path):
                 topics[topic_name] = install_py
                 dependencies[topic_name] = get_topic_dependencies(topic_dir)
 
+    return topics, dependencies
+
+
+def transitive(start, edges):
+    """Return start plus every topic reachable from it through edges."""
+    found = set()
+    stack = list(start)
+    while stack:
+        topic = stack.pop()
+        if topic not in found:
+            found.add(topic)
+            stack.extend(edges.get(topic, ()))
+    return found
+
+
+def reverse_edges(dependencies):
+    """Turn topic -> dependencies into topic -> dependents."""
+    dependents = {}
+    for topic, deps in dependencies.items():
+        for dep in deps:
+            dependents.setdefault(dep, []).append(topic)
+    return dependents
+
+
+def select_topics(dependencies, only=(), skip=(), no_deps=False):
+    """Pick the topics to run for --only, --skip and --no-deps.
+
+    dependencies: dict of topic_name -> list of dependency topic names,
+        for every topic (final topics depend on all the others)
+    only: run these and, unless no_deps, everything they depend on,
+        transitively; every topic if empty
+    skip: leave out these and everything that depends on them, transitively
+    Returns: set of topic names, or None if a name is not a topic
+    """
+    unknown = sorted(set(only).union(skip) - set(dependencies))
+    if unknown:
+        error(f"Unknown topic(s): {', '.join(unknown)}")
+        return None
+
+    if not only:
+        selected = set(dependencies)
+    elif no_deps:
+        selected = set(only)
+    else:
+        selected = transitive(only, dependencies)
+    return selected - transitive(skip, reverse_edges(dependencies))
+
+
+def failure_tree(failed, dependencies):
+    """Return the lines of a tree of failed topics and what they held up.
+
+    Beneath each failed topic are the topics skipped because they depend on
+    it, directly or not, each listed once per failed topic.
+    """
+    dependents = reverse_edges(dependencies)
+    lines = []
+
+    def walk(topic, prefix, seen):
+        children = sorted(set(dependents.get(topic, ())) - seen)
+        seen.update(children)
+        for i, child in enumerate(children):
+            last = i == len(children) - 1
+            lines.append(f"{prefix}{'└── ' if last else '├── '}{child} (skipped)")
+            walk(child, prefix + ('    ' if last else '│   '), seen)
+
+    for topic in sorted(failed):
+        lines.append(f"{topic} (failed)")
+        walk(topic, '', {topic})
+    return lines
+
+
+# Serialises whole blocks of topic output, so a topic that finishes while
+# another is being printed never splices its lines into the middle.
+_OUTPUT_LOCK = threading.Lock()
+
+
+def print_topic_block(topic, output, ok, detail=''):
+    """Print a finished topic's buffered output and its result atomically."""
+    with _OUTPUT_LOCK:
+        info(f"Output from: {topic}")
+        if output:
+            sys.stdout.write(output)
+            if not output.endswith('\n'):
+                sys.stdout.write('\n')
+        if ok:
+            success(f"Installed: {topic}{detail}")
+        else:
+            error(f"Failed to install: {topic}{detail}")
+        sys.stdout.flush()
+
+
+class _OutputRouter(io.TextIOBase):
+    """Stand-in for sys.stdout/sys.stderr that routes writes per thread.
+
+    Threads that registered a buffer on the shared ``local`` write into it;
+    every other thread writes through to the original stream. It has no
+    fileno(), which is how helpers knows to pipe child process output back
+    through it instead of letting children write to the terminal directly.
+    """
+
+    def __init__(self, fallback, local):
+        super().__init__()
+        self._fallback = fallback
+        self._local = local
+
+    def writable(self):
+        return True
+
+    def write(self, text):
+        target = getattr(self._local, 'buffer', None) or self._fallback
+        return target.write(text)
+
+    def flush(self):
+        self._fallback.flush()
+
+
+# Topics opt out of the in-process runner by setting RUN_IN_PROCESS = False
+# at module level, e.g. if they mutate interpreter-wide state that must not
+# leak into the topics after them.
+IN_PROCESS_OPT_OUT = 'RUN_IN_PROCESS'
+
+
+def load_topic_module(topic, script):
+    """Import a topic's install.py as a module, without running it.
+
+    The topic's own directory is importable while it loads (agents/ imports
+    its sibling shared.py), and sys.path is restored afterwards, undoing the
+    ``sys.path.insert`` every install.py does at import time.
+    """
+    name = 'dotfiles_topic_' + topic.replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, script)
+    module = importlib.util.module_from_spec(spec)
+    saved_path = list(sys.path)
+    sys.path.insert(0, str(script.parent))
+    try:
+        spec.loader.exec_module(module)
+    finally:
+        sys.path[:] = saved_path
+    return module
+
+
+def declared_constant(script, name, default=None):
+    """Return the literal a topic's install.py assigns to name at module level.
+
+    The script is parsed, not imported, so nothing in it runs. Returns
+    default if it does not assign name, cannot be read, or assigns something
+    other than a literal.
+    """
+    try:
+        tree = ast.parse(Path(script).read_text(), str(script))
+    except (OSError, SyntaxError, ValueError):
+        return default
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and any(isinstance(t, ast.Name) and t.id == name for t in node.targets)
+        ):
+            try:
+                return ast.literal_eval(node.value)
+            except ValueError:
+                return default
+    return default
+
+
+def symlinking_topics(topics):
+    """Return the topics that declare ``LINK_SYMLINKS = True``.
+
+    Such a topic links every one of its ``*.symlink`` files (with
+    install_symlinks()), whatever else it does, so the reconciler can link
+    them before the topic runs. ``topics`` maps topic names to install
+    scripts, which are read without being imported.
+    """
+    return {
+        topic for topic, script in topics.items()
+        if declared_constant(script, 'LINK_SYMLINKS') is True
+    }
+
+
+class TopicRunner:
+    """Runs topic installers, in this interpreter or as child processes.
+
+    In-process topics are imported once and their ``main()`` is called with
+    a per-topic ``sys.argv`` and the dry-run flag reset to the run's value,
+    so one topic cannot leak dry-run state into the next. Topics that opt
+    out (see IN_PROCESS_OPT_OUT), and every topic under
+    ``--runner subprocess``, run as ``python_path <topic>/install.py``.
+
+    With ``buffered``, each topic's output (including that of the commands
+    it runs through helpers) is collected and printed in one block when it
+    finishes. ``prepare()`` must wrap the calls while buffering in-process.
+    """
+
+    def __init__(self, python_path, runner, dry_run, buffered, record=None):
+        self.python_path = python_path
+        self.in_process = runner == 'inprocess'
+        self.dry_run = dry_run
+        self.buffered = buffered
+        self.record = record
+        self.child_args = ['--dry-run'] if dry_run else []
+        self.modules = {}
+        self._local = threading.local()
+
+    def load(self, topics):
+        """Import every in-process topic up front, on the calling thread."""
+        if not self.in_process:
+            return
+        for topic, script in topics.items():
+            module = load_topic_module(topic, script)
+            if getattr(module, IN_PROCESS_OPT_OUT, True):
+                self.modules[topic] = module
+
+    @contextmanager
+    def prepare(self):
+        """Route per-thread output and restore sys.argv when done."""
+        saved_argv = sys.argv
+        saved_streams = sys.stdout, sys.stderr
+        if self.buffered and self.modules:
+            sys.stdout = _OutputRouter(saved_streams[0], self._local)
+            sys.stderr = _OutputRouter(saved_streams[1], self._local)
+        try:
+            yield
+        finally:
+            sys.stdout, sys.stderr = saved_streams
+            sys.argv = saved_argv
+
+    def __call__(self, topic, script):
+        """Run one topic installer. Returns True on success.
+
+        The run is timed, and added to ``record`` if there is one.
+        """
+        module = self.modules.get(topic)
+        stopwatch = Stopwatch()
+        if module is None:
+            status, output, usage = self._run_subprocess(script)
+        else:
+            with plan_topic(topic):
+                status, output = self._run_in_process(script, module)
+            usage = None
+        timing = stopwatch.stop(topic, status, usage)
+        if self.record is not None:
+            self.record.add(timing)
+
+        ok = status == 0
+        if ok:
+            detail = f" in {timing.wall:.1f}s"
+        else:
+            detail = f" (exit code {status}) after {timing.wall:.1f}s"
+        if self.buffered:
+            print_topic_block(topic, output, ok, detail)
+        elif ok:
+            success(f"Installed: {topic}{detail}")
+        else:
+            error(f"Failed to install: {topic}{detail}")
+        return ok
+
+    def _run_in_process(self, script, module):
+        """Call module.main(); return (exit status, buffered output)."""
+        if self.buffered:
+            self._local.buffer = io.StringIO()
+        set_dry_run(self.dry_run)
+        sys.argv = [str(script), *self.child_args]
+        try:
+            code = module.main()
+        except SystemExit as e:
+            code = e.code
+        except Exception:  # noqa: BLE001 - report any topic crash, keep going
+            traceback.print_exc()
+            code = 1
+        finally:
+            set_dry_run(self.dry_run)
+        if code is None:
+            status = 0
+        elif isinstance(code, int):
+            status = code
+        else:
+            # sys.exit("message"), which the interpreter would print.
+            print(code, file=sys.stderr)
+            status = 1
+
+        output = ''
+        if self.buffered:
+            output = self._local.buffer.getvalue()
+            self._local.buffer = None
+        return status, output
+
+    def _run_subprocess(self, script):
+        """Run script as a child; return (exit status, output, rusage).
+
+        The child is reaped with os.wait4, which reports the resources it
+        used alone, even while other topics' children run alongside it.
+        """
+        cmd = [self.python_path, str(script), *self.child_args]
+        pipe = subprocess.PIPE if self.buffered else None
+        process = subprocess.Popen(
+            cmd,
+            stdout=pipe,
+            stderr=subprocess.STDOUT if self.buffered else None,
+            text=True,
+        )
+        output = process.stdout.read() if self.buffered else ''
+        if process.stdout is not None:
+            process.stdout.close()
+        _, wait_status, usage = os.wait4(process.pid, 0)
+        process.returncode = os.waitstatus_to_exitcode(wait_status)
+        return process.returncode, output, usage
+
+
+def run_topic_graph(sorted_topics, dependencies, run_one, jobs,
+                    keep_going=False):
+    """Run topics concurrently, each as soon as its dependencies succeed.
+
+    sorted_topics: topological order, also used to break ties
+        deterministically when several topics are ready at once
+    dependencies: dict of topic_name -> list of dependency topic names
+    run_one: callable(topic) -> bool, called from a worker thread
+    jobs: maximum number of topics running at the same time
+
+    Stops starting new topics after the first failure, but lets the ones
+    already running finish. With ``keep_going``, carries on with everything
+    that does not depend on a failed topic instead; the topics that do are
+    never started. Returns True if every topic succeeded.
+    """
+    rank = {topic: i for i, topic in enumerate(sorted_topics)}
+    waiting = {topic: set(dependencies.get(topic, ())) for topic in sorted_topics}
+    dependents = {topic: [] for topic in sorted_topics}
+    for topic in sorted_topics:
+        for dep in waiting[topic]:
+            dependents[dep].append(topic)
+
+    ready = [topic for topic in sorted_topics if not waiting[topic]]
+    running = {}
+    failed = False
+    stopped = False
+
+    with ThreadPoolExecutor(max_workers=jobs) as pool:
+        while running or (ready and not stopped):
+            while ready and not stopped and len(running) < jobs:
+                topic = ready.pop(0)
+                running[pool.submit(run_one, topic)] = topic
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                topic = running.pop(future)
+                if not future.result():
+                    # Its dependents keep waiting on it, so never start.
+                    failed = True
+                    stopped = not keep_going
+                    continue
+                for dependent in dependents[topic]:
+                    waiting[dependent].discard(topic)
+                    if not waiting[dependent]:
+                        ready.append(dependent)
+            ready.sort(key=rank.__getitem__)
+
+    return not failed
+
+
+class DeclaredPlan:
+    """Every package of one kind the topics declare, and which topics need it.
+
+    A topic declares them in a module-level list named ``ATTRIBUTE`` (see
+    NpmPlan and MisePlan), e.g. ``MISE_TOOLS = ['node@24']``, and still
+    installs them itself (``mise_use(MISE_TOOLS[0])``). The plan only lets
+    the installer get the missing ones in place first, in one batch, so
+    that the topic's own install finds them there and costs nothing.
+    """
+
+    ATTRIBUTE = None
+    KIND = 'packages'
+
+    def __init__(self):
+        self.packages = {}  # name -> topics
+
+    @classmethod
+    def from_topics(cls, topics, modules=None):
+        """Collect the declarations of topics ({topic: install.py path}).
+
+        Reuses already imported topic modules where given. A topic that
+        fails to import contributes nothing; it fails on its own later.
+        """
+        modules = modules or {}
+        plan = cls()
+        for topic, script in topics.items():
+            module = modules.get(topic)
+            if module is None:
+                try:
+                    module = load_topic_module(topic, script)
+                except Exception as e:  # noqa: BLE001 - reported, not fatal here
+                    warn(f"Could not read {cls.KIND} of {topic}: {e}")
+                    continue
+            plan.add(topic, module)
+        return plan
+
+    def add(self, topic, module):
+        for name in getattr(module, self.ATTRIBUTE, ()):
+            self.packages.setdefault(name, []).append(topic)
+
+    def topics(self):
+        """Return the set of topics that declare at least one package."""
+        return {topic for owners in self.packages.values() for topic in owners}
+
+
+class BrewPlan(DeclaredPlan):
+    """Every Homebrew package the topics declare, and which topics need it.
+
+    A topic declares what it installs from Homebrew in module-level lists:
+    ``BREW_FORMULAE``, ``BREW_CASKS``, and ``BREW_TAPS`` for third-party
+    taps that must be tapped and trusted first. Packages are keyed by
+    (name, cask), and get in place in a handful of ``brew install`` calls.
+    """
+
+    KIND = 'Homebrew packages'
+
+    def __init__(self):
+        super().__init__()  # packages: (name, cask) -> topics
+        self.taps = {}  # tap -> topics
+
+    def add(self, topic, module):
+        for tap in getattr(module, 'BREW_TAPS', ()):
+            self.taps.setdefault(tap, []).append(topic)
+        for name in getattr(module, 'BREW_FORMULAE', ()):
+            self.packages.setdefault((name, False), []).append(topic)
+        for name in getattr(module, 'BREW_CASKS', ()):
+            self.packages.setdefault((name, True), []).append(topic)
+
+    def missing(self):
+        """Return (name, cask) for every declared package not installed yet."""
+        return [
+            (name, cask)
+            for name, cask in sorted(self.packages)
+            if is_dry_run() or not brew_is_installed(name)
+        ]
+
+    @staticmethod
+    def tap_of(name):
+        """Return the tap of a tap-qualified formula (user/repo/name)."""
+        parts = name.split('/')
+        return '/'.join(parts[:2]) if len(parts) == 3 else None
+
+    def batches(self):
+        """Return (tap, cask, names) for each ``brew install`` to issue.
+
+        Core formulae and casks get one batch each, and every tap one more.
+        """
+        formulae, casks, tapped = [], [], {}
+        for name, cask in sorted(self.packages):
+            tap = self.tap_of(name)
+            if cask:
+                casks.append(name)
+            elif tap is not None:
+                tapped.setdefault(tap, []).append(name)
+            else:
+                formulae.append(name)
+        batches = [(None, False, formulae), (None, True, casks)]
+        batches += [(tap, False, names) for tap, names in sorted(tapped.items())]
+        return [batch for batch in batches if batch[2]]
+
+
+def install_brew_plan(plan):
+    """Install the missing packages of plan, batched per kind and per tap.
+
+    Each tap is tapped (and trusted) once, and only if something from it is
+    missing. Failed packages are reported against the topics that need
+    them and exported in BREW_FAILED_ENV, so those topics' own
+    ``brew_install`` calls fail fast instead of repeating the attempt.
+
+    Returns {package: [topics]} for the packages that could not be installed.
+    """
+    failed = {}
+    for tap, cask, names in plan.batches():
+        missing = names if is_dry_run() else [
+            name for name in names if not brew_is_installed(name)
+        ]
+        if not missing:
+            continue
+        kind = 'cask(s)' if cask else 'formula(e)'
+        source = f" from {tap}" if tap else ''
+        info(f"Installing {len(missing)} Homebrew {kind}{source}: {' '.join(missing)}")
+        if tap in plan.taps and not brew_tap(tap, trust=True):
+            error(f"Failed to tap {tap}")
+            failed.update({name: plan.packages[(name, cask)] for name in missing})
+            continue
+        for name in brew_install_batch(missing, cask=cask):
+            failed[name] = plan.packages[(name, cask)]
+
+    for name, topics in sorted(failed.items()):
+        error(f"Homebrew could not install {name} (needed by: {', '.join(topics)})")
+    os.environ[BREW_FAILED_ENV] = ' '.join(sorted(failed))
+    return failed
+
+
+class BrewPrefetch:
+    """Downloads bottles and casks with ``brew fetch``, several at once.
+
+    Formulae from third-party taps are left to ``brew install``, since
+    fetching them needs the tap added and trusted first. ``timings`` maps
+    each fetched package to (seconds, ok).
+    """
+
+    FILE_NAME = 'brew-fetch.json'
+
+    def __init__(self, packages, jobs):
+        self.timings = {}
+        self._pool = ThreadPoolExecutor(
+            max_workers=jobs, thread_name_prefix='brew-fetch'
+        )
+        packages = [
+            (name, cask)
+            for name, cask in packages
+            if cask or BrewPlan.tap_of(name) is None
+        ]
+        if is_dry_run():
+            # One line, rather than one per package from concurrent threads.
+            names = ' '.join(name for name, _ in packages)
+            dry(f"would brew fetch, {jobs} at a time: {names}")
+            return
+        for name, cask in packages:
+            self._pool.submit(self._fetch, name, cask)
+
+    def _fetch(self, name, cask):
+        start = time.monotonic()
+        ok = brew_fetch(name, cask=cask)
+        self.timings[name] = (round(time.monotonic() - start, 3), ok)
+
+    def wait(self):
+        """Wait for every fetch, then report and record the timings."""
+        self._pool.shutdown(wait=True)
+        if not self.timings:
+            return
+        slowest = sorted(self.timings.items(), key=lambda item: -item[1][0])
+        info(
+            f"Prefetched {len(self.timings)} Homebrew package(s); slowest: "
+            + ', '.join(f"{name} {seconds:.1f}s" for name, (seconds, _) in slowest[:5])
+        )
+        failed = [name for name, (_, ok) in slowest if not ok]
+        if failed:
+            warn(f"Could not prefetch {', '.join(failed)}; brew install will retry")
+        if not is_dry_run():
+            write_json(
+                state_dir() / self.FILE_NAME,
+                {
+                    name: {'seconds': seconds, 'ok': ok}
+                    for name, (seconds, ok) in self.timings.items()
+                },
+            )
+
+
+class BrewPhase:
+    """The Homebrew work that topics declaring packages have to wait for.
+
+    Without prefetching, ``ensure()`` is called once before any topic runs.
+    With it, downloads start right away and the topics that declare no
+    packages go ahead; the first topic that does declare some waits for the
+    downloads and runs the (now local-only) batch install, and the rest
+    wait for that.
+    """
+
+    def __init__(self, plan, batch=True, prefetch_jobs=0):
+        self.plan = plan
+        self.batch = batch
+        self.topics = plan.topics()
+        self.prefetch = None
+        if prefetch_jobs:
+            self.prefetch = BrewPrefetch(plan.missing(), prefetch_jobs)
+        self._lock = threading.Lock()
+        self._done = False
+
+    def ensure(self):
+        with self._lock:
+            if self._done:
+                return
+            self._done = True
+            if self.prefetch is not None:
+                self.prefetch.wait()
+            if self.batch:
+                install_brew_plan(self.plan)
+
+
+class NpmPlan(DeclaredPlan):
+    """Global npm packages, declared in ``NPM_PACKAGES``."""
+
+    ATTRIBUTE = 'NPM_PACKAGES'
+    KIND = 'npm packages'
+
+
+class MisePlan(DeclaredPlan):
+    """mise tool specs such as ``node@24``, declared in ``MISE_TOOLS``."""
+
+    ATTRIBUTE = 'MISE_TOOLS'
+    KIND = 'mise tools'
+
+
+def _report_batch_failures(tool, plan, failed_names, env):
+    """Map failed_names to the topics needing them, report and export them."""
+    failed = {name: plan.packages[name] for name in failed_names}
+    for name, topics in sorted(failed.items()):
+        error(f"{tool} could not install {name} (needed by: {', '.join(topics)})")
+    os.environ[env] = ' '.join(sorted(failed))
+    return failed
+
+
+def install_npm_plan(plan):
+    """Install the missing packages of plan with a single ``npm install -g``.
+
+    What is installed comes from one ``npm ls -g`` (helpers.npm_inventory).
+    Failed packages are reported against the topics that need them and
+    exported in NPM_FAILED_ENV, so those topics' own npm_install_global
+    calls fail fast instead of repeating the attempt.
+
+    Returns {package: [topics]} for the packages that could not be installed.
+    """
+    missing = [name for name in sorted(plan.packages) if not npm_is_installed(name)]
+    failed = []
+    if missing:
+        info(f"Installing {len(missing)} npm package(s): {' '.join(missing)}")
+        failed = npm_install_batch(missing)
+    return _report_batch_failures('npm', plan, failed, NPM_FAILED_ENV)
+
+
+def install_mise_plan(plan):
+    """Pin and install the tools of plan with a single ``mise use -g``.
+
+    Nothing runs if ~/.config/mise/config.toml pins them all already (see
+    helpers.mise_use_batch). Failures are reported and exported in
+    MISE_FAILED_ENV like install_npm_plan does, and each topic's own
+    mise_use then reports its tool's outcome.
+
+    Returns {spec: [topics]} for the tools that could not be installed.
+    """
+    tools = {} if is_dry_run() else mise_pinned_tools()
+    missing = [spec for spec in sorted(plan.packages) if not mise_is_pinned(spec, tools)]
+    failed = []
+    if missing:
+        info(f"Installing {len(missing)} mise tool(s): {' '.join(missing)}")
+        failed = mise_use_batch(missing)
+    return _report_batch_failures('mise', plan, failed, MISE_FAILED_ENV)
+
+
+class BatchPhase:
+    """A batched install that the topics declaring packages wait for.
+
+    npm and mise only exist once the node and mise topics have run, so
+    unlike BrewPhase this never runs up front. When a topic that declares
+    packages is about to run, ``ensure(topic)`` runs ``install`` on a plan
+    of the pending packages of every declaring topic whose dependencies
+    have all succeeded by then (see ``succeeded``), and the rest wait for
+    it. A package is thus never installed before its topic's dependencies,
+    e.g. fnox's tools not before rust; those left out get their own batch
+    once their topic is about to run.
+    """
+
+    def __init__(self, plan, install, dependencies=None):
+        self.plan = plan
+        self.install = install
+        self.dependencies = dependencies or {}
+        self.topics = plan.topics()
+        self._lock = threading.Lock()
+        self._pending = dict(plan.packages)
+        self._succeeded = set()
+
+    def succeeded(self, topic):
+        """Record that topic succeeded (or was skipped as already in place)."""
+        with self._lock:
+            self._succeeded.add(topic)
+
+    def ensure(self, topic):
+        with self._lock:
+            ready = {topic} | {
+                owner for owner in self.topics
+                if set(self.dependencies.get(owner, ())) <= self._succeeded
+            }
+            batch = type(self.plan)()
+            for name, owners in list(self._pending.items()):
+                if ready.intersection(owners):
+                    batch.packages[name] = self._pending.pop(name)
+            if batch.packages:
+                self.install(batch)
+
+
+class Incremental:
+    """Decides which topics a re-run can skip, and records the outcomes.
+
+    A topic is skipped when its inputs are unchanged since its last
+    successful run (see state.TopicState) and every one of its dependencies
+    was skipped too, so anything downstream of a topic that did run is run
+    again. ``state`` is None to run everything without recording (dry-run).
+
+    With a ``journal`` (see state.InstallJournal), every completed topic is
+    journaled, and ``begin(..., resume=True)`` picks up a failed run: the
+    topics it completed are not run again, unless their inputs changed.
+    """
+
+    def __init__(self, state=None, force_all=False, force_topics=(),
+                 journal=None):
+        self.state = state
+        self.force_all = force_all
+        self.force_topics = set(force_topics)
+        self.journal = journal if state is not None else None
+        self.skipped = set()
+        self.failed = set()
+
+    def begin(self, plan, dependencies, resume=False):
+        """Start journaling a run of plan (topic names in run order)."""
+        if self.journal is None:
+            return
+        fingerprint = plan_fingerprint(plan, dependencies, self.state.shared_digest)
+        outcome = self.journal.begin(plan, fingerprint, resume)
+        if outcome == InstallJournal.RESUMED:
+            remaining = self.journal.remaining()
+            info(
+                f"Resuming an interrupted run: {len(plan) - len(remaining)} of "
+                f"{len(plan)} topics already completed"
+                + (f", continuing from {remaining[0]}" if remaining else "")
+            )
+        elif outcome == InstallJournal.CHANGED:
+            warn("The topics or their shared inputs changed since the "
+                 "interrupted run; running everything instead of resuming")
+        elif outcome == InstallJournal.MISSING:
+            info("No interrupted run to resume; running everything")
+
+    def resumed(self, topic):
+        """Return True if the run being resumed already completed topic."""
+        if self.journal is None or topic in self.force_topics:
+            return False
+        return self.journal.is_done(topic, self.state.digest(topic))
+
+    def should_skip(self, topic, dependencies):
+        if self.state is None or self.force_all or topic in self.force_topics:
+            return False
+        if not all(dep in self.skipped for dep in dependencies):
+            return False
+        if not self.state.is_current(topic):
+            return False
+        self.skipped.add(topic)
+        if self.journal is not None:
+            self.journal.done(topic, self.state.digest(topic))
+        return True
+
+    def record(self, topic, ok):
+        if not ok:
+            self.failed.add(topic)
+        if self.state is not None:
+            self.state.record(topic, ok)
+        if ok and self.journal is not None:
+            self.journal.done(topic, self.state.digest(topic))
+
+    def finish(self, ok):
+        """Drop the journal after a complete run, or point at --resume."""
+        if self.journal is None:
+            return
+        if ok:
+            self.journal.finish()
+        else:
+            remaining = self.journal.remaining()
+            if remaining:
+                info(f"Re-run with --resume to continue from {remaining[0]}")
+
+
+def run_topic_installers(dotfiles_root, python_path, jobs=1, runner='inprocess',
+                         incremental=None, brew_batch=False, prefetch_jobs=0,
+                         npm_batch=False, mise_batch=False, selection=None,
+                         record=None, keep_going=False):
+    """Run topic-specific installation scripts in dependency order.
+
+    Up to ``jobs`` topics run at once; each starts as soon as everything
+    in its dependencies.txt has installed successfully. See TopicRunner
+    for ``runner`` and Incremental for ``incremental``. With ``brew_batch``
+    the Homebrew packages every topic declares (see BrewPlan) are installed
+    first, in as few ``brew install`` calls as possible. With
+    ``prefetch_jobs``, they are downloaded that many at a time while the
+    topics that need none of them run (see BrewPhase). With ``npm_batch``
+    and ``mise_batch`` the npm packages and mise tools topics declare (see
+    NpmPlan and MisePlan) are batched into ``npm install -g`` and
+    ``mise use -g`` calls, none before the dependencies of the topics
+    declaring the packages have succeeded (see BatchPhase). ``selection``, if
+    given, is the set of topics to run (see select_topics); dependencies
+    outside it are taken as already in place. Each topic run is timed into
+    ``record`` (a runs.RunRecord), if given. See run_topic_graph for
+    ``keep_going``.
+    """
+    incremental = incremental or Incremental()
+    info("Looking for topic installation scripts...")
+
+    topics, dependencies = discover_topics(dotfiles_root)
+
     if not topics:
         info("No topic install.py scripts found")
         return True
 
     info(f"Found {len(topics)} topic installer(s)")
 
+    unknown = incremental.force_topics - set(topics) - set(FINAL_TOPICS)
+    if unknown:
+        warn(f"--force-topic names unknown topic(s): {', '.join(sorted(unknown))}")
+
+    if selection is not None:
+        topics = {topic: topics[topic] for topic in topics if topic in selection}
+        dependencies = {
+            topic: [dep for dep in dependencies[topic] if dep in selection]
+            for topic in topics
+        }
+        info(f"Running {len(topics)} selected topic installer(s)")
+
     # Sort topics by dependencies
     sorted_topics = topological_sort(topics, dependencies)
     if sorted_topics is None:
         return False
 
-    child_args = ['--dry-run'] if is_dry_run() else []
-
-    # Run each installer in order
-    for topic in sorted_topics:
-        script = topics[topic]
+    buffered = jobs > 1
+    if buffered:
+        info(f"Running up to {jobs} topic installers at once")
+
+    run_topic = TopicRunner(python_path, runner, is_dry_run(), buffered, record)
+    run_topic.load(topics)
+
+    brew = None
+    if brew_batch or prefetch_jobs:
+        plan = BrewPlan.from_topics(topics, run_topic.modules)
+        brew = BrewPhase(plan, batch=brew_batch, prefetch_jobs=prefetch_jobs)
+        if prefetch_jobs:
+            # Among the topics ready to start, prefer those that need no
+            # packages, so they run while the downloads are in flight. Only
+            # the tie-break order changes: dependencies are still honoured.
+            sorted_topics = sorted(sorted_topics, key=lambda t: t in brew.topics)
+        else:
+            brew.ensure()
+
+    phases = []
+    if npm_batch:
+        plan = NpmPlan.from_topics(topics, run_topic.modules)
+        phases.append(BatchPhase(plan, install_npm_plan, dependencies))
+    if mise_batch:
+        plan = MisePlan.from_topics(topics, run_topic.modules)
+        phases.append(BatchPhase(plan, install_mise_plan, dependencies))
+
+    def run_one(topic):
+        ok = run_or_skip(topic)
+        if ok:
+            for phase in phases:
+                phase.succeeded(topic)
+        return ok
+
+    def run_or_skip(topic):
         deps = dependencies[topic]
-        if deps:
-            info(f"Running installer for: {topic} (depends on: {', '.join(deps)})")
+        if incremental.resumed(topic):
+            with _OUTPUT_LOCK:
+                info(f"Completed before the run was interrupted: {topic}")
+            return True
+        if incremental.should_skip(topic, deps):
+            with _OUTPUT_LOCK:
+                info(f"Unchanged since last successful run: {topic}")
+            return True
+        if brew is not None and topic in brew.topics:
+            brew.ensure()
+        for phase in phases:
+            if topic in phase.topics:
+                phase.ensure(topic)
+        with _OUTPUT_LOCK:
+            if deps:
+                info(f"Running installer for: {topic} (depends on: {', '.join(deps)})")
+            else:
+                info(f"Running installer for: {topic}")
+        ok = run_topic(topic, topics[topic])
+        incremental.record(topic, ok)
+        return ok
+
+    with run_topic.prepare():
+        ok = run_topic_graph(
+            sorted_topics, dependencies, run_one, jobs, keep_going=keep_going
+        )
+    if brew is not None:
+        # In case every topic that declares packages was skipped.
+        brew.ensure()
+    return ok
+
+
+def run_final_topics(dotfiles_root, python_path, runner='inprocess',
+                     incremental=None, selection=None, record=None,
+                     keep_going=False):
+    """Run the FINAL_TOPICS installers last, in declared order.
+
+    For skipping and selection, a final topic counts as depending on every
+    other topic. With ``keep_going``, they run even after other topics
+    failed, unless something in their own dependencies.txt failed.
+    """
+    incremental = incremental or Incremental()
+    topics, _ = discover_topics(dotfiles_root)
+    if selection is not None:
+        topics = {topic: topics[topic] for topic in topics if topic in selection}
+    scripts = {
+        topic: dotfiles_root / topic / 'install.py'
+        for topic in FINAL_TOPICS
+        if (dotfiles_root / topic / 'install.py').exists()
+        and (selection is None or topic in selection)
+    }
+    run_topic = TopicRunner(
+        python_path, runner, is_dry_run(), buffered=False, record=record
+    )
+    run_topic.load(scripts)
+
+    _, dependencies = discover_topics(dotfiles_root)
+    blocked = transitive(incremental.failed, reverse_edges(dependencies))
+    all_ok = True
+    with run_topic.prepare():
+        for topic, script in scripts.items():
+            if blocked.intersection(get_topic_dependencies(script.parent)):
+                warn(f"Skipping final installer for {topic}: a dependency failed")
+                all_ok = False
+                continue
+            if incremental.resumed(topic):
+                info(f"Completed before the run was interrupted: {topic}")
+                continue
+            if incremental.should_skip(topic, topics):
+                info(f"Unchanged since last successful run: {topic}")
+                continue
+            info(f"Running final installer for: {topic}")
+            ok = run_topic(topic, script)
+            incremental.record(topic, ok)
+            if not ok:
+                all_ok = False
+                if not keep_going:
+                    return False
+
+    return all_ok
+
+
+def plan_document(collector, plan, failed, ok):
+    """Return the collected dry-run plan as JSON-ready data.
+
+    The installer's own actions come first, then every planned topic's, in
+    the order the topics would be installed.
+    """
+    def actions(topic):
+        return [action.as_dict() for action in collector.for_topic(topic)]
+
+    return {
+        'ok': ok,
+        'installer': actions(None),
+        'topics': [
+            {'topic': topic, 'ok': topic not in failed, 'actions': actions(topic)}
+            for topic in plan
+        ],
+    }
+
+
+def report_run(record, ok, compare=False):
+    """Print the topic timings, slowest first, and save the run record.
+
+    With ``compare``, also print how each topic's time changed since the
+    previous saved run. Dry runs are reported but not saved.
+    """
+    previous = previous_run() if compare else None
+    lines = record.summary_lines()
+    if lines:
+        info("=" * 50)
+        info("Topic timings, slowest first:")
+        for line in lines:
+            print(f"  {line}")
+    if compare:
+        if previous is None:
+            info("No previous run to compare with")
         else:
-            info(f"Running installer for: {topic}")
+            info(f"Change since the run of {previous.get('started')}"
+                 " (! marks a regression):")
+            for line in record.compare_lines(previous):
+                print(f"  {line}")
+    if not is_dry_run():
+        info(f"Run record: {record.save(ok)}")
 
-        try:
-            run_command([python_path, str(script), *child_args])
-            success(f"Installed: {topic}")
-        except subprocess.CalledProcessError:
-            error(f"Failed to install: {topic}")
-            return False
 
-    return True
+# Topics mostly wait on the network and on Homebrew/npm/mise, which
+# helpers serialises per tool, so a few more workers than that rarely help.
+DEFAULT_JOBS = 4
+
+
+# Downloads are bound by bandwidth and by the servers, not by this machine.
+DEFAULT_PREFETCH_JOBS = 4
+
 
+def positive_int(value):
+    """argparse type for a strictly positive integer."""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
 
-def run_final_topics(dotfiles_root, python_path):
-    """Run the FINAL_TOPICS installers last, in declared order."""
-    child_args = ['--dry-run'] if is_dry_run() else []
 
+def topic_graph(dotfiles_root, finals_depend_on_all=True):
+    """Return the dependencies of every topic, final topics included.
+
+    Final topics depend on every other topic, or with
+    ``finals_depend_on_all=False`` on what their dependencies.txt lists.
+    """
+    topics, dependencies = discover_topics(dotfiles_root)
     for topic in FINAL_TOPICS:
-        script = dotfiles_root / topic / 'install.py'
-        if not script.exists():
-            continue
-        info(f"Running final installer for: {topic}")
-        try:
-            run_command([python_path, str(script), *child_args])
-            success(f"Installed: {topic}")
-        except subprocess.CalledProcessError:
-            error(f"Failed to install: {topic}")
-            return False
+        topic_dir = dotfiles_root / topic
+        if (topic_dir / 'install.py').exists():
+            if finals_depend_on_all:
+                dependencies[topic] = sorted(topics)
+            else:
+                dependencies[topic] = get_topic_dependencies(topic_dir)
+    return dependencies
 
-    return True
+
+def split_topics(values):
+    """Flatten repeated and comma-separated topic arguments."""
+    return [
+        topic.strip()
+        for value in values
+        for topic in value.split(',')
+        if topic.strip()
+    ]
 
 
 def parse_args(argv=None):
@@ -452,7 +1476,155 @@ def parse_args(argv=None):
         action='store_true',
         help='Print what would happen without making any changes.',
     )
-    return parser.parse_args(argv)
+    parser.add_argument(
+        '--plan',
+        choices=['json'],
+        help=(
+            'Do a dry run, and print every action it would take to stdout as '
+            'JSON, grouped by topic (log output goes to stderr). Implies '
+            '--dry-run and --runner inprocess.'
+        ),
+    )
+    parser.add_argument(
+        '--jobs', '-j',
+        type=positive_int,
+        default=DEFAULT_JOBS,
+        metavar='N',
+        help=(
+            'Run up to N independent topic installers at once '
+            f'(default: {DEFAULT_JOBS}). Output of each topic is printed '
+            'when it finishes; --jobs 1 streams it live instead.'
+        ),
+    )
+    parser.add_argument(
+        '--runner',
+        choices=['inprocess', 'subprocess'],
+        default='inprocess',
+        help=(
+            'How to run topic installers: import each one into this '
+            'interpreter (default), or start a separate Python process per '
+            'topic. Topics can opt out of in-process runs individually.'
+        ),
+    )
+    parser.add_argument(
+        '--force',
+        action='store_true',
+        help=(
+            'Run every topic, even those whose inputs are unchanged since '
+            'their last successful run.'
+        ),
+    )
+    parser.add_argument(
+        '--force-topic',
+        action='append',
+        default=[],
+        metavar='TOPIC',
+        help=(
+            'Run TOPIC (and everything depending on it) even if unchanged. '
+            'Repeatable, or comma-separated.'
+        ),
+    )
+    parser.add_argument(
+        '--no-brew-batch',
+        dest='brew_batch',
+        action='store_false',
+        help=(
+            'Do not install the Homebrew packages topics declare up front in '
+            'one batch; let each topic install its own, one at a time.'
+        ),
+    )
+    parser.add_argument(
+        '--no-npm-batch',
+        dest='npm_batch',
+        action='store_false',
+        help=(
+            'Do not install the npm packages topics declare in one batch; '
+            'let each topic install its own.'
+        ),
+    )
+    parser.add_argument(
+        '--no-mise-batch',
+        dest='mise_batch',
+        action='store_false',
+        help=(
+            'Do not install the mise tools topics declare with one '
+            '`mise use -g`; let each topic install its own.'
+        ),
+    )
+    parser.add_argument(
+        '--prefetch',
+        type=positive_int,
+        nargs='?',
+        const=DEFAULT_PREFETCH_JOBS,
+        default=0,
+        metavar='N',
+        help=(
+            'Download the Homebrew packages topics declare with up to N '
+            f'concurrent `brew fetch` calls (default: {DEFAULT_PREFETCH_JOBS}), '
+            'while topics that need none of them run.'
+        ),
+    )
+    parser.add_argument(
+        '--keep-going', '-k',
+        action='store_true',
+        help=(
+            'When a topic fails, skip only the topics that depend on it and '
+            'carry on with the rest. Ends with a tree of the failures.'
+        ),
+    )
+    parser.add_argument(
+        '--resume',
+        action='store_true',
+        help=(
+            'Continue a run that failed or was interrupted: skip the topics '
+            'it completed, provided the topics and their inputs are unchanged.'
+        ),
+    )
+    parser.add_argument(
+        '--compare',
+        action='store_true',
+        help=(
+            'After the run, show how long each topic took compared with the '
+            'previous run, marking the ones that got noticeably slower.'
+        ),
+    )
+    parser.add_argument(
+        '--only',
+        action='append',
+        default=[],
+        metavar='TOPIC',
+        help=(
+            'Run only TOPIC and the topics it depends on, transitively. '
+            'Repeatable, or comma-separated.'
+        ),
+    )
+    parser.add_argument(
+        '--skip',
+        action='append',
+        default=[],
+        metavar='TOPIC',
+        help=(
+            'Leave out TOPIC and every topic that depends on it. '
+            'Repeatable, or comma-separated.'
+        ),
+    )
+    parser.add_argument(
+        '--no-deps',
+        action='store_true',
+        help='With --only, run just the named topics, not their dependencies.',
+    )
+    args = parser.parse_args(argv)
+    args.force_topic = split_topics(args.force_topic)
+    args.only = split_topics(args.only)
+    args.skip = split_topics(args.skip)
+    if args.no_deps and not args.only:
+        parser.error('--no-deps needs --only')
+    if args.resume and args.force:
+        parser.error('--resume cannot be combined with --force')
+    if args.plan:
+        args.dry_run = True
+        args.runner = 'inprocess'
+    return args
 
 
 def main():
@@ -460,6 +1632,16 @@ def main():
     args = parse_args()
     set_dry_run(args.dry_run)
 
+    # With --plan, stdout carries only the plan: everything else printed to
+    # it, by this process and by the commands it runs, goes to stderr.
+    collector = plan_stream = None
+    if args.plan:
+        collector = PlanCollector()
+        set_plan_collector(collector)
+        sys.stdout.flush()
+        plan_stream = os.fdopen(os.dup(sys.stdout.fileno()), 'w')
+        os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+
     info("Starting lsimons-dotfiles installation")
     if is_dry_run():
         dry("dry-run mode: no changes will be made")
@@ -470,6 +1652,15 @@ def main():
     dotfiles_root = script_dir.parent.resolve()
     info(f"Dotfiles root: {dotfiles_root}")
 
+    # Validate the topic selection before touching anything.
+    graph = topic_graph(dotfiles_root)
+    selection = None
+    if args.only or args.skip:
+        selection = select_topics(graph, args.only, args.skip, args.no_deps)
+        if selection is None:
+            sys.exit(1)
+        info(f"Selected topics: {', '.join(sorted(selection)) or '(none)'}")
+
     # Step 1: Check macOS
     check_macos()
 
@@ -504,14 +1695,68 @@ def main():
         os.environ['PATH'] = f"{mise_shims}:{os.environ['PATH']}"
         info(f"Added mise shims to PATH: {mise_shims}")
 
-    # Step 8: Run topic installers (each installs its own .symlink files)
+    # Step 8: Link every topic's *.symlink files in one pass, and prune the
+    # links to .symlink files that no topic declares any more.
     info("=" * 50)
-    if not run_topic_installers(dotfiles_root, python_path):
-        error("Some topic installations failed")
-        sys.exit(1)
+    topics, _ = discover_topics(dotfiles_root)
+    if selection is not None:
+        topics = {topic: script for topic, script in topics.items() if topic in selection}
+    report = reconcile_symlinks(
+        dotfiles_root, symlinking_topics(topics),
+        scope=None if selection is None else set(topics),
+    )
+    success(report.summary())
+
+    # Step 9: Run topic installers (each re-checks its own .symlink files).
+    # Topics whose inputs are unchanged since their last successful run are
+    # skipped; a dry run neither skips nor records anything.
+    info("=" * 50)
+    incremental = Incremental(
+        None if is_dry_run() else TopicState(dotfiles_root),
+        force_all=args.force,
+        force_topics=args.force_topic,
+        journal=InstallJournal(),
+    )
+    plan = topological_sort(graph, graph) or []
+    if selection is not None:
+        plan = [topic for topic in plan if topic in selection]
+    incremental.begin(plan, graph, resume=args.resume)
+    record = RunRecord()
+    ok = run_topic_installers(
+        dotfiles_root, python_path, jobs=args.jobs, runner=args.runner,
+        incremental=incremental, brew_batch=args.brew_batch,
+        prefetch_jobs=args.prefetch, npm_batch=args.npm_batch,
+        mise_batch=args.mise_batch, selection=selection, record=record,
+        keep_going=args.keep_going,
+    )
 
-    # Step 9: Run final topics (e.g. dock) after everything else
-    if not run_final_topics(dotfiles_root, python_path):
+    # Step 10: Run final topics (e.g. dock) after everything else
+    if ok or args.keep_going:
+        ok = run_final_topics(
+            dotfiles_root, python_path, runner=args.runner,
+            incremental=incremental, selection=selection, record=record,
+            keep_going=args.keep_going,
+        ) and ok
+
+    report_run(record, ok, compare=args.compare)
+    incremental.finish(ok)
+    if plan_stream is not None:
+        json.dump(
+            plan_document(collector, plan, incremental.failed, ok),
+            plan_stream, indent=2,
+        )
+        plan_stream.write('\n')
+        plan_stream.close()
+    if not ok:
+        if args.keep_going and incremental.failed:
+            dependencies = {
+                topic: deps
+                for topic, deps in topic_graph(dotfiles_root, False).items()
+                if topic in plan
+            }
+            error("Failed topics, with the topics skipped because of them:")
+            for line in failure_tree(incremental.failed, dependencies):
+                print(f"  {line}")
         error("Some topic installations failed")
         sys.exit(1)
 
@@ -536,6 +1781,5 @@ if __name__ == '__main__':
         sys.exit(130)
     except Exception as e:  # noqa: BLE001 - top-level catch-all for clean exit
         error(f"Unexpected error: {e}")
-        import traceback
         traceback.print_exc()
         sys.exit(1)
@@ -0,0 +1,161 @@
+"""Load the merged machine config, through a cache validated by two stats.
+
+machines/default.json deep-merged with machines/<hostname>.json is what
+helpers.get_machine_config() returns. Merging means reading and parsing
+both files, and it happens in every process that needs the config,
+including script/provider_credential.py, run by every ``codex``/``opencode``
+launch. So the merged result is also written to
+``$XDG_CACHE_HOME/dotfiles/machine-config.<hostname>.json``, together
+with the dotfiles root, the hostname, and the path, mtime, ctime, size
+and inode of both files. load() serves the cache only if all of those
+still match, which costs one ``stat`` per file. Otherwise it merges again.
+
+A hostname without its own machines/<hostname>.json raises
+UnenrolledMachine, cache or no cache: see get_machine_config().
+
+This module imports only ``json`` and ``os`` so it stays cheap to load:
+provider_credential.py imports nothing else (see
+tests/test_provider_credentials.py, which checks what it imports).
+"""
+
+import json
+import os
+
+# Overrides which machine profile get_machine_config() loads, instead of the
+# real short hostname. Mainly useful for tests and for the CI/`script/check.py`
+# dry-run smoke test, which must behave the same on every runner regardless
+# of its (never-enrolled) hostname. Not meant as a way to dodge enrollment on
+# a real machine.
+MACHINE_HOSTNAME_ENV = "DOTFILES_MACHINE_HOSTNAME"
+
+
+class UnenrolledMachine(LookupError):
+    """This hostname has no machines/<hostname>.json."""
+
+    def __init__(self, hostname, path):
+        super().__init__(f"No machine config for hostname {hostname!r}: {path} does not exist.")
+        self.hostname = hostname
+        self.path = path
+
+
+def short_hostname():
+    """Return the short hostname (without domain suffix)."""
+    return os.uname().nodename.split(".")[0]
+
+
+def current_hostname():
+    """Return the hostname whose machine config applies here."""
+    return os.environ.get(MACHINE_HOSTNAME_ENV) or short_hostname()
+
+
+def default_cache_dir():
+    """Return $XDG_CACHE_HOME/dotfiles."""
+    cache_home = os.environ.get("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(cache_home, "dotfiles")
+
+
+def cache_path(cache_dir, hostname):
+    return os.path.join(cache_dir, f"machine-config.{hostname}.json")
+
+
+def deep_merge(base, override):
+    """Recursively merge override into base, returning a new dict."""
+    result = base.copy()
+    for key, value in override.items():
+        if key in result and isinstance(result[key], dict) and isinstance(value, dict):
+            result[key] = deep_merge(result[key], value)
+        else:
+            result[key] = value
+    return result
+
+
+def _signature(path):
+    st = os.stat(path)
+    return [path, st.st_mtime_ns, st.st_ctime_ns, st.st_size, st.st_ino]
+
+
+def _read_cache(path):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_cache(path, data):
+    """Atomically replace the cache file; a failure only costs a re-merge."""
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(tmp, "w") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except OSError:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+
+
+def load(dotfiles_root, hostname=None, cache_dir=None, write_cache=True):
+    """Return (config, hostname): default.json merged with <hostname>.json.
+
+    Served from the cache when both files are exactly as they were when it
+    was written; otherwise merged and, with ``write_cache``, cached again.
+    Raises UnenrolledMachine if machines/<hostname>.json does not exist.
+    """
+    hostname = hostname or current_hostname()
+    root = os.fspath(dotfiles_root)
+    default_file = os.path.join(root, "machines", "default.json")
+    host_file = os.path.join(root, "machines", f"{hostname}.json")
+    try:
+        host_signature = _signature(host_file)
+    except FileNotFoundError:
+        raise UnenrolledMachine(hostname, host_file) from None
+    key = {
+        "root": root,
+        "hostname": hostname,
+        "files": [_signature(default_file), host_signature],
+    }
+
+    path = cache_path(cache_dir or default_cache_dir(), hostname)
+    cached = _read_cache(path)
+    if (
+        isinstance(cached, dict)
+        and "config" in cached
+        and all(cached.get(k) == v for k, v in key.items())
+    ):
+        return cached["config"], hostname
+
+    with open(default_file) as f:
+        config = json.load(f)
+    with open(host_file) as f:
+        config = deep_merge(config, json.load(f))
+    if write_cache:
+        _write_cache(path, {**key, "config": config})
+    return config, hostname
+
+
+def provider_credential(config, hostname, provider):
+    """Return (op_account, op_ref) from providers.<provider> of a machine config.
+
+    Raises ValueError with an actionable message if the entry is missing
+    or incomplete; see helpers.get_provider_credential().
+    """
+    entry = config.get("providers", {}).get(provider)
+    if not entry:
+        raise ValueError(
+            f"no {provider!r} provider credential configured for machine "
+            f"{hostname!r}. Add providers.{provider}.op_account/op_ref to "
+            f"machines/{hostname}.json (see machines/ documentation)."
+        )
+    op_account = entry.get("op_account")
+    op_ref = entry.get("op_ref")
+    if not op_account or not op_ref:
+        raise ValueError(
+            f"providers.{provider} for machine {hostname!r} is missing "
+            "op_account or op_ref."
+        )
+    return op_account, op_ref
@@ -0,0 +1,109 @@
+"""Memoized probes of the system: executables on PATH and app bundles.
+
+helpers.command_exists() and helpers.app_exists() answer from here. A
+probe used to cost a ``which`` fork or a stat per call, and topics ask
+about the same few tools (mise, npm, op, brew) over and over, from
+several threads at once. Instead, each PATH directory is listed once per
+PATH value and /Applications once, and every answer is remembered until
+invalidate() is called, which the helpers that install something do.
+
+Run this file to compare a batch of cached probes with forking ``which``.
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import time
+
+APPLICATIONS_DIR = "/Applications"
+
+
+def _list_dir(directory):
+    try:
+        return frozenset(os.listdir(directory))
+    except OSError:
+        return frozenset()
+
+
+def _is_executable(path):
+    return os.path.isfile(path) and os.access(path, os.X_OK)
+
+
+class SystemProbe:
+    """Caches what is on PATH and in /Applications. Thread-safe."""
+
+    def __init__(self, applications_dir=APPLICATIONS_DIR):
+        self.applications_dir = applications_dir
+        self._lock = threading.Lock()
+        self.invalidate()
+
+    def invalidate(self):
+        """Forget everything probed so far, after something was installed."""
+        with self._lock:
+            self._path = None
+            self._listings = {}
+            self._found = {}
+            self._apps = None
+
+    def which(self, cmd):
+        """Return the path ``cmd`` resolves to on PATH, or None."""
+        if os.sep in cmd:
+            return cmd if _is_executable(cmd) else None
+        path = os.environ.get("PATH", os.defpath)
+        with self._lock:
+            if path != self._path:
+                self._path = path
+                self._found = {}
+            if cmd not in self._found:
+                self._found[cmd] = self._search(path, cmd)
+            return self._found[cmd]
+
+    def _search(self, path, cmd):
+        for directory in path.split(os.pathsep):
+            directory = directory or os.curdir
+            if directory not in self._listings:
+                self._listings[directory] = _list_dir(directory)
+            if cmd in self._listings[directory]:
+                candidate = os.path.join(directory, cmd)
+                if _is_executable(candidate):
+                    return candidate
+        return None
+
+    def app_exists(self, app_name):
+        """Return True if ``<app_name>.app`` is in the applications directory."""
+        with self._lock:
+            if self._apps is None:
+                self._apps = _list_dir(self.applications_dir)
+            return f"{app_name}.app" in self._apps
+
+
+_probe = SystemProbe()
+
+which = _probe.which
+app_exists = _probe.app_exists
+invalidate = _probe.invalidate
+
+
+def _benchmark(commands, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for cmd in commands:
+            subprocess.run(["which", cmd], capture_output=True, check=False)
+    forked = time.perf_counter() - started
+
+    probe = SystemProbe()
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for cmd in commands:
+            probe.which(cmd)
+    cached = time.perf_counter() - started
+
+    probes = rounds * len(commands)
+    print(f"{probes} probes of {', '.join(commands)}")
+    print(f"  fork which: {forked * 1000:8.1f}ms  ({forked / probes * 1e6:7.1f}us each)")
+    print(f"  cached:     {cached * 1000:8.1f}ms  ({cached / probes * 1e6:7.1f}us each)")
+
+
+if __name__ == "__main__":
+    _benchmark(sys.argv[1:] or ["mise", "npm", "op", "brew", "git", "sh"], rounds=50)
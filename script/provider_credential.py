@@ -3,14 +3,19 @@
 
 Usage:
     provider_credential.py <provider>
+    provider_credential.py --read <provider>
 
 Resolves ``providers.<provider>`` for the CURRENT machine (see
-``get_machine_config()`` / ``get_provider_credential()`` in helpers.py) and
+``get_provider_credential()`` in helpers.py and machine_config.py) and
 prints, on stdout, ``eval``-able assignments:
 
     PROVIDER_CREDENTIAL_OP_ACCOUNT='...'
     PROVIDER_CREDENTIAL_OP_REF='...'
 
+With ``--read``, it prints the secret itself instead, read through the
+secret broker (see secret_client.py), which keeps it in memory for a few
+minutes, or with ``op read`` if the broker is not running.
+
 Called at call time (not install time) by shell wrapper functions such as
 codex/codex.sh and opencode/opencode.sh, so that credentials resolve from
 whichever machine the shell is running on right now.
@@ -19,28 +24,54 @@ Fails closed: if the current machine has no (complete) configuration for
 <provider>, nothing is printed on stdout, a clear message goes to stderr,
 and the process exits non-zero. There is no fallback to another machine's
 account/reference.
+
+Every agent launch waits for this, so it imports only machine_config and
+secret_client (and through them ``json``), not helpers, and reads the
+merged machine config through machine_config's cache.
 """
 
-import shlex
+import os
 import sys
-from pathlib import Path
 
-sys.path.insert(0, str(Path(__file__).resolve().parent))
-from helpers import get_provider_credential
+import machine_config
+import secret_client
+
+DOTFILES_ROOT = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
 
 
 def main(argv):
+    read = argv[1:2] == ["--read"]
+    if read:
+        argv = argv[:1] + argv[2:]
     if len(argv) != 2:
-        print("usage: provider_credential.py <provider>", file=sys.stderr)
+        print("usage: provider_credential.py [--read] <provider>", file=sys.stderr)
         return 2
 
     provider = argv[1]
     try:
-        op_account, op_ref = get_provider_credential(provider)
+        config, hostname = machine_config.load(DOTFILES_ROOT)
+        op_account, op_ref = machine_config.provider_credential(config, hostname, provider)
+    except machine_config.UnenrolledMachine as exc:
+        print(
+            f"provider_credential: {exc} Enroll this machine first "
+            "(see machines/ documentation).",
+            file=sys.stderr,
+        )
+        return 1
     except ValueError as exc:
         print(f"provider_credential: {exc}", file=sys.stderr)
         return 1
 
+    if read:
+        try:
+            print(secret_client.read_secret(op_account, op_ref))
+        except secret_client.SecretError as exc:
+            print(f"provider_credential: {exc}", file=sys.stderr)
+            return 1
+        return 0
+
+    import shlex
+
     print(f"PROVIDER_CREDENTIAL_OP_ACCOUNT={shlex.quote(op_account)}")
     print(f"PROVIDER_CREDENTIAL_OP_REF={shlex.quote(op_ref)}")
     return 0
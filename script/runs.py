@@ -0,0 +1,179 @@
+"""Timings of installer runs, kept under $XDG_STATE_HOME/dotfiles/runs.
+
+script/install.py times every topic it runs (wall clock, CPU, peak RSS of
+topics run as processes, exit status), prints the slowest first at the
+end of a run, and appends one JSON record per run so that ``--compare``
+can show which topics got slower since the previous one.
+"""
+
+import resource
+import sys
+import threading
+import time
+from datetime import datetime
+from pathlib import Path
+
+from helpers import read_json, write_json
+from state import state_dir
+
+# A topic counts as a regression in --compare when it took this much
+# longer than last time, both absolutely and relatively; anything smaller
+# is noise from the network and Homebrew's own caches.
+REGRESSION_SECONDS = 1.0
+REGRESSION_RATIO = 1.25
+
+
+def runs_dir():
+    """Return the directory holding one JSON record per installer run."""
+    return state_dir() / "runs"
+
+
+def max_rss_kib(usage):
+    """Return ru_maxrss in KiB: macOS reports bytes, Linux already KiB."""
+    if sys.platform == "darwin":
+        return usage.ru_maxrss // 1024
+    return usage.ru_maxrss
+
+
+def _cpu_seconds(usage):
+    return usage.ru_utime + usage.ru_stime
+
+
+class TopicTiming:
+    """What one topic run cost, and how it ended."""
+
+    def __init__(self, topic, wall, cpu, max_rss, status):
+        self.topic = topic
+        self.wall = wall
+        self.cpu = cpu
+        self.max_rss = max_rss  # KiB, or None if not measured
+        self.status = status
+
+    def as_dict(self):
+        return {
+            "topic": self.topic,
+            "wall": round(self.wall, 3),
+            "cpu": round(self.cpu, 3),
+            "max_rss_kib": self.max_rss,
+            "status": self.status,
+        }
+
+
+class Stopwatch:
+    """Times one topic run on the calling thread.
+
+    A topic run as a child process is measured exactly, from the rusage
+    that ``os.wait4`` returns for it. For a topic run in-process, CPU time
+    is this thread's own plus whatever the children reaped meanwhile used
+    (``RUSAGE_CHILDREN``); with several topics running at once that is
+    shared, so approximate. Its RSS is not measured: ``RUSAGE_CHILDREN``
+    only knows the largest child of the whole run, not of this topic.
+    """
+
+    def __init__(self):
+        self.wall = time.monotonic()
+        self.cpu = time.thread_time()
+        self.children = resource.getrusage(resource.RUSAGE_CHILDREN)
+
+    def stop(self, topic, status, child_usage=None):
+        wall = time.monotonic() - self.wall
+        if child_usage is not None:
+            return TopicTiming(
+                topic, wall, _cpu_seconds(child_usage), max_rss_kib(child_usage),
+                status,
+            )
+        children = resource.getrusage(resource.RUSAGE_CHILDREN)
+        cpu = time.thread_time() - self.cpu
+        cpu += _cpu_seconds(children) - _cpu_seconds(self.children)
+        return TopicTiming(topic, wall, cpu, None, status)
+
+
+class RunRecord:
+    """The timings of one installer run."""
+
+    def __init__(self, argv=None):
+        self.started = datetime.now()  # noqa: DTZ005 - local time, like backups
+        self.argv = list(sys.argv[1:] if argv is None else argv)
+        self.timings = {}
+        self._lock = threading.Lock()
+
+    def add(self, timing):
+        with self._lock:
+            self.timings[timing.topic] = timing
+
+    def slowest_first(self):
+        return sorted(self.timings.values(), key=lambda t: (-t.wall, t.topic))
+
+    def as_dict(self, ok):
+        return {
+            "started": self.started.isoformat(timespec="seconds"),
+            "argv": self.argv,
+            "ok": ok,
+            "topics": [timing.as_dict() for timing in self.slowest_first()],
+        }
+
+    def summary_lines(self):
+        """Return a table of the topics run, slowest first."""
+        if not self.timings:
+            return []
+        width = max(len("topic"), *(len(topic) for topic in self.timings))
+        lines = [f"{'topic':<{width}}  {'wall':>8}  {'cpu':>8}  {'rss':>8}  status"]
+        for t in self.slowest_first():
+            rss = "-" if t.max_rss is None else f"{t.max_rss / 1024:.0f}MB"
+            lines.append(
+                f"{t.topic:<{width}}  {t.wall:>7.1f}s  {t.cpu:>7.1f}s  "
+                f"{rss:>8}  {'ok' if t.status == 0 else t.status}"
+            )
+        return lines
+
+    def compare_lines(self, previous):
+        """Return the change in wall time per topic against a previous record.
+
+        Topics are listed with the biggest slowdown first; regressions (see
+        REGRESSION_SECONDS and REGRESSION_RATIO) are marked with ``!``.
+        """
+        before = {t["topic"]: t["wall"] for t in previous.get("topics", ())}
+        rows = []
+        for t in self.timings.values():
+            if t.topic not in before:
+                rows.append((float("inf"), f"  {t.topic}: {t.wall:.1f}s (new)"))
+                continue
+            old = before[t.topic]
+            delta = t.wall - old
+            regression = (
+                delta >= REGRESSION_SECONDS
+                and t.wall >= old * REGRESSION_RATIO
+            )
+            rows.append((
+                delta,
+                (
+                    f"{'!' if regression else ' '} {t.topic}: {old:.1f}s -> "
+                    f"{t.wall:.1f}s ({delta:+.1f}s)"
+                ),
+            ))
+        rows.sort(key=lambda row: -row[0])
+        return [line for _, line in rows]
+
+    def save(self, ok, directory=None):
+        """Write this run to a new JSON file and return its path."""
+        directory = Path(directory) if directory else runs_dir()
+        stamp = self.started.strftime("%Y%m%d_%H%M%S")
+        path = directory / f"{stamp}.json"
+        suffix = 1
+        while path.exists():
+            suffix += 1
+            path = directory / f"{stamp}_{suffix}.json"
+        write_json(path, self.as_dict(ok))
+        return path
+
+
+def previous_run(directory=None):
+    """Return the most recent saved run record, or None."""
+    directory = Path(directory) if directory else runs_dir()
+    if not directory.is_dir():
+        return None
+    for path in sorted(directory.glob("*.json"), reverse=True):
+        record = read_json(path)
+        if isinstance(record, dict):
+            return record
+    return None
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+"""Keep recently read 1Password secrets in memory for the agent wrappers.
+
+codex() and opencode() need an API key from 1Password on every launch,
+and ``op read`` takes about a second. This broker listens on a 0600 Unix
+socket in a 0700 per-user directory (see secret_client.socket_path),
+reads secrets with ``op read`` on request, and keeps them in memory, and
+only in memory, for --ttl seconds. It only reads the provider credentials
+(``providers.*`` op_account/op_ref pairs) of this machine's config, and
+refuses any other reference (see configured_secrets). It forgets everything when the screen
+locks (macOS), and exits after --idle seconds without a request.
+secret_client.read_secret() starts it on demand.
+
+    secret_broker.py serve [--ttl 600] [--idle 1800]
+    secret_broker.py status     # is it running, how many secrets it holds
+    secret_broker.py lock       # forget every secret now
+    secret_broker.py stop
+
+Requests and replies are single lines of JSON:
+``{"op": "read", "account": ..., "ref": ...}`` is answered with
+``{"ok": true, "value": ...}`` or ``{"ok": false, "error": ...}``.
+A refused read does not count as activity for --idle.
+"""
+
+import argparse
+import fcntl
+import json
+import os
+import resource
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+import machine_config
+from secret_client import (
+    SecretError,
+    ask_broker,
+    op_read,
+    private_dir,
+    socket_path,
+)
+
+DOTFILES_ROOT = Path(__file__).resolve().parent.parent
+
+DEFAULT_TTL = 600
+DEFAULT_IDLE = 1800
+
+# How often the screen lock and idle time are checked.
+POLL_INTERVAL = 5
+
+
+def screen_locked():
+    """Return True if the macOS login session's screen is locked."""
+    if sys.platform != "darwin":
+        return False
+    try:
+        result = subprocess.run(
+            ["ioreg", "-n", "Root", "-d1"], capture_output=True, text=True, check=False
+        )
+    except OSError:
+        return False
+    return '"CGSSessionScreenIsLocked"=Yes' in result.stdout
+
+
+def configured_secrets(dotfiles_root=DOTFILES_ROOT):
+    """Return the (op_account, op_ref) pairs under providers.* of this machine.
+
+    Read afresh on every call, through machine_config's cache. An unenrolled
+    machine, or a provider entry without both fields, contributes nothing.
+    """
+    try:
+        config, hostname = machine_config.load(dotfiles_root)
+    except (machine_config.UnenrolledMachine, OSError, ValueError):
+        return set()
+    secrets = set()
+    for provider in config.get("providers", {}):
+        try:
+            secrets.add(machine_config.provider_credential(config, hostname, provider))
+        except ValueError:
+            continue
+    return secrets
+
+
+class SecretCache:
+    """Secrets by (account, ref), each forgotten ttl seconds after it was read."""
+
+    def __init__(self, ttl, clock=time.monotonic):
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if self.clock() >= expires:
+                del self._entries[key]
+                return None
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (value, self.clock() + self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            now = self.clock()
+            return sum(1 for _, expires in self._entries.values() if expires > now)
+
+
+class BrokerHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        server = self.server
+        try:
+            request = json.loads(self.rfile.readline())
+            reply = server.dispatch(request)
+        except (ValueError, TypeError, KeyError) as e:
+            reply = {"ok": False, "error": f"bad request: {e}"}
+        self.wfile.write(json.dumps(reply).encode() + b"\n")
+
+
+class BrokerServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, path, ttl=DEFAULT_TTL, read=op_read, allowed=configured_secrets):
+        self.path = path
+        self.cache = SecretCache(ttl)
+        self.read = read
+        # Returns the (account, ref) pairs the broker may read.
+        self.allowed = allowed
+        self.last_request = time.monotonic()
+        # Requests for a secret not in memory share one `op read`.
+        self._reading = threading.Lock()
+        private_dir(os.path.dirname(path))
+        if os.path.exists(path):
+            os.unlink(path)
+        umask = os.umask(0o177)
+        try:
+            super().__init__(path, BrokerHandler)
+        finally:
+            os.umask(umask)
+        os.chmod(path, 0o600)
+
+    def dispatch(self, request):
+        op = request["op"]
+        if op == "read":
+            key = (request["account"], request["ref"])
+            if key not in self.allowed():
+                return {"ok": False,
+                        "error": f"{key[1]} is not a provider credential of this machine"}
+            self.last_request = time.monotonic()
+            value = self.cache.get(key)
+            if value is None:
+                with self._reading:
+                    value = self.cache.get(key)
+                    if value is None:
+                        try:
+                            value = self.read(*key)
+                        except SecretError as e:
+                            return {"ok": False, "error": str(e)}
+                        self.cache.put(key, value)
+            return {"ok": True, "value": value}
+        self.last_request = time.monotonic()
+        if op == "lock":
+            self.cache.clear()
+            return {"ok": True}
+        if op == "status":
+            return {"ok": True, "pid": os.getpid(), "secrets": len(self.cache),
+                    "ttl": self.cache.ttl}
+        if op == "stop":
+            threading.Thread(target=self.shutdown).start()
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown op {op!r}"}
+
+    def watch(self, idle, poll=POLL_INTERVAL, locked=screen_locked):
+        """Forget everything on screen lock; stop after idle seconds unused."""
+        while True:
+            time.sleep(poll)
+            if len(self.cache) and locked():
+                self.cache.clear()
+            if idle and time.monotonic() - self.last_request > idle:
+                self.shutdown()
+                return
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def serve(path, ttl=DEFAULT_TTL, idle=DEFAULT_IDLE):
+    """Run the broker until it is stopped or idle. Returns an exit code."""
+    try:
+        directory = private_dir(os.path.dirname(path))
+    except (OSError, SecretError) as e:
+        print(f"secret_broker: {e}", file=sys.stderr)
+        return 1
+    with open(os.path.join(directory, "secret-broker.lock"), "w") as lock:
+        try:
+            fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return 0  # Another broker is already serving.
+        server = BrokerServer(path, ttl)
+        threading.Thread(target=server.watch, args=(idle,), daemon=True).start()
+        with server:
+            server.serve_forever()
+    return 0
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+    serve_parser = commands.add_parser("serve", help="Run the broker.")
+    serve_parser.add_argument(
+        "--ttl", type=float, default=DEFAULT_TTL, metavar="SECONDS",
+        help=f"Forget a secret this long after reading it (default: {DEFAULT_TTL}).",
+    )
+    serve_parser.add_argument(
+        "--idle", type=float, default=DEFAULT_IDLE, metavar="SECONDS",
+        help=f"Exit after this long without a request (default: {DEFAULT_IDLE}).",
+    )
+    for name, help_text in (
+        ("status", "Show whether the broker runs and what it holds."),
+        ("lock", "Make the broker forget every secret."),
+        ("stop", "Stop the broker."),
+    ):
+        commands.add_parser(name, help=help_text)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    path = socket_path()
+    if args.command == "serve":
+        # A core dump would write the secrets to disk.
+        resource.setrlimit(resource.RLIMIT_CORE, (0, 0))
+        return serve(path, ttl=args.ttl, idle=args.idle)
+    reply = ask_broker({"op": args.command}, path=path, timeout=5)
+    if reply is None:
+        print("secret broker is not running")
+        return 0 if args.command != "status" else 3
+    if args.command == "status":
+        print(f"secret broker pid {reply['pid']}: {reply['secrets']} secret(s), "
+              f"ttl {reply['ttl']:.0f}s")
+    return 0 if reply.get("ok") else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
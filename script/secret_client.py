@@ -0,0 +1,130 @@
+"""Read a 1Password secret through the secret broker, falling back to `op`.
+
+The broker (script/secret_broker.py) is a per-user daemon that keeps the
+secrets it has read with ``op read`` in memory for a short TTL, so that
+launching an agent does not wait a second for the 1Password CLI every
+time. read_secret() asks it first; if it is not running, the secret is read
+with ``op`` directly and the broker is started in the background for next
+time. Set DOTFILES_SECRET_BROKER=off to always use ``op``.
+
+Like machine_config, this imports only ``json`` and ``os`` up front, since
+provider_credential.py runs on every agent launch.
+"""
+
+import json
+import os
+
+BROKER_ENV = "DOTFILES_SECRET_BROKER"
+
+# How long to wait for the broker, which answers from memory or has to wait
+# for `op` itself (and so possibly for the user to unlock 1Password).
+TIMEOUT = 120
+
+
+class SecretError(Exception):
+    """The secret could not be read."""
+
+
+def socket_dir():
+    """Return the per-user directory holding the broker's socket.
+
+    $XDG_RUNTIME_DIR where there is one; on macOS, $TMPDIR, which is
+    already private to the user.
+    """
+    runtime = os.environ.get("XDG_RUNTIME_DIR") or os.environ.get("TMPDIR") or "/tmp"
+    return os.path.join(runtime, f"dotfiles-{os.getuid()}")
+
+
+def socket_path():
+    return os.path.join(socket_dir(), "secret-broker.sock")
+
+
+def private_dir(path):
+    """Create path as a 0700 directory of ours, or raise SecretError."""
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    st = os.lstat(path)
+    if st.st_uid != os.getuid() or st.st_mode & 0o777 != 0o700:
+        raise SecretError(f"{path} is not a private directory of this user")
+    return path
+
+
+def broker_enabled():
+    return os.environ.get(BROKER_ENV, "").lower() not in ("off", "0", "no")
+
+
+def ask_broker(request, path=None, timeout=TIMEOUT):
+    """Send one request to the broker and return its reply, or None.
+
+    None means no broker is listening (or it hung up).
+    """
+    import socket
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(timeout)
+            sock.connect(path or socket_path())
+            sock.sendall(json.dumps(request).encode() + b"\n")
+            with sock.makefile("rb") as reply:
+                line = reply.readline()
+    except OSError:
+        return None
+    try:
+        return json.loads(line)
+    except ValueError:
+        return None
+
+
+def op_read(account, ref):
+    """Return the secret at ref with ``op read``, or raise SecretError."""
+    import subprocess
+
+    try:
+        result = subprocess.run(
+            ["op", "read", ref],
+            capture_output=True,
+            text=True,
+            check=False,
+            env={**os.environ, "OP_ACCOUNT": account},
+        )
+    except OSError as e:
+        raise SecretError(f"could not run op: {e}") from None
+    value = result.stdout.rstrip("\n")
+    if result.returncode != 0 or not value:
+        raise SecretError(result.stderr.strip() or f"op read {ref} returned nothing")
+    return value
+
+
+def start_broker():
+    """Start the broker in the background, detached from this process."""
+    import subprocess
+    import sys
+
+    script = os.path.join(os.path.dirname(os.path.realpath(__file__)), "secret_broker.py")
+    try:
+        subprocess.Popen(
+            [sys.executable, script, "serve"],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def read_secret(account, ref):
+    """Return the secret at ref: from the broker if it runs, else from op.
+
+    If the broker answers but could not read the secret (or refused to),
+    its error is raised: its own ``op read`` has already failed, and a
+    second one would only prompt the user again.
+    """
+    if broker_enabled():
+        reply = ask_broker({"op": "read", "account": account, "ref": ref})
+        if reply is None:
+            start_broker()
+        elif reply.get("ok"):
+            return reply["value"]
+        else:
+            raise SecretError(reply.get("error") or "the secret broker could not read it")
+    return op_read(account, ref)
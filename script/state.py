@@ -0,0 +1,210 @@
+"""Persistent installer state, kept under $XDG_STATE_HOME/dotfiles.
+
+script/install.py uses this to remember which topics have already been
+installed from exactly the inputs that are on disk now, so a re-run can
+skip them, and to journal the progress of a run, so a failed one can be
+resumed with --resume.
+"""
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+from helpers import (
+    MACHINE_HOSTNAME_ENV,
+    XDG_STATE_HOME_STR,
+    get_short_hostname,
+    read_json,
+    write_json,
+)
+
+# Files outside a topic's own directory that every topic installer reads:
+# helpers.py and every module of script/ that it or a topic imports (a
+# test keeps this list complete), plus the agent instructions.
+SHARED_INPUTS = (
+    "script/helpers.py",
+    "script/machine_config.py",
+    "script/probe.py",
+    "script/downloads.py",
+    "agents/shared.py",
+    "agents/AGENTS.md",
+)
+
+# Never part of a topic's inputs: byte-compiled caches change on every run.
+IGNORED_PARTS = {"__pycache__"}
+
+
+def state_dir():
+    """Return the directory holding all persistent installer state."""
+    return Path(XDG_STATE_HOME_STR) / "dotfiles"
+
+
+def _hash_file(digest, label, path):
+    """Feed a labelled file (or its absence) into digest."""
+    digest.update(label.encode() + b"\0")
+    try:
+        digest.update(Path(path).read_bytes())
+    except FileNotFoundError:
+        digest.update(b"<missing>")
+    digest.update(b"\0")
+
+
+def shared_inputs_digest(dotfiles_root):
+    """Digest the inputs every topic shares: helpers, AGENTS.md, machine config.
+
+    The machine config is taken as the raw bytes of machines/default.json
+    and machines/<hostname>.json, which is exactly what get_machine_config()
+    merges, without failing here on an unenrolled host. The topics that need
+    the config still fail on their own.
+    """
+    dotfiles_root = Path(dotfiles_root)
+    digest = hashlib.sha256()
+    for rel in SHARED_INPUTS:
+        _hash_file(digest, rel, dotfiles_root / rel)
+    hostname = os.environ.get(MACHINE_HOSTNAME_ENV) or get_short_hostname()
+    for rel in ("machines/default.json", f"machines/{hostname}.json"):
+        _hash_file(digest, rel, dotfiles_root / rel)
+    return digest.hexdigest()
+
+
+def topic_inputs_digest(topic_dir, shared_digest):
+    """Digest every file in topic_dir, plus the shared inputs' digest."""
+    topic_dir = Path(topic_dir)
+    digest = hashlib.sha256(shared_digest.encode())
+    files = sorted(
+        path
+        for path in topic_dir.rglob("*")
+        if path.is_file() and not IGNORED_PARTS.intersection(path.parts)
+    )
+    for path in files:
+        _hash_file(digest, str(path.relative_to(topic_dir)), path)
+    return digest.hexdigest()
+
+
+class TopicState:
+    """Digests of each topic's inputs as of its last successful install.
+
+    Stored in install-state.json. A topic whose current digest matches the
+    recorded one has nothing new to apply. Entries are written after every
+    topic, so an interrupted run keeps what it already finished, and a
+    failed topic loses its entry so it is retried next time.
+    """
+
+    FILE_NAME = "install-state.json"
+
+    def __init__(self, dotfiles_root, path=None):
+        self.dotfiles_root = Path(dotfiles_root)
+        self.path = Path(path) if path else state_dir() / self.FILE_NAME
+        data = read_json(self.path, {})
+        self.recorded = dict(data.get("topics", {})) if isinstance(data, dict) else {}
+        self.shared_digest = shared_inputs_digest(self.dotfiles_root)
+        self._digests = {}
+        self._lock = threading.Lock()
+
+    def digest(self, topic):
+        """Return the digest of topic's current inputs (computed once)."""
+        with self._lock:
+            if topic not in self._digests:
+                self._digests[topic] = topic_inputs_digest(
+                    self.dotfiles_root / topic, self.shared_digest
+                )
+            return self._digests[topic]
+
+    def is_current(self, topic):
+        """Return True if topic last succeeded with the inputs on disk now."""
+        return self.recorded.get(topic) == self.digest(topic)
+
+    def record(self, topic, ok):
+        """Remember a successful run of topic, or forget it after a failure."""
+        digest = self.digest(topic)
+        with self._lock:
+            if ok:
+                self.recorded[topic] = digest
+            else:
+                self.recorded.pop(topic, None)
+            write_json(self.path, {"topics": self.recorded})
+
+
+def plan_fingerprint(plan, dependencies, shared_digest):
+    """Digest an install plan: topic order, dependencies and shared inputs."""
+    digest = hashlib.sha256(shared_digest.encode())
+    for topic in plan:
+        digest.update(f"{topic}:{','.join(dependencies.get(topic, ()))}\n".encode())
+    return digest.hexdigest()
+
+
+class InstallJournal:
+    """Progress of the current install run, so a failed one can be resumed.
+
+    Stored in install-journal.json and rewritten after every topic: the
+    planned topic order, a fingerprint of that plan (see plan_fingerprint)
+    and each completed topic with the digest of its inputs. A run that
+    completes removes it.
+    """
+
+    FILE_NAME = "install-journal.json"
+
+    # What begin() found when asked to resume.
+    RESUMED = "resumed"
+    CHANGED = "changed"
+    MISSING = "missing"
+
+    def __init__(self, path=None):
+        self.path = Path(path) if path else state_dir() / self.FILE_NAME
+        self.plan = []
+        self.fingerprint = None
+        self.completed = {}
+        self._lock = threading.Lock()
+
+    def begin(self, plan, fingerprint, resume=False):
+        """Start journaling a run of plan.
+
+        With ``resume``, the completed topics of the previous run are kept
+        if its fingerprint matches; otherwise the journal starts empty.
+        Returns RESUMED, CHANGED or MISSING when resuming, else None.
+        """
+        outcome = None
+        completed = {}
+        if resume:
+            data = read_json(self.path, {})
+            if not isinstance(data, dict) or "fingerprint" not in data:
+                outcome = self.MISSING
+            elif data["fingerprint"] != fingerprint:
+                outcome = self.CHANGED
+            else:
+                outcome = self.RESUMED
+                completed = dict(data.get("completed", {}))
+        with self._lock:
+            self.plan = list(plan)
+            self.fingerprint = fingerprint
+            self.completed = completed
+            self._save()
+        return outcome
+
+    def is_done(self, topic, digest):
+        """Return True if topic completed, from the inputs it has now."""
+        return self.completed.get(topic) == digest
+
+    def done(self, topic, digest):
+        with self._lock:
+            self.completed[topic] = digest
+            self._save()
+
+    def remaining(self):
+        """Return the planned topics not completed yet, in plan order."""
+        return [topic for topic in self.plan if topic not in self.completed]
+
+    def finish(self):
+        """Forget the journal after a run that completed."""
+        self.path.unlink(missing_ok=True)
+
+    def _save(self):
+        write_json(
+            self.path,
+            {
+                "plan": self.plan,
+                "fingerprint": self.fingerprint,
+                "completed": self.completed,
+            },
+        )
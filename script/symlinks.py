@@ -0,0 +1,142 @@
+"""Reconcile the ``*.symlink`` links of every topic in one pass.
+
+script/install.py runs this once before any topic. It builds the set of
+links the topics declare (see helpers.symlink_targets), checks each one
+with a single ``readlink`` (resolving both ends only when the link text
+differs), creates or fixes the ones that are wrong, and removes stale
+links: links to a ``<topic>/<name>.symlink`` file in the dotfiles repo
+that no topic declares any more, because the file was deleted or its
+destination in symlinks.txt changed. Removed links go through
+helpers.backup_file, like anything else the installer replaces.
+
+Stale links are looked for where links were made last time (recorded in
+$XDG_STATE_HOME/dotfiles/symlinks.json), directly in ~, and in every
+directory a declared link lives in, so the whole repo takes milliseconds.
+"""
+
+import os
+import time
+from pathlib import Path
+
+import helpers
+from helpers import (
+    backup_file,
+    info,
+    is_dry_run,
+    link_file,
+    read_json,
+    symlink_targets,
+    write_json,
+)
+from state import state_dir
+
+SUFFIX = ".symlink"
+
+
+def state_path():
+    """Return the file recording the links made by the last reconcile."""
+    return state_dir() / "symlinks.json"
+
+
+class SymlinkReport:
+    """What one reconcile found and did."""
+
+    def __init__(self):
+        self.current = 0
+        self.created = 0
+        self.fixed = 0
+        self.pruned = 0
+        self.elapsed = 0.0
+
+    def summary(self):
+        return (
+            f"{self.current} symlinks up to date, {self.created} created, "
+            f"{self.fixed} fixed, {self.pruned} stale pruned "
+            f"({self.elapsed * 1000:.0f}ms)"
+        )
+
+
+def declared_links(dotfiles_root, topics):
+    """Return {destination: source} for the ``*.symlink`` files of topics."""
+    links = {}
+    for topic in sorted(topics):
+        for src, dst in symlink_targets(Path(dotfiles_root) / topic):
+            links[Path(dst)] = src
+    return links
+
+
+def _repo_source(link, roots):
+    """Return (topic, name) if link points at <root>/<topic>/<name>.symlink."""
+    try:
+        target = os.readlink(link)
+    except OSError:
+        return None
+    target = os.path.normpath(os.path.join(os.path.dirname(link), target))
+    for root in roots:
+        if target.startswith(root + os.sep):
+            parts = target[len(root) + 1:].split(os.sep)
+            if len(parts) == 2 and parts[1].endswith(SUFFIX):
+                return parts[0], parts[1]
+    return None
+
+
+def _candidates(links, recorded):
+    """Return paths that may hold a stale link: last run's and their neighbours'."""
+    candidates = {Path(path) for path in recorded}
+    for directory in {helpers.HOME, *(dst.parent for dst in links)}:
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            continue
+        candidates.update(Path(directory) / name for name in names)
+    return candidates - set(links)
+
+
+def reconcile_symlinks(dotfiles_root, topics, scope=None):
+    """Make every link declared by topics, and prune stale ones.
+
+    ``topics`` are the topics that declare ``LINK_SYMLINKS = True`` (see
+    install.symlinking_topics); other topics' links are never fixed, and
+    only pruned when their source is gone. ``scope``, if given, limits
+    pruning to links into those topics (for --only / --skip runs).
+    Honours dry-run. Returns a SymlinkReport.
+    """
+    started = time.monotonic()
+    report = SymlinkReport()
+    root = os.path.realpath(dotfiles_root)
+    roots = {root, str(dotfiles_root), str(helpers.HOME / ".dotfiles")}
+    links = declared_links(root, topics)
+
+    for dst, src in sorted(links.items()):
+        try:
+            current = os.readlink(dst)
+        except FileNotFoundError:
+            current = None
+        except OSError:
+            current = ""  # not a symlink: link_file backs it up
+        if current == str(src) or (current and dst.resolve() == src.resolve()):
+            report.current += 1
+            continue
+        link_file(src, dst)
+        if current is None:
+            report.created += 1
+        else:
+            report.fixed += 1
+
+    recorded = read_json(state_path(), {}).get("links", [])
+    for path in sorted(_candidates(links, recorded)):
+        source = _repo_source(path, roots)
+        if source is None:
+            continue
+        topic, name = source
+        if scope is not None and topic not in scope:
+            continue
+        if topic in topics or not os.path.lexists(os.path.join(root, topic, name)):
+            info(f"Pruning stale link {path} (no topic declares it)")
+            backup_file(path)
+            report.pruned += 1
+
+    if not is_dry_run():
+        write_json(state_path(), {"links": sorted(str(dst) for dst in links)})
+    report.elapsed = time.monotonic() - started
+    return report
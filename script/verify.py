@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""Check the files and symlinks the installer manages for drift.
+
+Read-only and fast enough for a shell hook or cron job: it computes what
+every generated file and symlink should be, compares that with what is on
+disk, and reports the differences, without installing anything, running
+brew, npm, mise or op, or writing the installer's caches.
+
+What is checked:
+
+- every file a topic lists from a module-level ``managed_files()``
+  (git's config, config.ai and allowed-signers, ~/.claude/settings.json,
+  the compiled AGENTS.md copies, 1Password's agent.toml, ~/.ssh/config.ai);
+- the link for every ``*.symlink`` file of each topic that declares
+  ``LINK_SYMLINKS = True``.
+
+Exits non-zero if anything drifted, or if a topic's expected state could
+not be computed. ``script/install.py`` repairs the drift.
+"""
+
+import argparse
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+from helpers import (
+    DOTFILES_ROOT,
+    HOME_STR,
+    ManagedLink,
+    cache_writes_disabled,
+    error,
+    success,
+    symlink_targets,
+    warn,
+)
+from install import discover_topics, load_topic_module
+
+DEFAULT_JOBS = 8
+
+
+def expected_state(topic, module):
+    """Return the ManagedFile and ManagedLink entries of one topic."""
+    expected = []
+    if hasattr(module, "managed_files"):
+        expected.extend(module.managed_files())
+    if getattr(module, "LINK_SYMLINKS", False) is True:
+        topic_dir = Path(module.__file__).parent
+        expected.extend(ManagedLink(dst, src) for src, dst in symlink_targets(topic_dir))
+    return expected
+
+
+def check_topic(topic, module):
+    """Return (entries checked, [(path, drift)], error message or None)."""
+    try:
+        expected = expected_state(topic, module)
+    except (Exception, SystemExit) as e:  # noqa: BLE001 - reported per topic
+        return 0, [], f"{type(e).__name__}: {e}"
+    drifted = [(entry.path, entry.drift()) for entry in expected]
+    return len(expected), [(path, why) for path, why in drifted if why], None
+
+
+def verify(dotfiles_root=DOTFILES_ROOT, jobs=DEFAULT_JOBS):
+    """Check every topic in parallel.
+
+    Returns (entries checked, {topic: [(path, drift)]}, {topic: error}).
+    Topic modules are imported one at a time (importing changes sys.path);
+    computing and comparing their expected state runs on ``jobs`` threads.
+    """
+    topics, _ = discover_topics(Path(dotfiles_root))
+    with cache_writes_disabled():
+        modules = {
+            topic: load_topic_module(topic, script)
+            for topic, script in sorted(topics.items())
+        }
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            results = dict(zip(modules, pool.map(check_topic, modules, modules.values())))
+    checked = sum(count for count, _, _ in results.values())
+    drift = {topic: found for topic, (_, found, _) in results.items() if found}
+    errors = {topic: err for topic, (_, _, err) in results.items() if err}
+    return checked, drift, errors
+
+
+def _display(path):
+    path = str(path)
+    if path == HOME_STR or path.startswith(HOME_STR + "/"):
+        return "~" + path[len(HOME_STR):]
+    return path
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--quiet", "-q",
+        action="store_true",
+        help="Print nothing when there is no drift.",
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=DEFAULT_JOBS,
+        help=f"Check up to N topics at once (default {DEFAULT_JOBS}).",
+    )
+    args = parser.parse_args(argv)
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    started = time.monotonic()
+    checked, drift, errors = verify(jobs=args.jobs)
+    elapsed = time.monotonic() - started
+
+    for topic, err in sorted(errors.items()):
+        error(f"{topic}: cannot compute expected state: {err}")
+    for topic, found in sorted(drift.items()):
+        for path, why in found:
+            warn(f"{topic}: {_display(path)}: {why}")
+
+    count = sum(len(found) for found in drift.values())
+    if count or errors:
+        error(
+            f"{count} of {checked} managed files and links drifted "
+            f"({elapsed:.2f}s); run script/install.py to repair"
+        )
+        return 1
+    if not args.quiet:
+        success(f"No drift in {checked} managed files and links ({elapsed:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,6 @@
 #!/usr/bin/env python3
 """Installation script for SSH"""
 
-import subprocess
 import sys
 from pathlib import Path
 
@@ -12,7 +11,9 @@ from helpers import (
     SSH_ASKPASS_AI_PATH,
     SSH_CONFIG_AI_PATH,
     SSH_CONFIG_DIR,
-    chmod,
+    ManagedFile,
+    OpSecrets,
+    converge_file,
     dry,
     find_ssh_key,
     get_machine_ssh_config,
@@ -25,35 +26,21 @@ from helpers import (
     success,
     touch_file,
     warn,
-    write_file,
 )
 
+LINK_SYMLINKS = True
 
-def op_write_secret(op_account, op_ref, filename, mode="0600"):
-    subprocess.run(
-        [
-            "op",
-            "read",
-            "--account",
-            op_account,
-            "-f",
-            "-o",
-            filename,
-            "--file-mode",
-            mode,
-            op_ref,
-        ],
-        check=True,
+
+def add_ai_ssh_key(secrets, op_account, op_vault, ai_key_name):
+    secrets.add(
+        {"ref": f"op://{op_vault}/{ai_key_name}/public key", "account": op_account},
+        AI_KEY_PUB_PATH,
+        mode=0o644,
     )
 
 
-def write_ai_ssh_key(op_account, op_vault, ai_key_name):
-    if is_dry_run():
-        dry(f"would write {AI_KEY_PATH}")
-        return
-    op_public_ref = f"op://{op_vault}/{ai_key_name}/public key"
-    op_write_secret(op_account, op_public_ref, str(AI_KEY_PUB_PATH), mode="0644")
-    if not AI_KEY_PATH.exists():
+def check_ai_ssh_key(op_account, op_vault, ai_key_name):
+    if not is_dry_run() and not AI_KEY_PATH.exists():
         warn(
             f"{AI_KEY_PATH} does not exist!\n"
             "  Export\n\n"
@@ -66,15 +53,10 @@ def write_ai_ssh_key(op_account, op_vault, ai_key_name):
 
 def write_ai_askpass(op_ref, op_account):
     askpass_path = SSH_ASKPASS_AI_PATH
-    if is_dry_run():
-        if not op_ref:
-            dry(f"would remove stale {askpass_path}")
-        else:
-            dry(f"would generate {askpass_path}")
-        return
-
     if not op_ref:
-        if askpass_path.exists():
+        if is_dry_run():
+            dry(f"would remove stale {askpass_path}")
+        elif askpass_path.exists():
             askpass_path.unlink()
             info(f"Removed stale {askpass_path}")
         return
@@ -86,21 +68,18 @@ def write_ai_askpass(op_ref, op_account):
         f"exec {op_read_command({'ref': op_ref, 'account': op_account})}\n"
     )
 
-    if askpass_path.exists() and askpass_path.read_text() == content:
-        chmod(askpass_path, 0o700)
+    if converge_file(askpass_path, content, mode=0o700):
+        success(f"Generated {askpass_path}")
+    else:
         success("SSH askpass helper for AI already up to date")
-        return
 
-    write_file(askpass_path, content, mode=0o700)
-    success(f"Generated {askpass_path}")
 
+SSH_CONFIG_AI_MODE = 0o600
 
-def write_ai_ssh_config():
-    config_ai_path = SSH_CONFIG_AI_PATH
-    if is_dry_run():
-        dry(f"would generate {config_ai_path}")
-        return
-    content = (
+
+def render_ai_ssh_config():
+    """Return ~/.ssh/config.ai, which pins AI sessions to the AI key."""
+    return (
         "# Generated by ssh/install.py — do not edit by hand\n"
         "# Used by AI sessions only, via core.sshCommand in\n"
         "# ~/.config/git/config.ai.\n"
@@ -112,12 +91,13 @@ def write_ai_ssh_config():
         "Include config.local\n"
     )
 
-    if config_ai_path.exists() and config_ai_path.read_text() == content:
-        success(f"SSH config {config_ai_path} for AI already up to date")
-        return
 
-    write_file(config_ai_path, content, mode=0o600)
-    success(f"Generated {config_ai_path}")
+def write_ai_ssh_config():
+    config_ai_path = SSH_CONFIG_AI_PATH
+    if converge_file(config_ai_path, render_ai_ssh_config(), mode=SSH_CONFIG_AI_MODE):
+        success(f"Generated {config_ai_path}")
+    else:
+        success(f"SSH config {config_ai_path} for AI already up to date")
 
 
 def configure_ai_ssh():
@@ -135,11 +115,25 @@ def configure_ai_ssh():
     op_account = ssh_key["op_account"]
     op_ref = f"op://{op_vault}/{ai_key_name}/password"
 
-    write_ai_ssh_key(op_account, op_vault, ai_key_name)
+    # Every secret the topic writes goes into one batch, read with a single
+    # `op inject` (and 1Password unlock) per account. The askpass helper
+    # reads the passphrase itself, each time ssh asks for it.
+    secrets = OpSecrets()
+    add_ai_ssh_key(secrets, op_account, op_vault, ai_key_name)
+    secrets.write()
+    check_ai_ssh_key(op_account, op_vault, ai_key_name)
     write_ai_askpass(op_ref, op_account)
     write_ai_ssh_config()
 
 
+def managed_files():
+    """The ~/.ssh/config.ai configure_ai_ssh() writes, if there is an aiKey."""
+    ai_key_name = get_machine_ssh_config().get("aiKey")
+    if ai_key_name is None or find_ssh_key(ai_key_name) is None:
+        return []
+    return [ManagedFile(SSH_CONFIG_AI_PATH, render_ai_ssh_config(), SSH_CONFIG_AI_MODE)]
+
+
 def main():
     info("Configuring SSH...")
     parse_dry_run()
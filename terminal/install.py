@@ -24,12 +24,12 @@ from plistlib import UID
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "script"))
 from helpers import (
     XDG_CONFIG_HOME,
+    converge_file,
     dry,
     error,
     info,
     is_dry_run,
     success,
-    write_file,
 )
 
 PROFILE_NAME = "LSD Warm Light"
@@ -230,8 +230,10 @@ def main():
 
     # Write a re-importable .terminal file alongside the Ghostty themes layout.
     terminal_file = XDG_CONFIG_HOME / "terminal" / "themes" / f"{PROFILE_NAME}.terminal"
-    write_file(terminal_file, plistlib.dumps(profile, fmt=plistlib.FMT_XML).decode())
-    success(f"Wrote {terminal_file}")
+    if converge_file(terminal_file, plistlib.dumps(profile, fmt=plistlib.FMT_XML)):
+        success(f"Wrote {terminal_file}")
+    else:
+        success(f"{terminal_file} already up to date")
 
     if is_dry_run():
         dry(f"would import '{PROFILE_NAME}' into {TERMINAL_DOMAIN}")
@@ -16,6 +16,8 @@ from helpers import (
     success,
 )
 
+BREW_FORMULAE = ['tfenv']
+
 
 def main():
     parse_dry_run()
@@ -0,0 +1,89 @@
+"""Stub executables for tests that run helpers against a fake tool on PATH.
+
+Not a test module itself: the test files import it (``tests/`` is on
+sys.path under both ``unittest discover -s tests`` and pytest).
+"""
+
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+from typing import ClassVar
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "script"))
+
+import helpers
+
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def stub_executable(bin_dir, name, script, log):
+    """Write bin_dir/name, a Python script that runs ``script``.
+
+    Every invocation's arguments are appended to ``log`` first, as one
+    line, and are left in ``args`` for the script. ``script`` may be
+    indented; it is dedented. Returns the stub's path.
+    """
+    path = Path(bin_dir) / name
+    path.write_text(
+        f"#!{sys.executable}\n"
+        "import sys\n"
+        "args = sys.argv[1:]\n"
+        f"with open({str(log)!r}, 'a') as log:\n"
+        "    log.write(' '.join(args) + '\\n')\n"
+        + textwrap.dedent(script)
+    )
+    path.chmod(0o755)
+    return path
+
+
+class StubToolTestCase(unittest.TestCase):
+    """Puts the stub executables in ``STUBS`` ({name: script}) first on PATH.
+
+    Each test gets its own temporary ``self.root``; ``calls(name)`` returns
+    the arguments a stub has been called with so far, one string per call.
+    """
+
+    STUBS: ClassVar[dict] = {}
+
+    def setUp(self):
+        helpers.set_dry_run(False)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        bin_dir = self.root / "bin"
+        bin_dir.mkdir()
+        self.logs = {}
+        for name, script in self.STUBS.items():
+            self.logs[name] = self.root / f"{name}.log"
+            self.logs[name].touch()
+            stub_executable(bin_dir, name, script, self.logs[name])
+        self.patch_env(PATH=f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    def patch_env(self, **values):
+        """Set environment variables for the rest of the test."""
+        env = mock.patch.dict(os.environ, values)
+        env.start()
+        self.addCleanup(env.stop)
+
+    def calls(self, name):
+        return self.logs[name].read_text().splitlines()
+
+    def forget_calls(self, name):
+        self.logs[name].write_text("")
+
+    def quietly(self, func, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+            return func(*args, **kwargs)
@@ -1,12 +1,21 @@
+import contextlib
 import importlib.util
+import io
 import json
+import os
 import shlex
+import sys
 import tempfile
 import unittest
 from pathlib import Path
 from unittest.mock import patch
 
 REPO_ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(REPO_ROOT / "script"))
+
+import helpers
+
+from agents.shared import BOT_ATTRIBUTION, DEFAULT_ATTRIBUTION, render_instructions
 
 
 def load_module(name, path):
@@ -35,12 +44,12 @@ class DeterministicAgentIntegrationTests(unittest.TestCase):
                 patch.object(module, "is_dry_run", return_value=False),
                 patch.object(module, "render_agents_md"),
                 patch.object(module, "link_directory"),
-                patch.object(module, "write_file") as write_file,
+                patch.object(module, "converge_file") as converge_file,
                 patch.object(module, "success"),
             ):
                 module.configure_agent()
 
-            settings = json.loads(write_file.call_args.args[1])
+            settings = json.loads(converge_file.call_args.args[1])
             expected = "export GIT_CONFIG_GLOBAL=" + shlex.quote(
                 str(config_home / "git/config.ai")
             )
@@ -143,5 +152,70 @@ class DeterministicAgentIntegrationTests(unittest.TestCase):
         self.assertFalse((REPO_ROOT / "agents/skills").exists())
 
 
+class AgentInstructionCacheTests(unittest.TestCase):
+    def setUp(self):
+        helpers.set_dry_run(False)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.home = Path(tmp.name)
+        self.agents_md = self.home / "AGENTS.md"
+        self.agents_md.write_text(f"# Agents\n\n{DEFAULT_ATTRIBUTION}\n")
+        self.git_config = self.home / "gitconfig"
+        self.git_config.write_text("[user]\n\temail = bot@leosimons.com\n")
+        for patcher in (
+            patch.dict(os.environ, {
+                "HOME": str(self.home),
+                "XDG_CONFIG_HOME": str(self.home / ".config"),
+                "GIT_CONFIG_GLOBAL": str(self.git_config),
+            }),
+            patch.object(helpers, "AGENTS_MD", self.agents_md),
+            patch.object(helpers, "XDG_CACHE_HOME_STR", str(self.home / ".cache")),
+            patch.dict(helpers._git_emails, clear=True),
+            patch.dict(helpers._compiled_agents_md, clear=True),
+            contextlib.redirect_stdout(io.StringIO()),
+        ):
+            patcher.__enter__()
+            self.addCleanup(patcher.__exit__, None, None, None)
+
+    def git_runs(self):
+        return patch.object(helpers.subprocess, "run", wraps=helpers.subprocess.run)
+
+    def test_git_is_asked_once_until_its_config_changes(self):
+        with self.git_runs() as run:
+            for _ in range(3):
+                self.assertIn(BOT_ATTRIBUTION, helpers.compiled_agents_md())
+            # A new process finds the email in the on-disk cache.
+            helpers._git_emails.clear()
+            self.assertEqual(helpers.get_git_email(), "bot@leosimons.com")
+        self.assertEqual(run.call_count, 1)
+
+        self.git_config.write_text("[user]\n\temail = someone@example.com\n")
+        with self.git_runs() as run:
+            compiled = helpers.compiled_agents_md()
+        self.assertEqual(run.call_count, 1)
+        self.assertIn(DEFAULT_ATTRIBUTION, compiled)
+
+    def test_an_edited_agents_md_is_compiled_again(self):
+        helpers.compiled_agents_md()
+        self.agents_md.write_text(f"# Changed\n\n{DEFAULT_ATTRIBUTION}\n")
+        self.assertTrue(helpers.compiled_agents_md().startswith("# Changed"))
+
+    def test_every_installed_agent_gets_a_copy_written_only_when_stale(self):
+        for topic in ("claude", "opencode"):
+            helpers.agent_instructions_path(topic).parent.mkdir(parents=True)
+
+        changed = helpers.render_all_agent_instructions()
+
+        self.assertEqual(changed, [
+            self.home / ".claude" / "CLAUDE.md",
+            self.home / ".config" / "opencode" / "AGENTS.md",
+        ])
+        self.assertFalse((self.home / ".codex").exists())
+        self.assertEqual(
+            changed[0].read_text(), render_instructions("bot@leosimons.com", self.agents_md.read_text())
+        )
+        self.assertEqual(helpers.render_all_agent_instructions(), [])
+
+
 if __name__ == "__main__":
     unittest.main()
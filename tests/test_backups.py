@@ -0,0 +1,140 @@
+"""Tests for the content-addressed backup store and script/backups.py."""
+
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import unittest
+from datetime import datetime
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "script"))
+
+import backups
+import helpers
+
+
+class BackupStoreTests(unittest.TestCase):
+    def setUp(self):
+        helpers.set_dry_run(False)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.home = Path(tmp.name)
+        self.settings = self.home / ".claude" / "settings.json"
+        patcher = mock.patch.object(helpers, "HOME", self.home)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        output = contextlib.redirect_stdout(io.StringIO())
+        output.__enter__()
+        self.addCleanup(output.__exit__, None, None, None)
+
+    def back_up(self, run, path, content, mode=0o644):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        path.chmod(mode)
+        with mock.patch.object(helpers, "NOW", run):
+            helpers.backup_file(path)
+
+    def test_identical_backups_are_stored_once(self):
+        for run in ("20260101_000000", "20260102_000000", "20260103_000000"):
+            self.back_up(run, self.settings, "{}\n")
+        self.back_up("20260103_000000", self.home / ".zshrc", "{}\n")
+
+        copies = [
+            helpers.backup_root() / run / ".claude" / "settings.json"
+            for run in ("20260101_000000", "20260102_000000", "20260103_000000")
+        ]
+        self.assertEqual({copy.read_text() for copy in copies}, {"{}\n"})
+        self.assertEqual(len({copy.stat().st_ino for copy in copies}), 1)
+        self.assertEqual(len(list((helpers.backup_root() / "blobs").glob("*/*"))), 1)
+        self.assertEqual(backups.disk_usage(), (12, 3))
+
+        [entry, zshrc] = backups.run_entries("20260103_000000")
+        self.assertEqual(entry["path"], str(self.settings))
+        self.assertEqual(entry["backup"], ".claude/settings.json")
+        self.assertEqual((entry["kind"], entry["mode"]), ("file", 0o644))
+        self.assertEqual(zshrc["blob"], entry["blob"])
+
+    def test_symlinks_and_directories_are_recorded(self):
+        link = self.home / ".vimrc"
+        link.symlink_to("/elsewhere/vimrc")
+        tool = self.home / ".config" / "tool"
+        tool.mkdir(parents=True)
+        (tool / "a").write_text("same\n")
+        (tool / "b").write_text("same\n")
+        with mock.patch.object(helpers, "NOW", "20260101_000000"):
+            helpers.backup_file(link)
+            helpers.backup_file(tool)
+
+        [symlink, directory] = backups.run_entries("20260101_000000")
+        self.assertEqual(symlink["kind"], "symlink")
+        self.assertEqual(symlink["target"], "/elsewhere/vimrc")
+        self.assertEqual(directory["kind"], "dir")
+        archived = helpers.backup_root() / "20260101_000000" / ".config" / "tool"
+        self.assertEqual((archived / "a").stat().st_ino, (archived / "b").stat().st_ino)
+
+    def test_restore_backs_up_the_current_file_first(self):
+        self.back_up("20260101_000000", self.settings, "old\n", mode=0o600)
+        self.settings.write_text("new\n")
+
+        with mock.patch.object(helpers, "NOW", "20260102_000000"):
+            self.assertEqual(backups.main(["restore", "20260101_000000"]), 0)
+
+        self.assertEqual(self.settings.read_text(), "old\n")
+        self.assertEqual(os.stat(self.settings).st_mode & 0o777, 0o600)
+        [replaced] = backups.run_entries("20260102_000000")
+        self.assertEqual(replaced["path"], str(self.settings))
+        restored = helpers.backup_root() / "20260101_000000" / ".claude" / "settings.json"
+        self.assertEqual(restored.read_text(), "old\n")
+        # Restoring writes a new file rather than a link to the blob, so
+        # editing it cannot change the backup.
+        self.assertNotEqual(self.settings.stat().st_ino, restored.stat().st_ino)
+
+    def test_restore_rejects_paths_the_run_did_not_back_up(self):
+        self.back_up("20260101_000000", self.settings, "old\n")
+        self.assertEqual(
+            backups.main(["restore", "20260101_000000", str(self.home / ".zshrc")]), 1
+        )
+        self.assertFalse(self.settings.exists())
+
+    def test_prune_keeps_the_newest_runs_and_their_blobs(self):
+        self.back_up("20260101_000000", self.settings, "one\n")
+        self.back_up("20260102_000000", self.settings, "two\n")
+        self.back_up("20260103_000000", self.settings, "two\n")
+
+        self.assertEqual(backups.prune(keep=2), ["20260101_000000"])
+        self.assertEqual(backups.list_runs(), ["20260102_000000", "20260103_000000"])
+        self.assertEqual(len(list((helpers.backup_root() / "blobs").glob("*/*"))), 1)
+        self.assertFalse(helpers.backup_manifest_path("20260101_000000").exists())
+
+        removed = backups.prune(older_than=30, now=datetime(2026, 2, 2))  # noqa: DTZ001 - local, like runs
+        self.assertEqual(removed, ["20260102_000000"])
+        self.assertEqual(backups.list_runs(), ["20260103_000000"])
+
+    def test_prune_dry_run_removes_nothing(self):
+        self.back_up("20260101_000000", self.settings, "one\n")
+        self.assertEqual(backups.main(["--dry-run", "prune", "--keep", "0"]), 0)
+        self.addCleanup(helpers.set_dry_run, False)
+        self.assertEqual(backups.list_runs(), ["20260101_000000"])
+        self.assertEqual(len(list((helpers.backup_root() / "blobs").glob("*/*"))), 1)
+
+    def test_runs_from_before_manifests_are_listed_and_restored(self):
+        legacy = helpers.backup_root() / "20250101_000000" / ".gitconfig"
+        legacy.parent.mkdir(parents=True)
+        legacy.write_text("[user]\n")
+
+        self.assertEqual(backups.list_runs(), ["20250101_000000"])
+        self.assertEqual(
+            backups.run_entries("20250101_000000"),
+            [{"path": str(self.home / ".gitconfig"), "backup": ".gitconfig",
+              "kind": "file"}],
+        )
+        self.assertTrue(backups.restore("20250101_000000"))
+        self.assertEqual((self.home / ".gitconfig").read_text(), "[user]\n")
+
+
+if __name__ == "__main__":
+    unittest.main()
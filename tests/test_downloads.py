@@ -0,0 +1,157 @@
+"""Tests for the installer script download cache (script/downloads.py)."""
+
+import contextlib
+import hashlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "script"))
+
+import downloads
+import helpers
+from stubs import stub_executable
+
+LAST_MODIFIED = "Wed, 01 Jan 2026 00:00:00 GMT"
+
+
+class ScriptHandler(BaseHTTPRequestHandler):
+    """Serves server.body with an ETag, answering 304 to a matching one."""
+
+    def do_GET(self):
+        server = self.server
+        server.requests.append(dict(self.headers))
+        if server.status != 200:
+            self.send_error(server.status)
+            return
+        if self.headers.get("If-None-Match") == server.etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("ETag", server.etag)
+        self.send_header("Last-Modified", LAST_MODIFIED)
+        self.send_header("Content-Length", str(len(server.body)))
+        self.end_headers()
+        self.wfile.write(server.body)
+
+    def log_message(self, *args):
+        pass
+
+
+class DownloadCacheTests(unittest.TestCase):
+    def setUp(self):
+        helpers.set_dry_run(False)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        patcher = mock.patch.object(helpers, "XDG_CACHE_HOME_STR", str(self.tmp / "cache"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ScriptHandler)
+        self.server.requests = []
+        self.serve(b"echo one >> \"$OUT\"\n")
+        self.server.status = 200
+        thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/install.sh"
+
+        output = contextlib.redirect_stdout(io.StringIO())
+        output.__enter__()
+        self.addCleanup(output.__exit__, None, None, None)
+
+    def serve(self, body):
+        self.server.body = body
+        self.server.etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+
+    def test_unchanged_script_is_revalidated_not_downloaded(self):
+        first = downloads.fetch(self.url)
+        self.assertEqual(first.path.read_bytes(), self.server.body)
+        self.assertEqual(first.path.name, hashlib.sha256(self.server.body).hexdigest())
+
+        second = downloads.fetch(self.url)
+        self.assertEqual(second.path, first.path)
+        conditional = self.server.requests[-1]
+        self.assertEqual(conditional["If-None-Match"], self.server.etag)
+        self.assertEqual(conditional["If-Modified-Since"], LAST_MODIFIED)
+
+    def test_changed_script_replaces_the_cached_copy(self):
+        first = downloads.fetch(self.url)
+        self.serve(b"echo two >> \"$OUT\"\n")
+        second = downloads.fetch(self.url)
+        self.assertNotEqual(second.sha256, first.sha256)
+        self.assertEqual(second.path.read_bytes(), b"echo two >> \"$OUT\"\n")
+        self.assertFalse(first.path.exists())
+
+    def test_cached_copy_is_used_when_the_server_fails(self):
+        first = downloads.fetch(self.url)
+        self.server.status = 503
+        self.assertEqual(downloads.fetch(self.url).path, first.path)
+
+        with self.assertRaises(downloads.DownloadError):
+            downloads.fetch(f"http://127.0.0.1:{self.server.server_port}/other.sh")
+
+    def test_unchanged_script_is_not_run_again(self):
+        out = self.tmp / "out"
+        env = {**os.environ, "OUT": str(out)}
+        for _ in range(2):
+            self.assertTrue(downloads.run_script(self.url, env=env, skip_unchanged=True))
+        self.assertEqual(out.read_text(), "one\n")
+
+        self.serve(b"echo two >> \"$OUT\"\n")
+        self.assertTrue(downloads.run_script(self.url, env=env, skip_unchanged=True))
+        self.assertEqual(out.read_text(), "one\ntwo\n")
+
+        # Without skip_unchanged it always runs.
+        self.assertTrue(downloads.run_script(self.url, env=env))
+        self.assertEqual(out.read_text(), "one\ntwo\ntwo\n")
+
+    def test_failed_script_is_not_recorded_as_run(self):
+        self.serve(b"exit 3\n")
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertFalse(downloads.run_script(self.url, skip_unchanged=True))
+        self.assertFalse(downloads.fetch(self.url).ran_before())
+
+    def test_script_is_curled_when_it_cannot_be_fetched(self):
+        # A curl that copies what urllib would have fetched.
+        bin_dir = self.tmp / "bin"
+        bin_dir.mkdir()
+        log = self.tmp / "curl.log"
+        stub_executable(bin_dir, "curl", """\
+            import shutil, urllib.request
+            with urllib.request.urlopen(args[-1]) as r, open(args[-2], "wb") as f:
+                shutil.copyfileobj(r, f)
+            """, log)
+        out = self.tmp / "out"
+        env = {**os.environ, "OUT": str(out)}
+        path = f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+        with (
+            mock.patch.object(downloads, "fetch", side_effect=downloads.DownloadError("no TLS")),
+            mock.patch.dict(os.environ, PATH=path),
+            contextlib.redirect_stderr(io.StringIO()),
+        ):
+            self.assertTrue(downloads.run_script(self.url, env=env, skip_unchanged=True))
+        self.assertEqual(out.read_text(), "one\n")
+        self.assertEqual(len(log.read_text().splitlines()), 1)
+        self.assertFalse(downloads.index_path().exists())
+
+    def test_dry_run_fetches_and_writes_nothing(self):
+        helpers.set_dry_run(True)
+        self.addCleanup(helpers.set_dry_run, False)
+        self.assertTrue(downloads.run_script(self.url))
+        self.assertEqual(self.server.requests, [])
+        self.assertFalse(downloads.downloads_dir().exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
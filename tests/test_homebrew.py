@@ -0,0 +1,289 @@
+"""Tests for the Homebrew helpers, run against a stub `brew` on PATH."""
+
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import time
+import types
+import unittest
+from pathlib import Path
+from typing import ClassVar
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "script"))
+
+import helpers
+from stubs import StubToolTestCase, load_module
+
+installer = load_module("dotfiles_main_installer", REPO_ROOT / "script" / "install.py")
+
+# Keeps the installed formulae and casks as empty directories under
+# $HOMEBREW_PREFIX/Cellar and /Caskroom, so installs change those
+# directories' mtimes just like the real thing.
+STUB_BREW = """\
+import os, time
+from pathlib import Path
+
+prefix = Path(os.environ["HOMEBREW_PREFIX"])
+cellar, caskroom = prefix / "Cellar", prefix / "Caskroom"
+aliases = {"python@3": "python@3.14"}
+
+def names(root):
+    return sorted(p.name.replace("--", "/") for p in root.iterdir())
+
+if args[:1] == ["list"]:
+    if "--formula" in args:
+        print("\\n".join(names(cellar)))
+    elif "--cask" in args:
+        print("\\n".join(names(caskroom)))
+    else:
+        name = aliases.get(args[1], args[1]).replace("/", "--")
+        sys.exit(0 if (cellar / name).exists() or (caskroom / name).exists() else 1)
+elif args[:1] == ["install"]:
+    time.sleep(float(os.environ.get("BREW_LATENCY", "0")))
+    root = caskroom if "--cask" in args else cellar
+    for name in args[1:]:
+        if name.startswith("--"):
+            continue
+        if name in os.environ.get("BREW_FAIL", "").split():
+            print(f"Error: No available formula with the name {name!r}")
+            sys.exit(1)
+        (root / name.replace("/", "--")).mkdir(exist_ok=True)
+elif args[:1] == ["uninstall"]:
+    for name in args[1:]:
+        for root in (cellar, caskroom):
+            path = root / name.replace("/", "--")
+            if path.exists():
+                path.rmdir()
+elif args[:1] == ["fetch"]:
+    time.sleep(float(os.environ.get("BREW_LATENCY", "0")))
+"""
+
+
+class StubBrewTestCase(StubToolTestCase):
+    """Puts a stub brew first on PATH with its own prefix and caches."""
+
+    STUBS: ClassVar[dict] = {"brew": STUB_BREW}
+
+    def setUp(self):
+        super().setUp()
+        self.prefix = self.root / "homebrew"
+        (self.prefix / "Cellar").mkdir(parents=True)
+        (self.prefix / "Caskroom").mkdir()
+        self.patch_env(HOMEBREW_PREFIX=str(self.prefix), **{helpers.BREW_FAILED_ENV: ""})
+        cache = mock.patch.object(helpers, "XDG_CACHE_HOME_STR", str(self.root / "cache"))
+        cache.start()
+        self.addCleanup(cache.stop)
+        taps = mock.patch.object(helpers, "_brew_taps", set())
+        taps.start()
+        self.addCleanup(taps.stop)
+        helpers.reset_brew_inventory()
+        self.addCleanup(helpers.reset_brew_inventory)
+
+    def installed(self, *names, cask=False):
+        root = self.prefix / ("Caskroom" if cask else "Cellar")
+        for name in names:
+            (root / name.replace("/", "--")).mkdir()
+
+    def brew_calls(self):
+        return self.calls("brew")
+
+
+class BrewInventoryTests(StubBrewTestCase):
+    def test_probes_are_answered_from_one_snapshot(self):
+        self.installed("git", "git-lfs", "raine/claude-history/claude-history")
+        self.installed("font-iosevka", cask=True)
+
+        self.assertTrue(helpers.brew_is_installed("git"))
+        self.assertTrue(helpers.brew_is_installed("git-lfs"))
+        self.assertTrue(helpers.brew_is_installed("font-iosevka"))
+        self.assertTrue(
+            helpers.brew_is_installed("raine/claude-history/claude-history")
+        )
+        self.assertTrue(helpers.brew_is_installed("claude-history"))
+
+        self.assertEqual(
+            self.brew_calls(), ["list --formula -1 --full-name", "list --cask -1"]
+        )
+
+    def test_tap_qualified_name_does_not_match_a_core_formula(self):
+        self.installed("opencode")
+        self.assertFalse(helpers.brew_is_installed("anomalyco/tap/opencode"))
+
+    def test_aliases_fall_back_to_a_single_remembered_probe(self):
+        self.installed("python@3.14")
+        self.assertTrue(helpers.brew_is_installed("python@3"))
+        self.assertTrue(helpers.brew_is_installed("python@3"))
+        self.assertEqual(self.brew_calls().count("list python@3"), 1)
+
+    def test_snapshot_is_persisted_across_processes(self):
+        self.installed("git")
+        self.assertTrue(helpers.brew_is_installed("git"))
+
+        helpers.reset_brew_inventory()
+        self.forget_calls("brew")
+        self.assertTrue(helpers.brew_is_installed("git"))
+        self.assertEqual(self.brew_calls(), [])
+
+    def test_cache_is_invalidated_when_the_cellar_changes(self):
+        self.assertFalse(helpers.brew_is_installed("jq"))
+        # Installed by hand, outside helpers.
+        self.installed("jq")
+        os.utime(self.prefix / "Cellar", ns=(1, 1))
+
+        helpers.reset_brew_inventory()
+        self.assertTrue(helpers.brew_is_installed("jq"))
+
+    def test_install_and_uninstall_update_the_snapshot(self):
+        self.assertTrue(helpers.brew_install("jq"))
+        self.assertTrue(helpers.brew_is_installed("jq"))
+        self.assertTrue(helpers.brew_uninstall("jq"))
+        self.assertFalse(helpers.brew_is_installed("jq"))
+        self.assertEqual(
+            [call for call in self.brew_calls() if call.startswith("list")],
+            ["list --formula -1 --full-name", "list --cask -1"],
+        )
+
+        cache = Path(helpers.XDG_CACHE_HOME_STR) / "dotfiles" / "brew-inventory.json"
+        self.assertEqual(json.loads(cache.read_text())["formulae"], [])
+
+
+def topic(**declarations):
+    return types.SimpleNamespace(**declarations)
+
+
+class BrewBatchTests(StubBrewTestCase):
+    def test_batch_installs_with_one_brew_call(self):
+        self.assertEqual(helpers.brew_install_batch(["jq", "tmux", "jq"]), [])
+        self.assertEqual(
+            [call for call in self.brew_calls() if call.startswith("install")],
+            ["install jq tmux"],
+        )
+        self.assertTrue(helpers.brew_is_installed("tmux"))
+
+    def test_failed_batch_is_retried_per_package(self):
+        self.patch_env(BREW_FAIL="nope")
+        failed = self.quietly(helpers.brew_install_batch, ["jq", "nope", "tmux"])
+        self.assertEqual(failed, ["nope"])
+        self.assertIn("install tmux", self.brew_calls())
+        self.assertIn("install nope", self.brew_calls())
+        self.assertTrue(helpers.brew_is_installed("tmux"))
+
+    def test_plan_installs_each_kind_and_tap_in_one_call(self):
+        self.installed("git")
+        plan = installer.BrewPlan()
+        plan.add("git", topic(BREW_FORMULAE=["git", "git-lfs"], BREW_CASKS=["gcm"]))
+        plan.add("fonts", topic(BREW_CASKS=["font-iosevka", "font-lilex"]))
+        plan.add("jq", topic(BREW_FORMULAE=["jq"]))
+        plan.add("memex", topic(BREW_TAPS=["o/tap"], BREW_FORMULAE=["o/tap/memex"]))
+        plan.add("other", topic(BREW_TAPS=["o/tap"], BREW_FORMULAE=["o/tap/other"]))
+
+        self.assertEqual(self.quietly(installer.install_brew_plan, plan), {})
+        self.assertEqual(
+            [call for call in self.brew_calls() if not call.startswith("list")],
+            [
+                "install git-lfs jq",
+                "install --cask font-iosevka font-lilex gcm",
+                "tap o/tap",
+                "trust --tap o/tap",
+                "install o/tap/memex o/tap/other",
+            ],
+        )
+
+    def test_failures_map_back_to_the_topics_that_need_them(self):
+        self.patch_env(BREW_FAIL="broken")
+        plan = installer.BrewPlan()
+        plan.add("a", topic(BREW_FORMULAE=["jq", "broken"]))
+        plan.add("b", topic(BREW_FORMULAE=["broken"]))
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            failed = installer.install_brew_plan(plan)
+        self.assertEqual(failed, {"broken": ["a", "b"]})
+        self.assertIn("broken (needed by: a, b)", output.getvalue())
+
+        # The topics' own brew_install then fails without running brew again.
+        calls = len(self.brew_calls())
+        self.assertFalse(self.quietly(helpers.brew_install, "broken"))
+        self.assertEqual(len(self.brew_calls()), calls)
+
+    def test_nothing_runs_when_everything_is_installed(self):
+        self.installed("jq")
+        plan = installer.BrewPlan()
+        plan.add("jq", topic(BREW_TAPS=["o/tap"], BREW_FORMULAE=["jq"]))
+        self.quietly(installer.install_brew_plan, plan)
+        self.assertFalse(
+            [call for call in self.brew_calls() if not call.startswith("list")]
+        )
+
+    def test_tap_is_added_once_per_process(self):
+        self.assertTrue(self.quietly(helpers.brew_tap, "o/tap", trust=True))
+        self.assertTrue(self.quietly(helpers.brew_tap, "o/tap", trust=True))
+        self.assertEqual(self.brew_calls(), ["tap o/tap", "trust --tap o/tap"])
+
+
+class BrewPrefetchTests(StubBrewTestCase):
+    def setUp(self):
+        super().setUp()
+        state = tempfile.TemporaryDirectory()
+        self.addCleanup(state.cleanup)
+        self.state_dir = Path(state.name)
+        patcher = mock.patch.object(installer, "state_dir", return_value=self.state_dir)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.patch_env(BREW_LATENCY="0.3")
+
+    def wait(self, prefetch):
+        with contextlib.redirect_stdout(io.StringIO()):
+            prefetch.wait()
+
+    def test_fetches_run_concurrently_and_are_timed(self):
+        packages = [("jq", False), ("tmux", False), ("font-lilex", True), ("gh", False)]
+        start = time.monotonic()
+        prefetch = installer.BrewPrefetch(packages, jobs=4)
+        self.wait(prefetch)
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 4 * 0.3)
+        self.assertEqual(set(prefetch.timings), {"jq", "tmux", "font-lilex", "gh"})
+        for seconds, ok in prefetch.timings.values():
+            self.assertTrue(ok)
+            self.assertGreaterEqual(seconds, 0.3)
+        self.assertIn("fetch --cask font-lilex", self.brew_calls())
+
+        recorded = json.loads((self.state_dir / "brew-fetch.json").read_text())
+        self.assertEqual(recorded["jq"]["ok"], True)
+
+    def test_pool_size_bounds_concurrency(self):
+        packages = [(f"pkg{i}", False) for i in range(4)]
+        start = time.monotonic()
+        self.wait(installer.BrewPrefetch(packages, jobs=1))
+        self.assertGreaterEqual(time.monotonic() - start, 4 * 0.3)
+
+    def test_tap_formulae_are_left_to_brew_install(self):
+        prefetch = installer.BrewPrefetch([("o/tap/memex", False)], jobs=2)
+        self.wait(prefetch)
+        self.assertEqual(prefetch.timings, {})
+        self.assertEqual(self.brew_calls(), [])
+
+    def test_phase_installs_once_after_the_downloads(self):
+        plan = installer.BrewPlan()
+        plan.add("jq", topic(BREW_FORMULAE=["jq"]))
+        plan.add("fonts", topic(BREW_CASKS=["font-lilex"]))
+        phase = installer.BrewPhase(plan, prefetch_jobs=2)
+        self.assertEqual(phase.topics, {"jq", "fonts"})
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            phase.ensure()
+            phase.ensure()
+        calls = [call for call in self.brew_calls() if not call.startswith("list")]
+        self.assertEqual(sorted(calls[:2]), ["fetch --cask font-lilex", "fetch jq"])
+        self.assertEqual(calls[2:], ["install jq", "install --cask font-lilex"])
+
+
+if __name__ == "__main__":
+    unittest.main()
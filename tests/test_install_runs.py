@@ -0,0 +1,151 @@
+"""Tests for topic timings and the per-run records under runs/."""
+
+import contextlib
+import importlib.util
+import io
+import json
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "script"))
+
+import helpers
+import runs
+
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+installer = load_module("dotfiles_installer_runs", REPO_ROOT / "script" / "install.py")
+
+# Spends a little CPU and memory in its own process, then exits with {code}.
+BUSY_TOPIC = """\
+import sys
+
+def main():
+    data = bytearray(64 * 1024 * 1024)
+    total = sum(range(2_000_000))
+    return {code}
+
+if __name__ == "__main__":
+    sys.exit(main())
+"""
+
+
+def record_of(**walls):
+    record = runs.RunRecord(argv=[])
+    for topic, wall in walls.items():
+        record.add(runs.TopicTiming(topic, wall, wall / 2, 2048, 0))
+    return record
+
+
+class RunRecordTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.dir = Path(tmp.name)
+
+    def test_summary_is_slowest_first(self):
+        lines = record_of(git=1.5, claude=12.0, jq=0.2).summary_lines()
+        self.assertEqual(
+            [line.split()[0] for line in lines], ["topic", "claude", "git", "jq"]
+        )
+        self.assertIn("12.0s", lines[1])
+
+    def test_runs_are_saved_and_the_latest_is_found(self):
+        self.assertIsNone(runs.previous_run(self.dir))
+        record_of(git=1.0).save(True, self.dir)
+        path = record_of(git=2.0).save(False, self.dir)
+
+        self.assertEqual(len(list(self.dir.glob("*.json"))), 2)
+        previous = runs.previous_run(self.dir)
+        self.assertEqual(previous, json.loads(path.read_text()))
+        self.assertFalse(previous["ok"])
+        self.assertEqual(previous["topics"][0]["wall"], 2.0)
+
+    def test_compare_marks_regressions_only(self):
+        previous = record_of(git=1.0, claude=10.0, jq=0.1).as_dict(True)
+        lines = record_of(git=1.1, claude=20.0, jq=0.9, zed=3.0).compare_lines(previous)
+
+        self.assertEqual(lines[0], "  zed: 3.0s (new)")
+        self.assertEqual(lines[1], "! claude: 10.0s -> 20.0s (+10.0s)")
+        # jq is 9x slower, but by less than a second: noise.
+        self.assertTrue(all(not line.startswith("!") for line in lines[2:]))
+
+
+class TopicTimingTests(unittest.TestCase):
+    def setUp(self):
+        helpers.set_dry_run(False)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+    def make_topic(self, name, code):
+        script = self.root / name / "install.py"
+        script.parent.mkdir()
+        script.write_text(BUSY_TOPIC.format(code=code))
+        return script
+
+    def run_topics(self, runner_kind, **codes):
+        record = runs.RunRecord(argv=[])
+        runner = installer.TopicRunner(
+            sys.executable, runner_kind, False, buffered=True, record=record
+        )
+        topics = {name: self.make_topic(name, code) for name, code in codes.items()}
+        runner.load(topics)
+        with contextlib.redirect_stdout(io.StringIO()) as out, runner.prepare():
+            results = {topic: runner(topic, script) for topic, script in topics.items()}
+        return record, results, out.getvalue()
+
+    def test_child_processes_are_measured_exactly(self):
+        record, results, output = self.run_topics("subprocess", good=0, bad=3)
+
+        self.assertEqual(results, {"good": True, "bad": False})
+        self.assertRegex(output, r"Installed: good in \d+\.\ds")
+        self.assertRegex(output, r"Failed to install: bad \(exit code 3\) after")
+        good, bad = record.timings["good"], record.timings["bad"]
+        self.assertEqual((good.status, bad.status), (0, 3))
+        self.assertGreater(good.cpu, 0)
+        self.assertGreaterEqual(good.wall, good.cpu * 0.5)
+        self.assertGreaterEqual(good.max_rss, 64 * 1024)
+
+    def test_in_process_topics_are_timed_too(self):
+        record, results, _ = self.run_topics("inprocess", good=0)
+        self.assertTrue(results["good"])
+        timing = record.timings["good"]
+        self.assertEqual(timing.status, 0)
+        self.assertGreater(timing.wall, 0)
+        self.assertGreater(timing.cpu, 0)
+        # RUSAGE_CHILDREN has no per-topic peak, so none is claimed.
+        self.assertIsNone(timing.max_rss)
+        self.assertIsNone(timing.as_dict()["max_rss_kib"])
+        self.assertRegex(record.summary_lines()[1], r"\s-\s+ok$")
+
+    def test_max_rss_is_normalised_to_kib(self):
+        usage = mock.Mock(ru_maxrss=4 * 1024 * 1024)
+        with mock.patch.object(runs.sys, "platform", "darwin"):
+            self.assertEqual(runs.max_rss_kib(usage), 4 * 1024)
+        with mock.patch.object(runs.sys, "platform", "linux"):
+            self.assertEqual(runs.max_rss_kib(usage), 4 * 1024 * 1024)
+
+    def test_report_compares_with_the_previous_run(self):
+        with mock.patch.object(runs, "runs_dir", return_value=self.root / "runs"):
+            out = io.StringIO()
+            with contextlib.redirect_stdout(out):
+                installer.report_run(record_of(git=1.0), True, compare=True)
+                installer.report_run(record_of(git=5.0), True, compare=True)
+        self.assertIn("No previous run to compare with", out.getvalue())
+        self.assertIn("! git: 1.0s -> 5.0s (+4.0s)", out.getvalue())
+        self.assertEqual(len(list((self.root / "runs").glob("*.json"))), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,237 @@
+"""Tests for incremental installs: input digests and topic skipping."""
+
+import ast
+import contextlib
+import importlib.util
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from typing import ClassVar
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "script"))
+
+import helpers
+import state
+
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+installer = load_module("dotfiles_installer_state", REPO_ROOT / "script" / "install.py")
+
+
+class TopicStateTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name) / "repo"
+        for rel, content in {
+            "script/helpers.py": "# helpers\n",
+            "agents/AGENTS.md": "# agents\n",
+            "machines/default.json": "{}\n",
+            "machines/test.json": "{}\n",
+            "git/install.py": "# git\n",
+            "git/config.template": "[user]\n",
+            "zsh/install.py": "# zsh\n",
+        }.items():
+            path = self.root / rel
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(content)
+        self.state_file = Path(tmp.name) / "state" / "install-state.json"
+        env = mock.patch.dict(helpers.os.environ, {helpers.MACHINE_HOSTNAME_ENV: "test"})
+        env.start()
+        self.addCleanup(env.stop)
+
+    def new_state(self):
+        return state.TopicState(self.root, self.state_file)
+
+    def test_recorded_topic_is_current_until_its_inputs_change(self):
+        first = self.new_state()
+        self.assertFalse(first.is_current("git"))
+        first.record("git", True)
+
+        self.assertTrue(self.new_state().is_current("git"))
+
+        (self.root / "git" / "config.template").write_text("[user]\n\tname = x\n")
+        self.assertFalse(self.new_state().is_current("git"))
+
+    def test_shared_inputs_invalidate_every_topic(self):
+        first = self.new_state()
+        first.record("git", True)
+        first.record("zsh", True)
+
+        (self.root / "machines" / "test.json").write_text('{"git": {}}\n')
+        second = self.new_state()
+        self.assertFalse(second.is_current("git"))
+        self.assertFalse(second.is_current("zsh"))
+
+    def test_script_modules_topics_run_through_invalidate_every_topic(self):
+        for rel in ("script/machine_config.py", "script/probe.py", "script/downloads.py"):
+            with self.subTest(rel):
+                (self.root / rel).write_text("# v1\n")
+                first = self.new_state()
+                first.record("git", True)
+                self.assertTrue(self.new_state().is_current("git"))
+
+                (self.root / rel).write_text("# v2\n")
+                self.assertFalse(self.new_state().is_current("git"))
+
+    def test_shared_inputs_cover_every_script_module_topics_import(self):
+        script_modules = {path.stem for path in (REPO_ROOT / "script").glob("*.py")}
+
+        def imported(path):
+            names = set()
+            for node in ast.walk(ast.parse(path.read_text())):
+                if isinstance(node, ast.Import):
+                    names.update(alias.name for alias in node.names)
+                elif isinstance(node, ast.ImportFrom) and node.module:
+                    names.add(node.module)
+            return names & script_modules
+
+        topics = set(REPO_ROOT.glob("*/install.py")) - {REPO_ROOT / "script" / "install.py"}
+        pending = set().union(*(imported(script) for script in topics))
+        needed = set()
+        while pending:
+            name = pending.pop()
+            needed.add(name)
+            pending |= imported(REPO_ROOT / "script" / f"{name}.py") - needed
+        self.assertLessEqual({f"script/{name}.py" for name in needed}, set(state.SHARED_INPUTS))
+
+    def test_failure_forgets_the_previous_success(self):
+        first = self.new_state()
+        first.record("git", True)
+        first.record("git", False)
+        self.assertFalse(self.new_state().is_current("git"))
+
+    def test_bytecode_caches_are_not_inputs(self):
+        first = self.new_state()
+        first.record("git", True)
+        cache = self.root / "git" / "__pycache__" / "install.cpython-311.pyc"
+        cache.parent.mkdir()
+        cache.write_bytes(b"\0")
+        self.assertTrue(self.new_state().is_current("git"))
+
+
+class IncrementalTests(unittest.TestCase):
+    def make(self, current, **kwargs):
+        topic_state = mock.Mock()
+        topic_state.is_current.side_effect = lambda topic: topic in current
+        return installer.Incremental(topic_state, **kwargs)
+
+    def test_unchanged_topic_with_skipped_dependencies_is_skipped(self):
+        incremental = self.make({"mise", "node"})
+        self.assertTrue(incremental.should_skip("mise", []))
+        self.assertTrue(incremental.should_skip("node", ["mise"]))
+
+    def test_dependents_of_a_topic_that_ran_are_run_again(self):
+        incremental = self.make({"node"})
+        self.assertFalse(incremental.should_skip("mise", []))
+        self.assertFalse(incremental.should_skip("node", ["mise"]))
+
+    def test_force_overrides(self):
+        self.assertFalse(self.make({"git"}, force_all=True).should_skip("git", []))
+        forced = self.make({"git", "gh"}, force_topics=["git"])
+        self.assertFalse(forced.should_skip("git", []))
+        self.assertFalse(forced.should_skip("gh", ["git"]))
+
+    def test_without_state_nothing_is_skipped(self):
+        self.assertFalse(installer.Incremental().should_skip("git", []))
+
+    def test_force_topic_accepts_comma_separated_values(self):
+        args = installer.parse_args(["--force-topic", "git, ssh", "--force-topic", "zsh"])
+        self.assertEqual(args.force_topic, ["git", "ssh", "zsh"])
+
+
+class InstallJournalTests(unittest.TestCase):
+    PLAN: ClassVar[list] = ["git", "ssh", "claude", "dock"]
+    DEPENDENCIES: ClassVar[dict] = {
+        "ssh": ["git"], "claude": ["git", "ssh"], "dock": ["git"],
+    }
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "install-journal.json"
+        self.digests = {topic: f"digest-{topic}" for topic in self.PLAN}
+
+    def make(self, **kwargs):
+        topic_state = mock.Mock(shared_digest="shared")
+        topic_state.is_current.return_value = False
+        topic_state.digest.side_effect = self.digests.__getitem__
+        return installer.Incremental(
+            topic_state, journal=state.InstallJournal(self.path), **kwargs
+        )
+
+    def begin(self, incremental, plan=None, resume=False):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            incremental.begin(plan or self.PLAN, self.DEPENDENCIES, resume=resume)
+            return output.getvalue()
+
+    def interrupted_run(self):
+        first = self.make()
+        self.begin(first)
+        first.record("git", True)
+        first.record("ssh", True)
+        first.record("claude", False)
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            first.finish(False)
+        self.assertIn("--resume to continue from claude", output.getvalue())
+
+    def test_resume_skips_only_the_completed_topics(self):
+        self.interrupted_run()
+        second = self.make()
+        output = self.begin(second, resume=True)
+        self.assertIn("2 of 4 topics already completed, continuing from claude", output)
+        self.assertEqual(
+            [topic for topic in self.PLAN if second.resumed(topic)], ["git", "ssh"]
+        )
+
+    def test_topic_whose_inputs_changed_is_run_again(self):
+        self.interrupted_run()
+        self.digests["ssh"] = "edited"
+        second = self.make()
+        self.begin(second, resume=True)
+        self.assertTrue(second.resumed("git"))
+        self.assertFalse(second.resumed("ssh"))
+
+    def test_changed_plan_falls_back_to_a_full_run(self):
+        self.interrupted_run()
+        second = self.make()
+        output = self.begin(second, plan=["git", "ssh", "claude"], resume=True)
+        self.assertIn("running everything instead of resuming", output)
+        self.assertFalse(second.resumed("git"))
+
+    def test_without_resume_or_journal_everything_runs(self):
+        self.interrupted_run()
+        fresh = self.make()
+        self.begin(fresh)
+        self.assertFalse(fresh.resumed("git"))
+
+        self.path.unlink()
+        output = self.begin(self.make(), resume=True)
+        self.assertIn("No interrupted run to resume", output)
+
+    def test_complete_run_removes_the_journal(self):
+        incremental = self.make()
+        self.begin(incremental)
+        self.assertTrue(self.path.exists())
+        incremental.finish(True)
+        self.assertFalse(self.path.exists())
+
+    def test_resume_and_force_are_exclusive(self):
+        with mock.patch("sys.stderr"), self.assertRaises(SystemExit):
+            installer.parse_args(["--resume", "--force"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,9 +1,14 @@
+import contextlib
 import importlib.util
+import io
 import os
 import sys
 import tempfile
+import threading
+import time
 import unittest
 from pathlib import Path
+from typing import ClassVar
 from unittest import mock
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
@@ -149,6 +154,57 @@ class InstallerCoreTests(unittest.TestCase):
 
             self.assertIn('account = "work"', agent_toml.read_text())
 
+    def test_converge_file_writes_only_when_content_differs(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "sub" / "config"
+            self.assertTrue(helpers.converge_file(path, "one\n", mode=0o600))
+            self.assertEqual(path.read_text(), "one\n")
+            self.assertEqual(path.stat().st_mode & 0o777, 0o600)
+
+            os.utime(path, (1_000_000, 1_000_000))
+            with mock.patch.object(helpers, "_replace_file") as replace:
+                self.assertFalse(helpers.converge_file(path, "one\n", mode=0o600))
+            replace.assert_not_called()
+            self.assertEqual(path.stat().st_mtime, 1_000_000)
+
+            # A mode change alone is fixed in place, without a rewrite.
+            inode = path.stat().st_ino
+            with contextlib.redirect_stdout(io.StringIO()):
+                self.assertTrue(helpers.converge_file(path, "one\n", mode=0o640))
+            self.assertEqual(path.stat().st_mode & 0o777, 0o640)
+            self.assertEqual((path.stat().st_ino, path.stat().st_mtime), (inode, 1_000_000))
+
+            # Same size, different bytes; the mode is kept when not given.
+            self.assertTrue(helpers.converge_file(path, "two\n"))
+            self.assertEqual(path.read_text(), "two\n")
+            self.assertEqual(path.stat().st_mode & 0o777, 0o640)
+            self.assertEqual(os.listdir(path.parent), ["config"])
+
+    def test_converge_file_replaces_a_symlink_instead_of_writing_through(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            target = Path(tmp) / "tracked"
+            target.write_text("same\n")
+            path = Path(tmp) / "generated"
+            path.symlink_to(target)
+
+            self.assertTrue(helpers.converge_file(path, "same\n"))
+
+            self.assertFalse(path.is_symlink())
+            self.assertEqual(path.read_text(), "same\n")
+            self.assertEqual(target.read_text(), "same\n")
+
+    def test_converge_file_dry_run_reports_only_real_changes(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "config"
+            path.write_text("current\n")
+            helpers.set_dry_run(True)
+            self.addCleanup(helpers.set_dry_run, False)
+            with contextlib.redirect_stdout(io.StringIO()) as out:
+                self.assertFalse(helpers.converge_file(path, "current\n"))
+                self.assertTrue(helpers.converge_file(path, "changed\n"))
+            self.assertEqual(out.getvalue(), f"[DRY-RUN] would write {path} (8 bytes)\n")
+            self.assertEqual(path.read_text(), "current\n")
+
     def test_commented_toml_table_header_is_updated_in_place(self):
         with tempfile.TemporaryDirectory() as tmp:
             config = Path(tmp) / "config.toml"
@@ -162,6 +218,125 @@ class InstallerCoreTests(unittest.TestCase):
             self.assertEqual(content.count("[settings]"), 1)
             self.assertIn('minimum_release_age = "7d"', content)
 
+    def test_toml_edit_applies_every_key_with_a_single_write(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = Path(tmp) / "config.toml"
+            config.write_text(
+                "# managed by hand\n"
+                "[settings] # tuned\n"
+                'minimum_release_age = "1d"  # old\n'
+                "jobs = 4\n"
+                "\n"
+                "[other]\n"
+                'minimum_release_age = "1d"\n'
+            )
+            with (
+                mock.patch.object(
+                    helpers, "converge_file", wraps=helpers.converge_file
+                ) as write,
+                contextlib.redirect_stdout(io.StringIO()),
+            ):
+                with helpers.toml_edit(config) as doc:
+                    doc.set("settings", "minimum_release_age", "7d")
+                    doc.set("settings", "jobs", 4)
+                    doc.set("settings", "experimental", True)
+                    doc.set("settings", "paranoid", False)
+                    doc.set("new", "key", "value")
+                    doc.set("new", "key", "final")
+                with helpers.toml_edit(config) as doc:
+                    doc.set("settings", "jobs", 4)
+                    doc.set("new", "key", "final")
+
+            self.assertEqual(write.call_count, 1)
+            self.assertEqual(config.read_text(), (
+                "# managed by hand\n"
+                "[settings] # tuned\n"
+                "experimental = true\n"
+                "paranoid = false\n"
+                'minimum_release_age = "7d"\n'
+                "jobs = 4\n"
+                "\n"
+                "[other]\n"
+                'minimum_release_age = "1d"\n'
+                "\n"
+                "[new]\n"
+                'key = "final"\n'
+            ))
+
+    def test_toml_edit_writes_nothing_if_the_block_raises(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = Path(tmp) / "config.toml"
+            with self.assertRaises(ValueError), helpers.toml_edit(config) as doc:
+                doc.set("settings", "jobs", 4)
+                raise ValueError("abandon")
+            self.assertFalse(config.exists())
+
+    def test_ini_edit_keeps_unquoted_values(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = Path(tmp) / ".saml2aws"
+            config.write_text(
+                "[default]\n"
+                "url = https://example.okta.com\n"
+                "provider = Okta\n"
+                "download_browser_driver = true\n"
+            )
+            with contextlib.redirect_stdout(io.StringIO()), helpers.ini_edit(config) as doc:
+                doc.set("default", "provider", "Browser")
+                doc.set("default", "download_browser_driver", "true")
+                doc.set("work", "username", "me@example.com")
+            self.assertEqual(config.read_text(), (
+                "[default]\n"
+                "url = https://example.okta.com\n"
+                "provider = Browser\n"
+                "download_browser_driver = true\n"
+                "\n"
+                "[work]\n"
+                "username = me@example.com\n"
+            ))
+
+    def test_config_edits_read_parse_and_write_the_file_once(self):
+        text = "".join(
+            f"[s{s}]\n# section {s}\n" + "".join(f"k{k} = {k}\n" for k in range(20))
+            for s in range(10)
+        )
+        for edit in (helpers.toml_edit, helpers.ini_edit):
+            with self.subTest(edit=edit.__name__), tempfile.TemporaryDirectory() as tmp:
+                config = Path(tmp) / "config"
+                config.write_text(text)
+                with (
+                    mock.patch.object(
+                        Path, "read_text", autospec=True, side_effect=Path.read_text
+                    ) as read_text,
+                    mock.patch.object(
+                        helpers.tomllib, "loads", side_effect=helpers.tomllib.loads
+                    ) as loads,
+                    mock.patch.object(
+                        helpers.os, "replace", side_effect=os.replace
+                    ) as replace,
+                    mock.patch.object(
+                        helpers._ConfigDocument, "_index", autospec=True,
+                        side_effect=helpers._ConfigDocument._index,
+                    ) as index,
+                    contextlib.redirect_stdout(io.StringIO()),
+                ):
+                    # 200 changed keys, 5 new ones and a new section.
+                    with edit(config) as doc:
+                        for s in range(10):
+                            for k in range(21):
+                                doc.set(f"s{s}", f"k{k}", k + 1)
+                        doc.set("new", "key", 1)
+                    self.assertEqual(read_text.call_count, 1)
+                    self.assertEqual(index.call_count, 1)
+                    self.assertEqual(replace.call_count, 1)
+                    self.assertEqual(loads.call_count, edit is helpers.toml_edit)
+
+                    # Nothing left to change: read once, never written.
+                    with edit(config) as doc:
+                        doc.set("s0", "k0", 1)
+                    self.assertEqual(read_text.call_count, 2)
+                    self.assertEqual(replace.call_count, 1)
+                self.assertIn("k20 = 21\n", config.read_text())
+
     def test_symlink_mappings_expand_all_xdg_directories(self):
         with tempfile.TemporaryDirectory() as tmp:
             topic = Path(tmp)
@@ -186,5 +361,282 @@ class InstallerCoreTests(unittest.TestCase):
             )
 
 
+class TopicGraphTests(unittest.TestCase):
+    DEPENDENCIES: ClassVar[dict] = {
+        "mise": [],
+        "node": ["mise"],
+        "claude": ["node"],
+        "fonts": [],
+        "zed": [],
+    }
+    ORDER: ClassVar[list] = ["fonts", "mise", "node", "claude", "zed"]
+
+    def test_topics_start_only_after_their_dependencies_finish(self):
+        finished = []
+        lock = threading.Lock()
+
+        def run_one(topic):
+            for dep in self.DEPENDENCIES[topic]:
+                self.assertIn(dep, finished)
+            time.sleep(0.01)
+            with lock:
+                finished.append(topic)
+            return True
+
+        self.assertTrue(
+            installer.run_topic_graph(self.ORDER, self.DEPENDENCIES, run_one, jobs=3)
+        )
+        self.assertEqual(sorted(finished), sorted(self.ORDER))
+
+    def test_independent_topics_overlap_up_to_the_job_limit(self):
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def run_one(topic):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(0.05)
+            with lock:
+                active -= 1
+            return True
+
+        order = [f"topic{i}" for i in range(6)]
+        installer.run_topic_graph(order, {}, run_one, jobs=3)
+        self.assertEqual(peak, 3)
+
+    def test_failure_stops_dependents_and_new_topics(self):
+        started = []
+
+        def run_one(topic):
+            started.append(topic)
+            return topic != "mise"
+
+        ok = installer.run_topic_graph(
+            ["mise", "node", "claude"], self.DEPENDENCIES, run_one, jobs=1
+        )
+        self.assertFalse(ok)
+        self.assertEqual(started, ["mise"])
+
+    def test_keep_going_skips_only_the_dependents_of_a_failure(self):
+        started = []
+
+        def run_one(topic):
+            started.append(topic)
+            return topic != "mise"
+
+        ok = installer.run_topic_graph(
+            self.ORDER, self.DEPENDENCIES, run_one, jobs=2, keep_going=True
+        )
+        self.assertFalse(ok)
+        self.assertEqual(sorted(started), ["fonts", "mise", "zed"])
+
+    def test_failure_tree_shows_what_each_failure_held_up(self):
+        dependencies = dict(self.DEPENDENCIES, codex=["node"], agents=["claude"])
+        self.assertEqual(
+            installer.failure_tree({"mise", "fonts"}, dependencies),
+            [
+                "fonts (failed)",
+                "mise (failed)",
+                "└── node (skipped)",
+                "    ├── claude (skipped)",
+                "    │   └── agents (skipped)",
+                "    └── codex (skipped)",
+            ],
+        )
+
+    def test_jobs_must_be_positive(self):
+        with mock.patch("sys.stderr"), self.assertRaises(SystemExit):
+            installer.parse_args(["--jobs", "0"])
+        self.assertEqual(installer.parse_args(["-j", "2"]).jobs, 2)
+
+
+class TopicSelectionTests(unittest.TestCase):
+    DEPENDENCIES: ClassVar[dict] = {
+        "git": [],
+        "mise": [],
+        "node": ["mise"],
+        "ssh": ["git"],
+        "claude": ["git", "ssh", "node"],
+        "codex": ["node"],
+        "fonts": [],
+        "dock": ["claude", "codex", "fonts", "git", "mise", "node", "ssh"],
+    }
+
+    def select(self, *args, **kwargs):
+        with contextlib.redirect_stdout(io.StringIO()):
+            return installer.select_topics(self.DEPENDENCIES, *args, **kwargs)
+
+    def test_only_adds_the_transitive_dependencies(self):
+        self.assertEqual(
+            self.select(only=["claude"]), {"claude", "git", "ssh", "node", "mise"}
+        )
+
+    def test_no_deps_runs_just_the_named_topics(self):
+        self.assertEqual(
+            self.select(only=["claude", "codex"], no_deps=True), {"claude", "codex"}
+        )
+
+    def test_skip_prunes_the_transitive_dependents(self):
+        self.assertEqual(self.select(skip=["mise"]), {"git", "ssh", "fonts"})
+        self.assertEqual(
+            self.select(only=["codex", "ssh"], skip=["git"]),
+            {"codex", "node", "mise"},
+        )
+
+    def test_unknown_topic_is_rejected(self):
+        self.assertIsNone(self.select(only=["claud"]))
+        self.assertIsNone(self.select(skip=["nope"]))
+
+    def test_arguments_are_comma_separated_and_no_deps_needs_only(self):
+        args = installer.parse_args(["--only", "claude,codex", "--skip", "ssh"])
+        self.assertEqual(args.only, ["claude", "codex"])
+        self.assertEqual(args.skip, ["ssh"])
+        with mock.patch("sys.stderr"), self.assertRaises(SystemExit):
+            installer.parse_args(["--no-deps"])
+
+
+TOPIC_SCRIPT = """\
+import sys
+from pathlib import Path
+
+sys.path.insert(0, {script_dir!r})
+from helpers import is_dry_run, parse_dry_run, run_cmd, set_dry_run
+
+def main():
+    parse_dry_run()
+    print("dry-run:", is_dry_run(), "argv:", sys.argv[1:])
+    run_cmd([sys.executable, "-c", "print('from child')"])
+    set_dry_run(True)
+    return {code}
+{extra}
+
+if __name__ == "__main__":
+    sys.exit(main())
+"""
+
+
+class InProcessRunnerTests(unittest.TestCase):
+    def setUp(self):
+        helpers.set_dry_run(False)
+        self.addCleanup(helpers.set_dry_run, False)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+
+    def make_topic(self, name, code=0, extra=""):
+        script = self.root / name / "install.py"
+        script.parent.mkdir()
+        script.write_text(
+            TOPIC_SCRIPT.format(
+                script_dir=str(REPO_ROOT / "script"), code=code, extra=extra
+            )
+        )
+        return script
+
+    def run_buffered(self, runner, topics):
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), runner.prepare():
+            results = {topic: runner(topic, script) for topic, script in topics.items()}
+        return results, out.getvalue()
+
+    def test_load_topic_module_restores_sys_path(self):
+        before = list(sys.path)
+        module = installer.load_topic_module("agents", REPO_ROOT / "agents" / "install.py")
+        self.assertTrue(callable(module.main))
+        self.assertEqual(sys.path, before)
+
+    def test_symlinking_topics_are_declared_and_not_imported(self):
+        topics = {
+            "plain": self.make_topic("plain"),
+            "conditional": self.make_topic(
+                "conditional", extra="from helpers import install_symlinks"
+            ),
+            "linking": self.make_topic(
+                "linking", extra="LINK_SYMLINKS = True\nraise SystemExit(1)"
+            ),
+            "broken": self.make_topic("broken", extra="LINK_SYMLINKS = ("),
+        }
+        with mock.patch.object(installer, "load_topic_module") as load:
+            self.assertEqual(installer.symlinking_topics(topics), {"linking"})
+        load.assert_not_called()
+
+    def test_in_process_topics_get_isolated_dry_run_state_and_output(self):
+        topics = {"first": self.make_topic("first"), "second": self.make_topic("second")}
+        runner = installer.TopicRunner(sys.executable, "inprocess", False, buffered=True)
+        runner.load(topics)
+        self.assertEqual(set(runner.modules), {"first", "second"})
+
+        results, output = self.run_buffered(runner, topics)
+
+        self.assertEqual(results, {"first": True, "second": True})
+        # The first topic switching dry-run on must not leak into the second.
+        self.assertEqual(output.count("dry-run: False argv: []"), 2)
+        # Child output is kept inside the topic's block, not written past it.
+        self.assertEqual(output.count("from child"), 2)
+        self.assertLess(output.index("Output from: first"), output.index("from child"))
+        self.assertFalse(helpers.is_dry_run())
+
+    def test_in_process_failure_and_crash_are_reported(self):
+        topics = {
+            "fails": self.make_topic("fails", code=1),
+            "exits": self.make_topic("exits", extra="main = lambda: sys.exit(3)"),
+        }
+        runner = installer.TopicRunner(sys.executable, "inprocess", True, buffered=True)
+        runner.load(topics)
+
+        results, output = self.run_buffered(runner, topics)
+
+        self.assertEqual(results, {"fails": False, "exits": False})
+        self.assertIn("Failed to install: exits (exit code 3)", output)
+
+    def test_opted_out_topic_runs_as_subprocess(self):
+        topics = {"legacy": self.make_topic("legacy", extra="RUN_IN_PROCESS = False")}
+        runner = installer.TopicRunner(sys.executable, "inprocess", True, buffered=True)
+        runner.load(topics)
+        self.assertEqual(runner.modules, {})
+
+        results, output = self.run_buffered(runner, topics)
+
+        self.assertEqual(results, {"legacy": True})
+        self.assertIn("dry-run: True argv: ['--dry-run']", output)
+
+    def test_plan_collects_typed_actions_per_topic(self):
+        topics = {"first": self.make_topic("first"), "second": self.make_topic("second")}
+        runner = installer.TopicRunner(sys.executable, "inprocess", True, buffered=True)
+        runner.load(topics)
+        collector = helpers.PlanCollector()
+        helpers.set_plan_collector(collector)
+        self.addCleanup(helpers.set_plan_collector, None)
+
+        helpers.dry("installer note")
+        results, output = self.run_buffered(runner, topics)
+        document = installer.plan_document(
+            collector, ["first", "second"], {"second"}, False
+        )
+
+        self.assertEqual(results, {"first": True, "second": True})
+        self.assertIn("[DRY-RUN] would run:", output)
+        self.assertEqual(
+            document["installer"], [{"kind": "note", "message": "installer note"}]
+        )
+        self.assertEqual(
+            [(t["topic"], t["ok"]) for t in document["topics"]],
+            [("first", True), ("second", False)],
+        )
+        [action] = document["topics"][0]["actions"]
+        self.assertEqual(action["kind"], "run")
+        self.assertEqual(action["cmd"][1:], ["-c", "print('from child')"])
+
+    def test_plan_implies_an_in_process_dry_run(self):
+        args = installer.parse_args(["--plan=json", "--runner", "subprocess"])
+        self.assertTrue(args.dry_run)
+        self.assertEqual(args.runner, "inprocess")
+        with mock.patch("sys.stderr"), self.assertRaises(SystemExit):
+            installer.parse_args(["--plan=yaml"])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -10,6 +10,7 @@ exposure.
 
 import importlib.util
 import json
+import os
 import subprocess
 import sys
 import tempfile
@@ -21,6 +22,7 @@ REPO_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(REPO_ROOT / "script"))
 
 import helpers
+import machine_config
 
 
 def load_module(name, path):
@@ -60,6 +62,11 @@ class GetMachineConfigTests(unittest.TestCase):
         helpers.set_dry_run(False)
         _reset_machine_cache()
         self.addCleanup(_reset_machine_cache)
+        cache_home = tempfile.TemporaryDirectory()
+        self.addCleanup(cache_home.cleanup)
+        patcher = mock.patch.object(helpers, "XDG_CACHE_HOME_STR", cache_home.name)
+        patcher.start()
+        self.addCleanup(patcher.stop)
 
     def test_missing_host_file_exits_nonzero_with_clear_message(self):
         with tempfile.TemporaryDirectory() as tmp:
@@ -141,6 +148,77 @@ class GetMachineConfigTests(unittest.TestCase):
             self.assertIs(first, second)
 
 
+class MachineConfigCacheTests(unittest.TestCase):
+    """The merged config cache must never outlive the files it came from."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name) / "dotfiles"
+        self.cache_dir = Path(tmp.name) / "cache"
+        self.default = self.root / "machines" / "default.json"
+        self.host = self.root / "machines" / "known-laptop.json"
+        _write_json(self.default, {"git": {"user": {"name": "Default"}}})
+        _write_json(self.host, {"git": {"user": {"email": "a@example.com"}}})
+
+    def load(self, root=None, hostname="known-laptop"):
+        config, _ = machine_config.load(root or self.root, hostname, self.cache_dir)
+        return config
+
+    def email(self, **kwargs):
+        return self.load(**kwargs)["git"]["user"]["email"]
+
+    def test_fresh_cache_is_served_without_merging(self):
+        self.assertEqual(self.email(), "a@example.com")
+        with mock.patch.object(machine_config, "deep_merge") as merge:
+            self.assertEqual(
+                self.load(), {"git": {"user": {"name": "Default", "email": "a@example.com"}}}
+            )
+        merge.assert_not_called()
+
+    def test_stale_cache_is_never_served(self):
+        self.assertEqual(self.email(), "a@example.com")
+        # Same size, and the mtime put back: the ctime still gives it away.
+        stat = self.host.stat()
+        _write_json(self.host, {"git": {"user": {"email": "b@example.com"}}})
+        os.utime(self.host, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+        self.assertEqual(self.email(), "b@example.com")
+
+        _write_json(self.default, {"git": {"user": {"name": "Changed"}}})
+        self.assertEqual(self.load()["git"]["user"]["name"], "Changed")
+
+        other_root = self.root.parent / "other"
+        _write_json(other_root / "machines" / "default.json", {})
+        _write_json(
+            other_root / "machines" / "known-laptop.json",
+            {"git": {"user": {"email": "c@example.com"}}},
+        )
+        self.assertEqual(self.email(root=other_root), "c@example.com")
+
+    def test_unenrolled_host_fails_even_with_a_cache(self):
+        self.load()
+        self.host.unlink()
+        with self.assertRaises(machine_config.UnenrolledMachine):
+            self.load()
+        with self.assertRaises(machine_config.UnenrolledMachine):
+            self.load(hostname="unknown-laptop")
+
+    def test_dry_run_does_not_write_the_cache(self):
+        helpers.set_dry_run(True)
+        self.addCleanup(helpers.set_dry_run, False)
+        _reset_machine_cache()
+        self.addCleanup(_reset_machine_cache)
+        with (
+            mock.patch.object(helpers, "DOTFILES_ROOT", self.root),
+            mock.patch.object(helpers, "XDG_CACHE_HOME_STR", str(self.cache_dir)),
+            mock.patch.dict(
+                helpers.os.environ, {helpers.MACHINE_HOSTNAME_ENV: "known-laptop"}
+            ),
+        ):
+            helpers.get_machine_config()
+        self.assertFalse(self.cache_dir.exists())
+
+
 class GitInstallerEnrollmentTests(unittest.TestCase):
     """git/install.py must check enrollment before touching any files."""
 
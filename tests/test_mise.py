@@ -0,0 +1,153 @@
+"""Tests for the batched `mise use` helpers, run against a stub `mise` on PATH."""
+
+import contextlib
+import io
+import os
+import sys
+import types
+import unittest
+from pathlib import Path
+from typing import ClassVar
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "script"))
+
+import helpers
+from stubs import StubToolTestCase, load_module
+
+installer = load_module("dotfiles_main_installer", REPO_ROOT / "script" / "install.py")
+
+# Like `mise use -g`, pins each spec in the [tools] table of
+# $MISE_GLOBAL_CONFIG_FILE.
+STUB_MISE = """\
+import os, tomllib
+from pathlib import Path
+
+config = Path(os.environ["MISE_GLOBAL_CONFIG_FILE"])
+
+if args[:2] == ["use", "-g"]:
+    specs = [a for a in args[2:] if not a.startswith("-") and not a.isdigit()]
+    if any(s in os.environ.get("MISE_FAIL", "").split() for s in specs):
+        print("mise ERROR failed to install", file=sys.stderr)
+        sys.exit(1)
+    tools = tomllib.loads(config.read_text()).get("tools", {}) if config.exists() else {}
+    for spec in specs:
+        name, _, version = spec.partition("@")
+        tools[name] = version or "latest"
+    lines = ["[tools]"] + [f'{k} = "{v}"' for k, v in tools.items()]
+    config.write_text("\\n".join(lines) + "\\n")
+"""
+
+
+def topic(**declarations):
+    return types.SimpleNamespace(**declarations)
+
+
+class StubMiseTestCase(StubToolTestCase):
+    """Puts a stub mise first on PATH with its own global config."""
+
+    STUBS: ClassVar[dict] = {"mise": STUB_MISE}
+
+    def setUp(self):
+        super().setUp()
+        self.config = self.root / "config.toml"
+        self.patch_env(
+            MISE_GLOBAL_CONFIG_FILE=str(self.config),
+            MISE_FAIL="",
+            **{helpers.MISE_FAILED_ENV: ""},
+        )
+
+    def mise_calls(self):
+        return self.calls("mise")
+
+
+class MisePinnedTests(StubMiseTestCase):
+    def test_specs_are_matched_against_the_tools_table(self):
+        self.config.write_text(
+            '[settings]\nminimum_release_age = "7d"\n\n'
+            '[tools]\nnode = "24"\nfnox = "latest"\n'
+            'python = ["3.13", "3.14"]\njava = { version = "temurin-21" }\n'
+        )
+        for spec in ("node@24", "fnox", "python@3.14", "java@temurin-21"):
+            self.assertTrue(helpers.mise_is_pinned(spec), spec)
+        for spec in ("node@22", "go@1.26", "python@3.12", "rust@latest"):
+            self.assertFalse(helpers.mise_is_pinned(spec), spec)
+
+    def test_missing_or_broken_config_pins_nothing(self):
+        self.assertFalse(helpers.mise_is_pinned("node@24"))
+        self.config.write_text("[tools\n")
+        self.assertFalse(helpers.mise_is_pinned("node@24"))
+
+    def test_mise_use_skips_pinned_tools(self):
+        self.config.write_text('[tools]\nnode = "24"\n')
+        self.assertTrue(self.quietly(helpers.mise_use, "node@24"))
+        self.assertEqual(self.mise_calls(), [])
+
+
+class MiseBatchTests(StubMiseTestCase):
+    def test_batch_pins_only_missing_tools_with_one_call(self):
+        self.config.write_text('[tools]\nnode = "24"\n')
+        failed = self.quietly(
+            helpers.mise_use_batch, ["node@24", "go@1.26", "fnox", "go@1.26"]
+        )
+        self.assertEqual(failed, [])
+        self.assertEqual(
+            self.mise_calls(), [f"use -g --jobs {helpers.MISE_JOBS} go@1.26 fnox"]
+        )
+        self.assertTrue(helpers.mise_is_pinned("fnox"))
+
+    def test_nothing_runs_when_everything_is_pinned(self):
+        self.config.write_text('[tools]\nnode = "24"\nrust = "latest"\n')
+        self.assertEqual(helpers.mise_use_batch(["node@24", "rust@latest"]), [])
+        self.assertEqual(self.mise_calls(), [])
+
+    def test_failed_batch_is_retried_per_tool(self):
+        os.environ["MISE_FAIL"] = "ruby@3.4"
+        failed = self.quietly(helpers.mise_use_batch, ["go@1.26", "ruby@3.4"])
+        self.assertEqual(failed, ["ruby@3.4"])
+        self.assertEqual(
+            self.mise_calls()[1:], ["use -g go@1.26", "use -g ruby@3.4"]
+        )
+        self.assertTrue(helpers.mise_is_pinned("go@1.26"))
+
+    def test_failures_map_back_to_the_topics_that_need_them(self):
+        os.environ["MISE_FAIL"] = "ruby@3.4"
+        plan = installer.MisePlan()
+        plan.add("go", topic(MISE_TOOLS=["go@1.26"]))
+        plan.add("ruby", topic(MISE_TOOLS=["ruby@3.4"]))
+        plan.add("npm", topic(NPM_PACKAGES=["ccusage"]))
+        self.assertEqual(plan.topics(), {"go", "ruby"})
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            failed = installer.install_mise_plan(plan)
+        self.assertEqual(failed, {"ruby@3.4": ["ruby"]})
+        self.assertIn("ruby@3.4 (needed by: ruby)", output.getvalue())
+
+        # Each topic's own mise_use reports its tool without running mise.
+        calls = len(self.mise_calls())
+        self.assertTrue(self.quietly(helpers.mise_use, "go@1.26"))
+        self.assertFalse(self.quietly(helpers.mise_use, "ruby@3.4"))
+        self.assertEqual(len(self.mise_calls()), calls)
+
+    def test_phase_installs_no_tool_before_its_topics_dependencies(self):
+        plan = installer.MisePlan()
+        plan.add("node", topic(MISE_TOOLS=["node@24"]))
+        plan.add("rust", topic(MISE_TOOLS=["rust@latest"]))
+        plan.add("fnox", topic(MISE_TOOLS=["fnox"]))
+        dependencies = {"node": ["mise"], "rust": ["mise"], "fnox": ["rust"]}
+        phase = installer.BatchPhase(plan, installer.install_mise_plan, dependencies)
+        phase.succeeded("mise")
+
+        self.quietly(phase.ensure, "node")
+        self.assertEqual(self.mise_calls(), ["use -g --jobs 16 node@24 rust@latest"])
+        self.quietly(phase.ensure, "rust")
+        self.assertEqual(len(self.mise_calls()), 1)
+
+        phase.succeeded("rust")
+        self.quietly(phase.ensure, "fnox")
+        self.assertEqual(self.mise_calls()[1:], ["use -g --jobs 16 fnox"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,160 @@
+"""Tests for the batched npm helpers, run against a stub `npm` on PATH."""
+
+import contextlib
+import io
+import os
+import sys
+import types
+import unittest
+from pathlib import Path
+from typing import ClassVar
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "script"))
+
+import helpers
+from stubs import StubToolTestCase, load_module
+
+installer = load_module("dotfiles_main_installer", REPO_ROOT / "script" / "install.py")
+
+# Keeps the global packages as empty directories under $NPM_ROOT (scoped
+# ones as @scope--name).
+STUB_NPM = """\
+import json, os
+from pathlib import Path
+
+root = Path(os.environ["NPM_ROOT"])
+
+if args[:2] == ["ls", "-g"]:
+    deps = {p.name.replace("--", "/"): {"version": "1.0.0"} for p in root.iterdir()}
+    print(json.dumps({"name": "lib", "dependencies": deps}))
+elif args[:2] == ["install", "-g"]:
+    names = args[2:]
+    for name in names:
+        if name in os.environ.get("NPM_FAIL", "").split():
+            print(f"npm error 404 Not Found - GET {name}")
+            sys.exit(1)
+    for name in names:
+        (root / name.replace("/", "--")).mkdir(exist_ok=True)
+"""
+
+
+def topic(**declarations):
+    return types.SimpleNamespace(**declarations)
+
+
+class StubNpmTestCase(StubToolTestCase):
+    """Puts a stub npm first on PATH with its own global package root."""
+
+    STUBS: ClassVar[dict] = {"npm": STUB_NPM}
+
+    def setUp(self):
+        super().setUp()
+        self.npm_root = self.root / "lib" / "node_modules"
+        self.npm_root.mkdir(parents=True)
+        self.patch_env(
+            NPM_ROOT=str(self.npm_root), NPM_FAIL="", **{helpers.NPM_FAILED_ENV: ""}
+        )
+        helpers.reset_npm_inventory()
+        self.addCleanup(helpers.reset_npm_inventory)
+
+    def installed(self, *names):
+        for name in names:
+            (self.npm_root / name.replace("/", "--")).mkdir()
+
+    def npm_calls(self):
+        return self.calls("npm")
+
+
+class NpmInventoryTests(StubNpmTestCase):
+    def test_probes_are_answered_from_one_listing(self):
+        self.installed("ccusage", "@google/gemini-cli")
+
+        self.assertTrue(helpers.npm_is_installed("ccusage"))
+        self.assertTrue(helpers.npm_is_installed("@google/gemini-cli"))
+        self.assertFalse(helpers.npm_is_installed("agent-browser"))
+        self.assertEqual(self.npm_calls(), ["ls -g --depth=0 --json"])
+
+    def test_installs_update_the_inventory(self):
+        self.assertFalse(helpers.npm_is_installed("ccusage"))
+        self.assertTrue(self.quietly(helpers.npm_install_global, "ccusage"))
+        self.assertTrue(helpers.npm_is_installed("ccusage"))
+        self.assertEqual(
+            self.npm_calls(), ["ls -g --depth=0 --json", "install -g ccusage"]
+        )
+
+    def test_dry_run_reports_absent_without_running_npm(self):
+        helpers.set_dry_run(True)
+        self.addCleanup(helpers.set_dry_run, False)
+        self.installed("ccusage")
+        self.assertFalse(self.quietly(helpers.npm_is_installed, "ccusage"))
+        self.assertEqual(self.quietly(helpers.npm_install_batch, ["ccusage"]), [])
+        self.assertEqual(self.npm_calls(), [])
+
+
+class NpmBatchTests(StubNpmTestCase):
+    def test_batch_installs_with_one_npm_call(self):
+        failed = self.quietly(helpers.npm_install_batch, ["ccusage", "openspec", "ccusage"])
+        self.assertEqual(failed, [])
+        self.assertEqual(self.npm_calls(), ["install -g ccusage openspec"])
+        self.assertTrue(helpers.npm_is_installed("openspec"))
+
+    def test_failed_batch_is_retried_per_package(self):
+        os.environ["NPM_FAIL"] = "nope"
+        failed = self.quietly(helpers.npm_install_batch, ["ccusage", "nope", "openspec"])
+        self.assertEqual(failed, ["nope"])
+        self.assertEqual(
+            self.npm_calls(),
+            [
+                "install -g ccusage nope openspec",
+                "ls -g --depth=0 --json",
+                "install -g ccusage",
+                "install -g nope",
+                "install -g openspec",
+            ],
+        )
+
+    def test_plan_installs_only_what_is_missing_in_one_call(self):
+        self.installed("ccusage")
+        plan = installer.NpmPlan()
+        plan.add("claude", topic(NPM_PACKAGES=["ccusage"]))
+        plan.add("gemini", topic(NPM_PACKAGES=["@google/gemini-cli"]))
+        plan.add("agents", topic(NPM_PACKAGES=["agent-browser"]))
+        plan.add("git", topic(BREW_FORMULAE=["git"]))
+        self.assertEqual(plan.topics(), {"claude", "gemini", "agents"})
+
+        self.assertEqual(self.quietly(installer.install_npm_plan, plan), {})
+        self.assertEqual(
+            self.npm_calls(),
+            ["ls -g --depth=0 --json", "install -g @google/gemini-cli agent-browser"],
+        )
+
+    def test_failures_map_back_to_the_topics_that_need_them(self):
+        os.environ["NPM_FAIL"] = "broken"
+        plan = installer.NpmPlan()
+        plan.add("a", topic(NPM_PACKAGES=["ccusage", "broken"]))
+        plan.add("b", topic(NPM_PACKAGES=["broken"]))
+
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output), contextlib.redirect_stderr(output):
+            failed = installer.install_npm_plan(plan)
+        self.assertEqual(failed, {"broken": ["a", "b"]})
+        self.assertIn("broken (needed by: a, b)", output.getvalue())
+
+        # The topics' own npm_install_global then fails without running npm.
+        calls = len(self.npm_calls())
+        with contextlib.redirect_stderr(io.StringIO()):
+            self.assertFalse(self.quietly(helpers.npm_install_global, "broken"))
+        self.assertEqual(len(self.npm_calls()), calls)
+
+    def test_phase_installs_once(self):
+        plan = installer.NpmPlan()
+        plan.add("claude", topic(NPM_PACKAGES=["ccusage"]))
+        phase = installer.BatchPhase(plan, installer.install_npm_plan)
+        self.quietly(phase.ensure, "claude")
+        self.quietly(phase.ensure, "claude")
+        self.assertEqual(self.npm_calls().count("install -g ccusage"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,98 @@
+"""Tests for the memoized executable and app probes."""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "script"))
+
+import helpers
+import probe
+
+
+class SystemProbeTests(unittest.TestCase):
+    def setUp(self):
+        helpers.set_dry_run(False)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name)
+        self.first = self.make_dir("first")
+        self.second = self.make_dir("second")
+        path = os.pathsep.join([str(self.first), str(self.second)])
+        patcher = mock.patch.dict(os.environ, {"PATH": path})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        probe.invalidate()
+        self.addCleanup(probe.invalidate)
+
+    def make_dir(self, name):
+        directory = self.root / name
+        directory.mkdir()
+        return directory
+
+    def make_tool(self, directory, name, mode=0o755):
+        tool = directory / name
+        tool.write_text("#!/bin/sh\n")
+        tool.chmod(mode)
+        return tool
+
+    def test_first_executable_on_path_wins(self):
+        self.make_tool(self.first, "tool", mode=0o644)
+        self.make_tool(self.second, "tool")
+        self.make_tool(self.first, "other")
+
+        self.assertEqual(probe.which("tool"), str(self.second / "tool"))
+        self.assertEqual(probe.which("other"), str(self.first / "other"))
+        self.assertIsNone(probe.which("missing"))
+
+    def test_each_directory_is_listed_once_until_invalidated(self):
+        self.make_tool(self.second, "mise")
+        with mock.patch.object(probe.os, "listdir", wraps=os.listdir) as listdir:
+            for _ in range(3):
+                self.assertTrue(helpers.command_exists("mise"))
+                self.assertFalse(helpers.command_exists("npm"))
+        self.assertEqual(listdir.call_count, 2)
+
+        self.make_tool(self.first, "npm")
+        self.assertFalse(helpers.command_exists("npm"))
+        probe.invalidate()
+        self.assertTrue(helpers.command_exists("npm"))
+
+    def test_a_new_path_is_searched_afresh(self):
+        self.make_tool(self.second, "op")
+        self.assertTrue(helpers.command_exists("op"))
+        with mock.patch.dict(os.environ, {"PATH": str(self.first)}):
+            self.assertFalse(helpers.command_exists("op"))
+
+    def test_probes_do_not_fork(self):
+        self.make_tool(self.first, "herdr")
+        with mock.patch.object(helpers.subprocess, "run") as run:
+            self.assertTrue(helpers.command_exists("herdr"))
+        run.assert_not_called()
+
+    def test_commands_run_through_helpers_invalidate_the_cache(self):
+        self.assertFalse(helpers.command_exists("installed"))
+        target = self.first / "installed"
+        helpers.run_cmd(
+            [sys.executable, "-c",
+             f"import os; open({str(target)!r}, 'w').close(); os.chmod({str(target)!r}, 0o755)"],
+            capture_output=True,
+        )
+        self.assertTrue(helpers.command_exists("installed"))
+
+    def test_app_bundles_are_listed_once(self):
+        applications = self.make_dir("Applications")
+        (applications / "Zed.app").mkdir()
+        apps = probe.SystemProbe(str(applications))
+        with mock.patch.object(probe.os, "listdir", wraps=os.listdir) as listdir:
+            self.assertTrue(apps.app_exists("Zed"))
+            self.assertFalse(apps.app_exists("Ghostty"))
+        self.assertEqual(listdir.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,6 +10,7 @@ to another machine's credential.
 import os
 import subprocess
 import sys
+import tempfile
 import unittest
 from pathlib import Path
 from unittest import mock
@@ -122,18 +123,78 @@ class ProviderCredentialCliTests(unittest.TestCase):
 
     def test_unknown_provider_exits_nonzero_with_no_stdout(self):
         script = REPO_ROOT / "script" / "provider_credential.py"
-        env = {**os.environ, "DOTFILES_MACHINE_HOSTNAME": "paddo"}
-        result = subprocess.run(
-            [sys.executable, str(script), "totally-unsupported-provider"],
-            capture_output=True,
-            text=True,
-            check=False,
-            env=env,
-        )
+        with tempfile.TemporaryDirectory() as cache_home:
+            env = {
+                **os.environ,
+                "DOTFILES_MACHINE_HOSTNAME": "paddo",
+                "XDG_CACHE_HOME": cache_home,
+            }
+            result = subprocess.run(
+                [sys.executable, str(script), "totally-unsupported-provider"],
+                capture_output=True,
+                text=True,
+                check=False,
+                env=env,
+            )
         self.assertNotEqual(result.returncode, 0)
         self.assertEqual(result.stdout, "")
         self.assertIn("totally-unsupported-provider", result.stderr)
 
 
+def _imported_modules(*args):
+    """Return the modules ``python -X importtime`` reports for args."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args],
+        capture_output=True,
+        text=True,
+        check=False,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    modules = set()
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or line.count("|") != 2:
+            continue
+        _, cumulative, name = line.split("|")
+        if cumulative.strip().isdigit():
+            modules.add(name.strip())
+    return modules
+
+
+class ProviderCredentialImportTests(unittest.TestCase):
+    """codex()/opencode() wait for provider_credential.py on every launch."""
+
+    # How many modules it may import beyond what ``python -c pass`` does.
+    # ``json`` (which brings ``re``) and the two script modules are about 25;
+    # ``subprocess`` or ``urllib.request`` on top would not fit.
+    MODULE_BUDGET = 30
+
+    # What importing helpers used to pull in, for well over 50ms.
+    HEAVY_MODULES = frozenset({
+        "agents.shared",
+        "argparse",
+        "datetime",
+        "helpers",
+        "pathlib",
+        "probe",
+        "shlex",
+        "shutil",
+        "socket",
+        "subprocess",
+        "tomllib",
+    })
+
+    def test_cold_start_stays_within_its_import_budget(self):
+        script = REPO_ROOT / "script" / "provider_credential.py"
+        baseline = _imported_modules("-c", "pass")
+        with tempfile.TemporaryDirectory() as cache_home:
+            env = {"DOTFILES_MACHINE_HOSTNAME": "paddo", "XDG_CACHE_HOME": cache_home}
+            with mock.patch.dict(os.environ, env):
+                imported = _imported_modules(str(script), "litellm") - baseline
+
+        self.assertIn("machine_config", imported)
+        self.assertEqual(imported & self.HEAVY_MODULES, set())
+        self.assertLessEqual(len(imported), self.MODULE_BUDGET, sorted(imported))
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,178 @@
+"""Tests for the in-memory secret broker, run against a fake `op` on PATH."""
+
+import os
+import stat
+import subprocess
+import sys
+import threading
+import unittest
+from pathlib import Path
+from typing import ClassVar
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "script"))
+
+import secret_broker
+import secret_client
+from stubs import StubToolTestCase
+
+ACCOUNT = "schubergphilis"
+REF = "op://Employee/litellm-pat/token"
+
+# Prints a secret derived from the account and reference, or fails if
+# $OP_FAIL is set.
+FAKE_OP = """\
+import os
+
+if os.environ.get("OP_FAIL"):
+    print("[ERROR] not signed in", file=sys.stderr)
+    sys.exit(1)
+print(f"secret-{os.environ['OP_ACCOUNT']}-{args[1].rsplit('/', 1)[-1]}")
+"""
+
+SECRET = f"secret-{ACCOUNT}-token"
+
+
+class FakeOpTestCase(StubToolTestCase):
+    STUBS: ClassVar[dict] = {"op": FAKE_OP}
+
+    def setUp(self):
+        super().setUp()
+        self.log = self.logs["op"]
+        self.runtime = self.root / "run"
+        self.runtime.mkdir()
+        # The broker reads only this machine's provider credentials, REF.
+        self.patch_env(
+            XDG_RUNTIME_DIR=str(self.runtime),
+            XDG_CACHE_HOME=str(self.root / "cache"),
+            DOTFILES_MACHINE_HOSTNAME="sbplt2mkg3xk6",
+        )
+        for name in ("OP_FAIL", secret_client.BROKER_ENV):
+            os.environ.pop(name, None)
+
+    def op_calls(self):
+        return self.calls("op")
+
+    def start_broker(self, ttl=60):
+        server = secret_broker.BrokerServer(secret_client.socket_path(), ttl)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server, thread
+
+
+class SecretBrokerTests(FakeOpTestCase):
+    def test_repeated_reads_are_served_from_memory(self):
+        self.start_broker()
+        with mock.patch.object(secret_client, "start_broker") as start:
+            for _ in range(3):
+                self.assertEqual(secret_client.read_secret(ACCOUNT, REF), SECRET)
+        start.assert_not_called()
+        self.assertEqual(self.op_calls(), [f"read {REF}"])
+
+        path = secret_client.socket_path()
+        self.assertEqual(stat.S_IMODE(os.stat(path).st_mode), 0o600)
+        self.assertEqual(stat.S_IMODE(os.stat(os.path.dirname(path)).st_mode), 0o700)
+        status = secret_client.ask_broker({"op": "status"})
+        self.assertEqual(status["secrets"], 1)
+
+        # Nothing but the fake op's own log holds the secret on disk.
+        for parent, _, names in os.walk(self.root):
+            for name in names:
+                file = Path(parent) / name
+                if file.is_file() and file != self.log:
+                    self.assertNotIn(SECRET.encode(), file.read_bytes(), file)
+
+    def test_only_configured_provider_credentials_are_read(self):
+        self.assertEqual(secret_broker.configured_secrets(), {(ACCOUNT, REF)})
+        server, _ = self.start_broker()
+        idle_since = server.last_request
+        for account, ref in ((ACCOUNT, "op://Private/bank/password"), ("other", REF)):
+            with self.assertRaisesRegex(secret_client.SecretError, "not a provider credential"):
+                secret_client.read_secret(account, ref)
+        self.assertEqual(self.op_calls(), [])
+        # Refused reads do not keep an idle broker alive.
+        self.assertEqual(server.last_request, idle_since)
+
+    def test_secrets_expire_after_the_ttl(self):
+        now = [0.0]
+        cache = secret_broker.SecretCache(ttl=10, clock=lambda: now[0])
+        cache.put((ACCOUNT, REF), SECRET)
+        now[0] = 9.9
+        self.assertEqual(cache.get((ACCOUNT, REF)), SECRET)
+        now[0] = 10.0
+        self.assertIsNone(cache.get((ACCOUNT, REF)))
+        self.assertEqual(len(cache), 0)
+
+    def test_lock_forgets_every_secret(self):
+        self.start_broker()
+        secret_client.read_secret(ACCOUNT, REF)
+        self.assertEqual(secret_client.ask_broker({"op": "lock"}), {"ok": True})
+        secret_client.read_secret(ACCOUNT, REF)
+        self.assertEqual(len(self.op_calls()), 2)
+
+    def test_screen_lock_clears_and_idle_stops_the_broker(self):
+        server, thread = self.start_broker()
+        secret_client.read_secret(ACCOUNT, REF)
+        server.watch(idle=0.2, poll=0.05, locked=lambda: True)
+        thread.join(timeout=5)
+        self.assertFalse(thread.is_alive())
+        self.assertEqual(len(server.cache), 0)
+
+    def test_only_one_broker_serves(self):
+        self.start_broker()
+        lock = secret_client.socket_dir() + "/secret-broker.lock"
+        with open(lock, "w") as held:
+            secret_broker.fcntl.flock(held, secret_broker.fcntl.LOCK_EX)
+            self.assertEqual(secret_broker.serve(secret_client.socket_path(), idle=1), 0)
+        # The running broker's socket was left alone.
+        self.assertTrue(secret_client.ask_broker({"op": "status"})["ok"])
+
+
+class SecretClientTests(FakeOpTestCase):
+    def test_without_a_broker_op_is_used_and_the_broker_started(self):
+        with mock.patch.object(secret_client, "start_broker") as start:
+            self.assertEqual(secret_client.read_secret(ACCOUNT, REF), SECRET)
+        start.assert_called_once_with()
+
+        os.environ[secret_client.BROKER_ENV] = "off"
+        with mock.patch.object(secret_client, "start_broker") as start:
+            self.assertEqual(secret_client.read_secret(ACCOUNT, REF), SECRET)
+        start.assert_not_called()
+
+    def test_op_failures_are_reported(self):
+        self.start_broker()
+        os.environ["OP_FAIL"] = "1"
+        with self.assertRaisesRegex(secret_client.SecretError, "not signed in"):
+            secret_client.read_secret(ACCOUNT, REF)
+        # The broker's failed `op read` is not repeated by the client.
+        self.assertEqual(self.op_calls(), [f"read {REF}"])
+
+    def test_a_foreign_socket_directory_is_refused(self):
+        directory = Path(secret_client.socket_dir())
+        directory.mkdir(mode=0o755)
+        directory.chmod(0o755)
+        with self.assertRaises(secret_client.SecretError):
+            secret_client.private_dir(str(directory))
+
+    def test_provider_credential_read_prints_the_secret(self):
+        script = REPO_ROOT / "script" / "provider_credential.py"
+        env = {
+            **os.environ,
+            "DOTFILES_MACHINE_HOSTNAME": "sbplt2mkg3xk6",
+            "XDG_CACHE_HOME": str(self.root / "cache"),
+            secret_client.BROKER_ENV: "off",
+        }
+        result = subprocess.run(
+            [sys.executable, str(script), "--read", "litellm"],
+            capture_output=True, text=True, check=False, env=env,
+        )
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stdout, f"{SECRET}\n")
+        self.assertEqual(self.op_calls(), [f"read {REF}"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,39 +1,103 @@
-import importlib.util
+import contextlib
+import io
 import os
 import sys
 import tempfile
 import unittest
 from pathlib import Path
+from typing import ClassVar
 from unittest import mock
 
 REPO_ROOT = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(REPO_ROOT / "script"))
 
 import helpers
+from stubs import StubToolTestCase, load_module
 
+ssh_installer = load_module("dotfiles_ssh_installer", REPO_ROOT / "ssh" / "install.py")
+git_installer = load_module("dotfiles_git_installer", REPO_ROOT / "git" / "install.py")
 
-def load_module(name, path):
-    spec = importlib.util.spec_from_file_location(name, path)
-    module = importlib.util.module_from_spec(spec)
-    spec.loader.exec_module(module)
-    return module
 
+# Fills a template in the way `op inject` does, with a two-line secret for
+# references ending in /multi.
+FAKE_OP = """\
+import re
+
+def secret(match):
+    ref = match.group(1)
+    if ref.endswith("/multi"):
+        return "line one\\nline two"
+    return "secret of " + ref
+
+sys.stdout.write(re.sub(r"{{ (.+?) }}", secret, sys.stdin.read()))
+"""
 
-ssh_installer = load_module("dotfiles_ssh_installer", REPO_ROOT / "ssh" / "install.py")
-git_installer = load_module("dotfiles_git_installer", REPO_ROOT / "git" / "install.py")
+
+class OpSecretsTests(StubToolTestCase):
+    STUBS: ClassVar[dict] = {"op": FAKE_OP}
+
+    def setUp(self):
+        super().setUp()
+        output = contextlib.redirect_stdout(io.StringIO())
+        self.stdout = output.__enter__()
+        self.addCleanup(output.__exit__, None, None, None)
+
+    def test_one_op_inject_per_account_writes_every_file(self):
+        secrets = helpers.OpSecrets()
+        secrets.add({"ref": "op://v/a/key", "account": "work"}, self.root / "a")
+        secrets.add({"ref": "op://v/b/multi", "account": "work"}, self.root / "b", 0o644)
+        secrets.add({"ref": "op://v/a/key", "account": "work"}, self.root / "a2")
+        secrets.add("op://v/c/public key", self.root / "c")
+
+        self.assertEqual(len(secrets.write()), 4)
+        self.assertEqual(
+            self.calls("op"),
+            ["inject --account work", f"inject --account {helpers.OP_DEFAULT_ACCOUNT}"],
+        )
+        self.assertEqual((self.root / "a").read_text(), "secret of op://v/a/key")
+        self.assertEqual((self.root / "a2").read_text(), "secret of op://v/a/key")
+        self.assertEqual((self.root / "b").read_text(), "line one\nline two")
+        self.assertEqual((self.root / "c").read_text(), "secret of op://v/c/public key")
+        self.assertEqual((self.root / "a").stat().st_mode & 0o777, 0o600)
+        self.assertEqual((self.root / "b").stat().st_mode & 0o777, 0o644)
+
+        # Unchanged files are left alone.
+        self.assertEqual(secrets.write(), [])
+
+    def test_dry_run_lists_references_and_runs_nothing(self):
+        helpers.set_dry_run(True)
+        self.addCleanup(helpers.set_dry_run, False)
+        secrets = helpers.OpSecrets()
+        secrets.add({"ref": "op://v/a/key", "account": "work"}, self.root / "a")
+        secrets.write()
+
+        self.assertIn("would fetch op://v/a/key (account work)", self.stdout.getvalue())
+        self.assertEqual(self.calls("op"), [])
+        self.assertFalse((self.root / "a").exists())
 
 
 class SshGitPathTests(unittest.TestCase):
     def setUp(self):
         helpers.set_dry_run(False)
 
-    def test_op_write_uses_path_and_explicit_account(self):
-        with mock.patch.object(ssh_installer.subprocess, "run") as run:
-            ssh_installer.op_write_secret("work", "op://vault/key/public", "/key")
+    def test_public_key_is_written_through_one_op_inject_batch(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            pub = Path(tmp) / "ai_ed25519.pub"
+            with (
+                mock.patch.object(ssh_installer, "AI_KEY_PUB_PATH", pub),
+                mock.patch.object(ssh_installer, "AI_KEY_PATH", Path(tmp) / "ai_ed25519"),
+                mock.patch.object(helpers, "op_inject", return_value={
+                    "op://vault/key/public key": "ssh-ed25519 AAAA",
+                }) as op_inject,
+                contextlib.redirect_stdout(io.StringIO()),
+            ):
+                secrets = helpers.OpSecrets()
+                ssh_installer.add_ai_ssh_key(secrets, "work", "vault", "key")
+                self.assertEqual(secrets.write(), [pub])
 
-        command = run.call_args.args[0]
-        self.assertEqual(command[0], "op")
-        self.assertEqual(command[1:4], ["read", "--account", "work"])
+            op_inject.assert_called_once_with("work", ["op://vault/key/public key"])
+            self.assertEqual(pub.read_text(), "ssh-ed25519 AAAA")
+            self.assertEqual(pub.stat().st_mode & 0o777, 0o644)
 
     def test_askpass_has_explicit_account_and_repairs_mode_when_unchanged(self):
         with tempfile.TemporaryDirectory() as tmp:
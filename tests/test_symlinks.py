@@ -0,0 +1,137 @@
+"""Tests for the one-pass *.symlink reconciler (script/symlinks.py)."""
+
+import contextlib
+import io
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "script"))
+
+import helpers
+import symlinks
+
+
+class ReconcileSymlinksTests(unittest.TestCase):
+    def setUp(self):
+        helpers.set_dry_run(False)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        base = Path(tmp.name).resolve()
+        self.root = base / "dotfiles"
+        self.home = base / "home"
+        self.home.mkdir()
+        self.zsh = self.add_topic("zsh", "zshrc", "zprofile")
+        (self.zsh / "symlinks.txt").write_text(
+            "zshrc.symlink -> ~/.zshrc\nzprofile.symlink -> ~/.config/zsh/zprofile\n"
+        )
+        self.manual = self.add_topic("codex", "models.json")
+        for name, value in (
+            ("HOME", self.home),
+            ("HOME_STR", str(self.home)),
+            ("NOW", "20260101_000000"),
+        ):
+            patcher = mock.patch.object(helpers, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(
+            symlinks, "state_path", return_value=base / "state" / "symlinks.json"
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        output = contextlib.redirect_stdout(io.StringIO())
+        output.__enter__()
+        self.addCleanup(output.__exit__, None, None, None)
+
+    def add_topic(self, name, *sources):
+        topic_dir = self.root / name
+        topic_dir.mkdir(parents=True)
+        for source in sources:
+            (topic_dir / f"{source}.symlink").write_text(f"{source}\n")
+        return topic_dir
+
+    def reconcile(self, scope=None):
+        return symlinks.reconcile_symlinks(self.root, {"zsh"}, scope=scope)
+
+    def test_declared_links_are_created_then_left_alone(self):
+        report = self.reconcile()
+        self.assertEqual((report.created, report.current), (2, 0))
+        self.assertEqual((self.home / ".zshrc").readlink(), self.zsh / "zshrc.symlink")
+        self.assertEqual(
+            (self.home / ".config" / "zsh" / "zprofile").readlink(),
+            self.zsh / "zprofile.symlink",
+        )
+        self.assertFalse((self.home / ".models.json").exists())
+
+        with mock.patch.object(symlinks, "link_file") as link_file:
+            report = self.reconcile()
+        link_file.assert_not_called()
+        self.assertEqual((report.created, report.fixed, report.current), (0, 0, 2))
+
+    def test_links_into_ssh_create_it_private(self):
+        ssh = self.add_topic("ssh", "config")
+        (ssh / "symlinks.txt").write_text("config.symlink -> ~/.ssh/config\n")
+        with mock.patch.object(helpers, "SSH_CONFIG_DIR", self.home / ".ssh"):
+            symlinks.reconcile_symlinks(self.root, {"zsh", "ssh"})
+        self.assertEqual((self.home / ".ssh" / "config").readlink(), ssh / "config.symlink")
+        self.assertEqual((self.home / ".ssh").stat().st_mode & 0o777, 0o700)
+
+    def test_wrong_links_and_files_are_fixed_with_a_backup(self):
+        (self.home / ".zshrc").write_text("hand-written\n")
+        (self.home / ".config" / "zsh").mkdir(parents=True)
+        (self.home / ".config" / "zsh" / "zprofile").symlink_to(self.home)
+
+        report = self.reconcile()
+
+        self.assertEqual((report.created, report.fixed), (0, 2))
+        self.assertEqual((self.home / ".zshrc").resolve(), self.zsh / "zshrc.symlink")
+        backup = self.home / ".dotfiles-backup" / "20260101_000000" / ".zshrc"
+        self.assertEqual(backup.read_text(), "hand-written\n")
+
+    def test_links_no_topic_declares_are_pruned(self):
+        self.reconcile()
+        # zprofile's destination moves, and zlogin.symlink was deleted.
+        (self.zsh / "symlinks.txt").write_text(
+            "zshrc.symlink -> ~/.zshrc\nzprofile.symlink -> ~/.zprofile\n"
+        )
+        (self.home / ".zlogin").symlink_to(self.zsh / "zlogin.symlink")
+        # Other topics' links are kept while their source exists.
+        (self.home / ".codex").mkdir()
+        (self.home / ".codex" / "models.json").symlink_to(self.manual / "models.json.symlink")
+        (self.home / ".codexrc").symlink_to(self.manual / "gone.symlink")
+        (self.home / ".elsewhere").symlink_to("/etc/hosts")
+
+        report = self.reconcile()
+
+        self.assertEqual((report.created, report.pruned), (1, 3))
+        self.assertFalse((self.home / ".config" / "zsh" / "zprofile").is_symlink())
+        self.assertFalse((self.home / ".zlogin").is_symlink())
+        self.assertFalse((self.home / ".codexrc").is_symlink())
+        self.assertTrue((self.home / ".codex" / "models.json").is_symlink())
+        self.assertTrue((self.home / ".elsewhere").is_symlink())
+        pruned = self.home / ".dotfiles-backup" / "20260101_000000" / ".zlogin"
+        self.assertEqual(pruned.readlink(), self.zsh / "zlogin.symlink")
+
+    def test_pruning_stays_within_the_selected_topics(self):
+        (self.home / ".codexrc").symlink_to(self.manual / "gone.symlink")
+        self.assertEqual(self.reconcile(scope={"zsh"}).pruned, 0)
+        self.assertEqual(self.reconcile(scope={"codex"}).pruned, 1)
+
+    def test_dry_run_changes_nothing(self):
+        (self.home / ".zlogin").symlink_to(self.zsh / "zlogin.symlink")
+        helpers.set_dry_run(True)
+        self.addCleanup(helpers.set_dry_run, False)
+
+        report = self.reconcile()
+
+        self.assertEqual((report.created, report.pruned), (2, 1))
+        self.assertFalse((self.home / ".zshrc").is_symlink())
+        self.assertTrue((self.home / ".zlogin").is_symlink())
+        self.assertFalse(symlinks.state_path().exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,162 @@
+"""Tests for script/verify.py, the read-only drift detector."""
+
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(REPO_ROOT / "script"))
+
+import helpers
+import verify
+
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+onepassword = load_module(
+    "dotfiles_onepassword_verify", REPO_ROOT / "1password" / "install.py"
+)
+
+GENERATING_TOPIC = """\
+import sys
+sys.path.insert(0, {script_dir!r})
+from helpers import ManagedFile
+
+def managed_files():
+    return [ManagedFile({path!r}, "generated\\n", 0o600)]
+"""
+
+LINKING_TOPIC = """\
+import sys
+sys.path.insert(0, {script_dir!r})
+from helpers import install_symlinks
+
+LINK_SYMLINKS = True
+"""
+
+BROKEN_TOPIC = """\
+def managed_files():
+    raise ValueError("no machine config")
+"""
+
+
+class VerifyTests(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = Path(tmp.name) / "dotfiles"
+        self.home = Path(tmp.name) / "home"
+        self.generated = self.home / "generated.conf"
+        self.link = self.home / ".linked"
+        self.add_topic("gen", GENERATING_TOPIC.format(
+            script_dir=str(REPO_ROOT / "script"), path=str(self.generated)
+        ))
+        links = self.add_topic("links", LINKING_TOPIC.format(
+            script_dir=str(REPO_ROOT / "script")
+        ))
+        (links / "rc.symlink").write_text("rc\n")
+        (links / "symlinks.txt").write_text(f"rc.symlink -> {self.link}\n")
+        # *.symlink files of a topic that links them itself are not checked.
+        (self.add_topic("manual", "") / "manual.symlink").write_text("")
+
+    def add_topic(self, name, source):
+        topic_dir = self.root / name
+        topic_dir.mkdir(parents=True)
+        (topic_dir / "install.py").write_text(source)
+        return topic_dir
+
+    def drift(self):
+        checked, drift, errors = verify.verify(self.root, jobs=2)
+        self.assertEqual(checked, 2)
+        self.assertEqual(errors, {})
+        return {
+            topic: [(path.name, why) for path, why in found]
+            for topic, found in drift.items()
+        }
+
+    def test_missing_state_is_drift(self):
+        self.assertEqual(self.drift(), {
+            "gen": [("generated.conf", "missing")],
+            "links": [(".linked", "missing")],
+        })
+
+    def test_installed_state_has_no_drift(self):
+        self.home.mkdir()
+        self.generated.write_text("generated\n")
+        self.generated.chmod(0o600)
+        self.link.symlink_to(self.root / "links" / "rc.symlink")
+        self.assertEqual(self.drift(), {})
+
+    def test_edits_and_foreign_links_are_drift(self):
+        self.home.mkdir()
+        self.generated.write_text("edited\n")
+        self.link.symlink_to(self.home)
+        self.assertEqual(self.drift(), {
+            "gen": [("generated.conf", "content differs")],
+            "links": [(".linked", f"points to {self.home}")],
+        })
+
+        self.generated.write_text("generated\n")
+        self.generated.chmod(0o644)
+        self.link.unlink()
+        self.link.write_text("rc\n")
+        self.assertEqual(self.drift(), {
+            "gen": [("generated.conf", "mode 0o644, expected 0o600")],
+            "links": [(".linked", "not a symlink")],
+        })
+
+    def test_topic_that_cannot_compute_its_state_is_an_error(self):
+        self.add_topic("broken", BROKEN_TOPIC)
+        _, _, errors = verify.verify(self.root)
+        self.assertEqual(errors, {"broken": "ValueError: no machine config"})
+
+    def test_verify_writes_no_cache(self):
+        cache = Path(self.root.parent) / "cache"
+        cache.mkdir()
+        with (
+            mock.patch.object(helpers, "XDG_CACHE_HOME_STR", str(cache)),
+            mock.patch.object(helpers, "__machine_config", None),
+            mock.patch.dict(helpers._git_emails, clear=True),
+            mock.patch.dict(
+                os.environ, {helpers.MACHINE_HOSTNAME_ENV: "sbplt2mkg3xk6"}
+            ),
+        ):
+            # The real topics read the machine config and git email.
+            checked, _, _ = verify.verify(REPO_ROOT)
+        self.assertGreater(checked, 0)
+        self.assertEqual(list(cache.rglob("*")), [])
+        self.assertTrue(helpers._WRITE_CACHES)
+
+    def test_generated_agent_config_verifies_clean(self):
+        config_dir = self.home / "1Password" / "ssh"
+        agent_toml = config_dir / "agent.toml"
+        machine = {"ssh": {"keys": [
+            {"name": "key", "op_vault": "Vault", "op_account": "my.1password.eu",
+             "auth": True},
+        ]}}
+        with (
+            mock.patch.object(onepassword, "OP_SSH_CONFIG_DIR", config_dir),
+            mock.patch.object(onepassword, "SSH_AGENT_TOML", agent_toml),
+            mock.patch.object(
+                onepassword, "get_machine_config", return_value=(machine, "test")
+            ),
+        ):
+            [expected] = onepassword.managed_files()
+            self.assertEqual(expected.drift(), "missing")
+            helpers.set_dry_run(False)
+            onepassword.install_1password_ssh_agent_config()
+            self.assertIsNone(expected.drift())
+        self.assertEqual(os.stat(agent_toml).st_mode & 0o777, 0o644)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -15,6 +15,8 @@ from helpers import (
     success,
 )
 
+LINK_SYMLINKS = True
+
 
 def main():
     parse_dry_run()
@@ -7,6 +7,8 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "script"))
 from helpers import install_symlinks, parse_dry_run
 
+LINK_SYMLINKS = True
+
 
 def main():
     parse_dry_run()